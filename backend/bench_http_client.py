@@ -0,0 +1,105 @@
+"""Benchmark outbound provider calls: a fresh requests.post per call vs the pooled OutboundHttp client.
+
+Usage:
+    python bench_http_client.py [--calls 200] [--concurrency 32] [--latency-ms 20]
+
+Both sides send uncached translation calls to fake_openai.py, started as a subprocess on a local
+port. The sequential pass shows the per-call connection setup that keep-alive removes. Over TLS to a
+real provider the handshake makes that gap larger. The concurrent pass compares one thread per
+in-flight call with coroutines on the shared client.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def legacy_translate(base_url, text):
+    resp = requests.post(
+        f"{base_url}/chat/completions",
+        headers={"Authorization": "Bearer test", "Content-Type": "application/json"},
+        json={
+            "model": "gpt-4o-mini",
+            "messages": [
+                {"role": "system", "content": "You are a helpful translator."},
+                {"role": "user", "content": f"Target language: hi.\nText: {text}"},
+            ],
+        },
+        timeout=60,
+    )
+    return resp.json()["choices"][0]["message"]["content"]
+
+
+def report(label, calls, seconds):
+    print(f"  {label:<34} {seconds * 1000:9.1f} ms total  {seconds * 1000 / calls:7.2f} ms/call  {calls / seconds:8.1f} calls/s")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--calls", type=int, default=200)
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--latency-ms", type=int, default=20, help="simulated provider latency per call")
+    args = ap.parse_args()
+
+    # The stub runs in its own process so it doesn't compete with the clients for the GIL
+    server = subprocess.Popen(
+        [sys.executable, "-u", "fake_openai.py", "--port", "0", "--first-token-ms", str(args.latency_ms), "--token-ms", "0"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    base_url = server.stdout.readline().split()[-1]
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ.setdefault("OPENAI_API_KEY", "test")
+    import main as app_main  # reads OPENAI_BASE_URL at import
+
+    texts = [f"Rumtek monastery question {i}" for i in range(args.calls)]
+    # Uncached translation calls, so the translation memory doesn't short-circuit the comparison
+    def pooled_translate(text):
+        return app_main.outbound.run(app_main._openai_translate([text], "hi"))
+
+    pooled_translate(texts[0])  # warm the pool and the loop thread
+    legacy_translate(base_url, texts[0])
+
+    print(f"{args.calls} calls, {args.latency_ms} ms simulated latency, HTTP/2 negotiation {'on' if app_main.HTTP2 else 'off'}")
+    print("sequential:")
+    t = time.perf_counter()
+    for text in texts:
+        legacy_translate(base_url, text)
+    report("requests.post per call", args.calls, time.perf_counter() - t)
+    t = time.perf_counter()
+    for text in texts:
+        pooled_translate(text)
+    report("pooled client (sync wrapper)", args.calls, time.perf_counter() - t)
+
+    print(f"concurrent ({args.concurrency} in flight):")
+    t = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(lambda text: legacy_translate(base_url, text), texts))
+    report(f"{args.concurrency} threads x requests.post", args.calls, time.perf_counter() - t)
+
+    async def pooled():
+        slots = asyncio.Semaphore(args.concurrency)
+
+        async def one(text):
+            async with slots:
+                return await app_main._openai_translate([text], "hi")
+
+        return await asyncio.gather(*(one(text) for text in texts))
+
+    t = time.perf_counter()
+    asyncio.run(pooled())
+    report("coroutines on pooled client", args.calls, time.perf_counter() - t)
+    print(f"requests per host on the pooled client: {dict(app_main.outbound.sent)}")
+
+    app_main.outbound.close()
+    server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark /ai/qna dense retrieval: legacy JSON + _cosine scan vs the float32 VectorStore.
+
+Usage:
+    python bench_vector_store.py [--sizes 1000 100000 1000000] [--dim 256] [--legacy-max 100000] [--ann]
+
+The legacy path (json.loads every row, pure-Python cosine, full sort) is skipped above
+--legacy-max because it takes minutes at 1M vectors. With --ann, an IVF index is also built
+at each size and its recall@k / latency per nprobe is reported against the exact scan.
+"""
+import argparse
+import json
+import tempfile
+import time
+
+import numpy as np
+
+from main import VectorStore, _cosine, ann_recall_report
+
+
+def legacy_search(rows, q, k):
+    scored = []
+    for row_id, vec_json in rows:
+        vec = json.loads(vec_json)
+        scored.append((_cosine(q, vec), row_id))
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return scored[:k]
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000])
+    ap.add_argument("--dim", type=int, default=256)
+    ap.add_argument("--top-k", type=int, default=5)
+    ap.add_argument("--legacy-max", type=int, default=100000)
+    ap.add_argument("--ann", action="store_true", help="also build an IVF index and report recall@k")
+    ap.add_argument("--topics", type=int, default=2000, help="cluster centres for the synthetic corpus")
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"dim={args.dim} top_k={args.top_k}")
+    print(f"{'vectors':>10} {'legacy (s)':>12} {'store load (s)':>15} {'store query (ms)':>17} {'speedup':>9}")
+    for n in args.sizes:
+        # Text embeddings cluster by topic; isotropic noise would be a worst case no real corpus hits
+        centres = rng.standard_normal((min(args.topics, n), args.dim), dtype=np.float32)
+        matrix = centres[rng.integers(0, len(centres), n)] + 0.75 * rng.standard_normal((n, args.dim), dtype=np.float32)
+        q = rng.standard_normal(args.dim, dtype=np.float32).tolist()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            store = VectorStore(tmp)
+            store.write(list(range(n)), matrix, build_ann=False)
+            reader = VectorStore(tmp)
+            load_s = timed(reader.load, 1)
+            reader.search(q, args.top_k)  # fault the mapping in once
+            store_s = timed(lambda: reader.search(q, args.top_k), 5)
+            store_top = [rid for _, rid in reader.search(q, args.top_k)]
+
+        legacy_s = None
+        if n <= args.legacy_max:
+            rows = [(i, json.dumps([float(x) for x in matrix[i]])) for i in range(n)]
+            legacy_s = timed(lambda: legacy_search(rows, q, args.top_k), 1)
+            legacy_top = [rid for _, rid in legacy_search(rows, q, args.top_k)]
+            assert legacy_top == store_top, (legacy_top, store_top)
+        legacy_col = f"{legacy_s:12.3f}" if legacy_s is not None else f"{'skipped':>12}"
+        speedup = f"{legacy_s / store_s:8.0f}x" if legacy_s is not None else f"{'-':>9}"
+        print(f"{n:>10} {legacy_col} {load_s:15.3f} {store_s * 1000:17.2f} {speedup}")
+
+        if args.ann:
+            with tempfile.TemporaryDirectory() as tmp:
+                t = time.perf_counter()
+                VectorStore(tmp).write(list(range(n)), matrix, build_ann=True)
+                build_s = time.perf_counter() - t
+                reader = VectorStore(tmp)
+                reader.load()
+                report = ann_recall_report(reader, k=10)
+            print(f"           ivf: nlist={report['nlist']} build={build_s:.1f}s exact={report['exact_avg_ms']:.2f}ms")
+            for row in report["results"]:
+                print(f"           nprobe={row['nprobe']:<3} recall@10={row['recall_at_k']:.3f} {row['avg_ms']:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Local stand-in for the OpenAI endpoints the backend calls, for offline runs and benchmarks.
+
+Usage:
+    python fake_openai.py [--port 8089] [--first-token-ms 800] [--token-ms 20]
+    OPENAI_BASE_URL=http://127.0.0.1:8089 OPENAI_API_KEY=test uvicorn main:app
+
+Implements POST /chat/completions (plain and `stream: true` SSE), POST /embeddings
+(deterministic hashed bag-of-words vectors) and POST /audio/speech (silent MP3 frames). Translation
+prompts get each text back tagged with its target language. Latencies are simulated so
+time-to-first-byte of streamed and non-streamed answers can be compared.
+"""
+import argparse
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+EMBED_DIM = 64
+
+
+def fake_answer(messages):
+    """A canned answer that cites the first [type:id] label found in the prompt."""
+    prompt = messages[-1]["content"] if messages else ""
+    labels = re.findall(r"\[(?:monastery|event|archive):\d+\]", prompt)
+    cite = labels[0] if labels else "[monastery:0]"
+    return f"- This is a simulated answer drawn from the supplied context {cite}.\n- It is streamed word by word {cite}."
+
+
+def fake_translation(messages):
+    """Tag the text with its target language, e.g. "[hi] Rumtek Monastery"; batch requests get JSON back."""
+    prompt = messages[-1]["content"] if messages else ""
+    try:
+        batch = json.loads(prompt)
+        lang = batch["target_language"]
+        return json.dumps({"translations": [f"[{lang}] {t}" for t in batch["texts"]]}, ensure_ascii=False)
+    except (ValueError, KeyError, TypeError):
+        pass
+    match = re.match(r"Target language: (.*?)\.\nText: (.*)", prompt, re.S)
+    return f"[{match.group(1)}] {match.group(2)}" if match else prompt
+
+
+def fake_mp3(text):
+    """Silent MPEG-1 Layer III frames (128 kbps, 44.1 kHz), one per ~5 characters of text."""
+    frame = b"\xff\xfb\x90\x64" + b"\x00" * 413
+    return frame * max(1, len(text) // 5)
+
+
+def fake_embedding(text):
+    vec = [0.0] * EMBED_DIM
+    for word in re.findall(r"\w+", text.lower()):
+        h = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+        vec[h % EMBED_DIM] += 1.0 if (h >> 63) & 1 else -1.0
+    norm = math.sqrt(sum(x * x for x in vec)) or 1.0
+    return [x / norm for x in vec]
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # headers and body go out as separate writes on keep-alive connections
+    first_token_s = 0.8
+    token_s = 0.02
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        path = self.path.rstrip("/")
+        if path.endswith("/embeddings"):
+            inputs = body.get("input") or []
+            inputs = [inputs] if isinstance(inputs, str) else inputs
+            self._json(200, {"data": [{"index": i, "embedding": fake_embedding(t)} for i, t in enumerate(inputs)]})
+        elif path.endswith("/chat/completions"):
+            messages = body.get("messages") or []
+            if messages and "translator" in messages[0].get("content", ""):
+                answer = fake_translation(messages)
+            else:
+                answer = fake_answer(messages)
+            time.sleep(self.first_token_s)
+            if not body.get("stream"):
+                time.sleep(self.token_s * len(answer.split()))
+                self._json(200, {"choices": [{"index": 0, "message": {"role": "assistant", "content": answer}}]})
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i, word in enumerate(answer.split(" ")):
+                chunk = {"choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word}}]}
+                self._chunk(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                time.sleep(self.token_s)
+            self._chunk(b"data: [DONE]\n\n")
+            self._chunk(b"")
+        elif path.endswith("/audio/speech"):
+            audio = fake_mp3(body.get("input") or "")
+            time.sleep(self.first_token_s)
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/mpeg")
+            self.send_header("Content-Length", str(len(audio)))
+            self.end_headers()
+            self.wfile.write(audio)
+        else:
+            self._json(404, {"error": {"message": f"unknown path {self.path}"}})
+
+    def _chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+class QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # the default backlog of 5 resets bursts of concurrent connections
+
+    def handle_error(self, request, client_address):
+        pass  # clients closing pooled keep-alive connections is expected
+
+
+def serve(port=0, first_token_ms=800, token_ms=20):
+    """Start the fake server on a background thread. Returns (server, base_url)."""
+    handler = type("ConfiguredHandler", (Handler,), {"first_token_s": first_token_ms / 1000, "token_s": token_ms / 1000})
+    server = QuietServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=8089)
+    ap.add_argument("--first-token-ms", type=int, default=800)
+    ap.add_argument("--token-ms", type=int, default=20)
+    args = ap.parse_args()
+    server, url = serve(args.port, args.first_token_ms, args.token_ms)
+    print(f"fake OpenAI listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,49 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException, Form
-from fastapi.responses import FileResponse, HTMLResponse, RedirectResponse
+from fastapi.responses import FileResponse, HTMLResponse, RedirectResponse, JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Dict, Optional
+from urllib.parse import urlencode
 import os
+import re
+import json
+import math
+import time
+import random
 import shutil
+import hashlib
+import mimetypes
+import threading
+from array import array
+from collections import Counter, OrderedDict, namedtuple
 from uuid import uuid4
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from email.utils import formatdate, parsedate_to_datetime
 import asyncio
-import requests
-from fastapi import Request
+import httpx
+from fastapi import Request, Query
 from fastapi import Body
+from fastapi.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
 
-from sqlalchemy import Column, Integer, String, ForeignKey, create_engine, Float, UniqueConstraint, Text
-from sqlalchemy import text, inspect
+from sqlalchemy import Column, Integer, String, ForeignKey, create_engine, Float, UniqueConstraint, Text, LargeBinary
+from sqlalchemy import text, inspect, Index, case, or_, and_, func
+from sqlalchemy import event as sa_event
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import sessionmaker, relationship, load_only
+from sqlalchemy.orm.attributes import set_committed_value
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # numpy is optional; retrieval falls back to a pure-Python scan
+    np = None
+try:
+    import h2  # type: ignore  # noqa: F401
+except Exception:  # h2 is optional; outbound calls fall back to HTTP/1.1
+    h2 = None
 
 # ------------------- Setup -------------------
 app = FastAPI(title="Monastery360 Backend with SQLite & file_url")
@@ -31,7 +59,7 @@ app.add_middleware(
 )
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", os.path.join(BASE_DIR, "media"))
 os.makedirs(MEDIA_ROOT, exist_ok=True)
 
 # Expose project-level Media directory at /assets (read-only) for exact user images
@@ -68,11 +96,142 @@ MAP_ASSETS_DIR = os.path.abspath(os.path.join(BASE_DIR, "..", "Map", "assets"))
 if os.path.isdir(MAP_ASSETS_DIR):
     app.mount("/map-assets", StaticFiles(directory=MAP_ASSETS_DIR), name="map_assets")
 
-DATABASE_URL = f"sqlite:///{os.path.join(BASE_DIR, 'monastery360.db')}"
+DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{os.path.join(BASE_DIR, 'monastery360.db')}")
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
 SessionLocal = sessionmaker(bind=engine)
 Base = declarative_base()
 
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
+
+# ------------------- Outbound HTTP -------------------
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_MAX_PER_HOST = int(os.getenv("HTTP_MAX_PER_HOST", "20"))  # concurrent requests to one host
+HTTP_KEEPALIVE_SECONDS = float(os.getenv("HTTP_KEEPALIVE_SECONDS", "30"))
+# HTTP/2 is negotiated via ALPN where the provider supports it; needs the h2 package
+HTTP2 = os.getenv("HTTP2", "on").lower() not in ("0", "off", "false", "no") and h2 is not None
+
+class OutboundHttp:
+    """One pooled httpx.AsyncClient shared by every provider call (OpenAI, ElevenLabs, Google, OSRM).
+
+    The client lives on a dedicated event-loop thread, so async endpoints await it without holding a
+    worker thread and sync code (threadpool endpoints, ingest) shares the same keep-alive connections.
+    Each host gets at most HTTP_MAX_PER_HOST requests in flight.
+    """
+
+    def __init__(self, max_connections: int, max_keepalive: int, max_per_host: int, keepalive_expiry: float, http2: bool):
+        self.max_per_host = max_per_host
+        self.http2 = http2
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client = None
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self.sent = Counter()  # host -> requests sent
+
+    def _start(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._client = httpx.AsyncClient(
+                    http2=self.http2,
+                    limits=self._limits,
+                    timeout=httpx.Timeout(60.0, connect=10.0),
+                    follow_redirects=True,
+                )
+                threading.Thread(target=loop.run_forever, name="outbound-http", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def run(self, coro):
+        """Run a coroutine on the client's loop and block until it finishes (for sync callers)."""
+        return asyncio.run_coroutine_threadsafe(coro, self._start()).result()
+
+    async def call(self, coro):
+        """Await a coroutine on the client's loop from any event loop."""
+        loop = self._start()
+        if asyncio.get_running_loop() is loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+    def _slot(self, url: str) -> asyncio.Semaphore:
+        host = httpx.URL(url).netloc.decode("ascii")
+        self.sent[host] += 1
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = asyncio.Semaphore(self.max_per_host)
+        return slot
+
+    async def _request(self, method: str, url: str, kwargs: Dict):
+        async with self._slot(url):
+            return await self._client.request(method, url, **kwargs)
+
+    async def request(self, method: str, url: str, **kwargs):
+        """Send a request and read the whole body. Keyword arguments are those of httpx.AsyncClient.request."""
+        return await self.call(self._request(method, url, kwargs))
+
+    def request_sync(self, method: str, url: str, **kwargs):
+        return self.run(self._request(method, url, kwargs))
+
+    async def _open(self, method: str, url: str, kwargs: Dict):
+        slot = self._slot(url)
+        await slot.acquire()
+        try:
+            timeout = kwargs.pop("timeout", httpx.USE_CLIENT_DEFAULT)
+            request = self._client.build_request(method, url, timeout=timeout, **kwargs)
+            return await self._client.send(request, stream=True), slot
+        except BaseException:
+            slot.release()
+            raise
+
+    @staticmethod
+    async def _next_line(lines):
+        try:
+            return await lines.__anext__()
+        except StopAsyncIteration:
+            return None
+
+    @staticmethod
+    async def _close(resp, slot: asyncio.Semaphore) -> None:
+        try:
+            await resp.aclose()
+        finally:
+            slot.release()
+
+    async def stream_lines(self, method: str, url: str, **kwargs):
+        """Async-iterate the lines of a streamed response body. Raises on a non-2xx status."""
+        resp, slot = await self.call(self._open(method, url, kwargs))
+        try:
+            if not resp.is_success:
+                raise RuntimeError(f"{method} {url} failed: {resp.status_code}")
+            lines = resp.aiter_lines()
+            while True:
+                line = await self.call(self._next_line(lines))
+                if line is None:
+                    break
+                yield line
+        finally:
+            await self.call(self._close(resp, slot))
+
+    def close(self) -> None:
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._client.aclose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        self._host_slots.clear()
+
+outbound = OutboundHttp(HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE, HTTP_MAX_PER_HOST, HTTP_KEEPALIVE_SECONDS, HTTP2)
+
+@app.on_event("shutdown")
+def close_outbound_http():
+    outbound.close()
+
 # Fixed origin for route planning: Sikkim Station (adjust as needed)
 STATION_LAT = 27.3389
 STATION_LNG = 88.6065
@@ -93,7 +252,7 @@ class Monastery(Base):
 class Media(Base):
     __tablename__ = "media"
     id = Column(Integer, primary_key=True, index=True)
-    monastery_id = Column(Integer, ForeignKey("monasteries.id"))
+    monastery_id = Column(Integer, ForeignKey("monasteries.id"), index=True)
     title = Column(String)
     type = Column(String)
     file_path = Column(String)
@@ -117,7 +276,7 @@ class MonasteryInfo(Base):
 class Event(Base):
     __tablename__ = "events"
     id = Column(Integer, primary_key=True)
-    monastery_id = Column(Integer, ForeignKey("monasteries.id"))
+    monastery_id = Column(Integer, ForeignKey("monasteries.id"), index=True)
     title = Column(String)
     date = Column(String)
     time = Column(String)
@@ -130,7 +289,7 @@ class Event(Base):
 class ArchiveItem(Base):
     __tablename__ = "archive_items"
     id = Column(Integer, primary_key=True)
-    monastery_id = Column(Integer, ForeignKey("monasteries.id"))
+    monastery_id = Column(Integer, ForeignKey("monasteries.id"), index=True)
     title = Column(String)
     type = Column(String)  # manuscript | mural | artifact | document
     description = Column(String)
@@ -142,7 +301,7 @@ class ArchiveItem(Base):
 class AudioHighlight(Base):
     __tablename__ = "audio_highlights"
     id = Column(Integer, primary_key=True)
-    monastery_id = Column(Integer, ForeignKey("monasteries.id"))
+    monastery_id = Column(Integer, ForeignKey("monasteries.id"), index=True)
     title = Column(String)
     description = Column(String)
     duration_sec = Column(Integer)
@@ -155,8 +314,20 @@ class EmbeddingRow(Base):
     doc_type = Column(String)  # monastery|event|archive
     doc_id = Column(Integer)
     title = Column(String)
-    content = Column(Text)
-    vector = Column(Text)  # JSON string of list[float]
+    content = Column(Text)  # text of this chunk
+    chunk_no = Column(Integer, default=0)  # position of the chunk within its document
+    chunk_offset = Column(Integer, default=0)  # character offset of the chunk in the document text
+    vector = Column(Text)  # legacy: JSON string of list[float]; new rows use vector_f32
+    vector_f32 = Column(LargeBinary, nullable=True)  # packed float32 embedding
+    content_hash = Column(String, nullable=True)  # hash of embedder + content the vector was computed from
+    __table_args__ = (Index("ix_embeddings_doc", "doc_type", "doc_id"),)
+
+class EmbeddingDirty(Base):
+    __tablename__ = "embedding_dirty"
+    id = Column(Integer, primary_key=True)
+    doc_type = Column(String)  # monastery|event|archive, or '*' after a bulk write (full re-check needed)
+    doc_id = Column(Integer)
+    __table_args__ = (UniqueConstraint("doc_type", "doc_id"),)
 
 class QaCache(Base):
     __tablename__ = "qa_cache"
@@ -166,6 +337,105 @@ class QaCache(Base):
     answer = Column(Text)
     citations = Column(Text)  # JSON string
     created_at = Column(String)
+    question_key = Column(String, nullable=True)  # sha256 of the normalised question
+    hits = Column(Integer, default=0)
+    last_used_at = Column(String, nullable=True)  # drives LRU eviction once the table is full
+    question_vector = Column(LargeBinary, nullable=True)  # packed float32 embedding of the (English) question
+    vector_model = Column(String, nullable=True)  # embedder_signature() the vector came from
+    __table_args__ = (Index("ix_qa_cache_key_lang", "question_key", "lang"),)
+
+class TranslationRow(Base):
+    __tablename__ = "translation_memory"
+    id = Column(Integer, primary_key=True)
+    source_hash = Column(String)  # sha256 of the exact source text
+    target_lang = Column(String)
+    source_text = Column(Text)
+    translation = Column(Text)
+    model = Column(String, nullable=True)  # chat model that produced the translation
+    created_at = Column(String)
+    hits = Column(Integer, default=0)
+    __table_args__ = (UniqueConstraint("source_hash", "target_lang"),)
+
+class TtsAudio(Base):
+    __tablename__ = "tts_audio"
+    id = Column(Integer, primary_key=True)
+    audio_key = Column(String, unique=True)  # sha256 of (provider, model, voice, lang, text)
+    filename = Column(String)  # MP3 under MEDIA_ROOT
+    provider = Column(String)  # openai | elevenlabs | edge | gtts
+    model = Column(String, nullable=True)
+    voice = Column(String, nullable=True)
+    lang = Column(String, nullable=True)
+    size_bytes = Column(Integer, default=0)
+    created_at = Column(String)
+    hits = Column(Integer, default=0)
+    last_used_at = Column(String, nullable=True)
+
+class MediaFile(Base):
+    __tablename__ = "media_files"
+    id = Column(Integer, primary_key=True)
+    filename = Column(String, unique=True)  # name under MEDIA_ROOT
+    size_bytes = Column(Integer)
+    mtime = Column(Float)
+    mime = Column(String)
+    sha256 = Column(String)
+    indexed_at = Column(String)
+
+class MediaBlob(Base):
+    __tablename__ = "media_blobs"
+    id = Column(Integer, primary_key=True)
+    sha256 = Column(String, unique=True)
+    filename = Column(String)  # <sha256><ext>, under MEDIA_ROOT/blobs/<2>/<2>/
+    size_bytes = Column(Integer)
+    refcount = Column(Integer, default=0)  # Media rows whose file_path names this blob
+    created_at = Column(String)
+
+class Upload(Base):
+    __tablename__ = "uploads"
+    id = Column(String, primary_key=True)  # uuid4 hex
+    filename = Column(String)  # client's name; only its extension is kept
+    kind = Column(String)  # media | panorama
+    size_bytes = Column(Integer)  # declared total
+    received_bytes = Column(Integer, default=0)
+    sha256 = Column(String, nullable=True)  # declared by the client, checked on completion
+    content_sha256 = Column(String, nullable=True)  # of the received bytes
+    status = Column(String)  # receiving | writing | complete | consumed
+    created_at = Column(String)
+    updated_at = Column(String)
+
+class Job(Base):
+    __tablename__ = "jobs"
+    id = Column(String, primary_key=True)  # uuid4 hex
+    kind = Column(String)  # key into job_runner's handlers, e.g. 'narration'
+    payload = Column(Text)  # JSON arguments for the handler
+    status = Column(String, default="queued")  # queued | running | done | failed
+    stage = Column(String, nullable=True)  # last progress stage reported by the handler
+    progress = Column(Float, default=0.0)  # 0..1
+    result = Column(Text, nullable=True)  # JSON returned by the handler
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, default=0)
+    created_at = Column(String)
+    started_at = Column(String, nullable=True)
+    heartbeat_at = Column(String, nullable=True)  # refreshed on every progress report while running
+    finished_at = Column(String, nullable=True)
+    __table_args__ = (Index("ix_jobs_status_created", "status", "created_at"),)
+
+class Bm25Term(Base):
+    __tablename__ = "bm25_terms"
+    term = Column(String, primary_key=True)
+    postings = Column(LargeBinary)  # packed int32 pairs: (embedding row id, term frequency)
+
+class Bm25Meta(Base):
+    __tablename__ = "bm25_meta"
+    id = Column(Integer, primary_key=True)
+    generation = Column(String)  # changes on every rebuild so workers know to reload
+    doc_count = Column(Integer, default=0)
+    avg_len = Column(Float, default=0.0)
+    doc_lengths = Column(LargeBinary)  # packed int32 pairs: (embedding row id, token count)
+
+class CatalogState(Base):
+    __tablename__ = "catalog_state"
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, default=0)  # bumped by every write to the monastery catalog
 
 Base.metadata.create_all(bind=engine)
 # Best-effort migration: add 'language' column to media if it doesn't exist yet (SQLAlchemy 2.x compatible)
@@ -179,6 +449,91 @@ try:
 except Exception:
     # Column may already exist or inspect may fail; ignore
     pass
+# Best-effort migration: add packed float32 vector column to embeddings
+try:
+    cols = [c['name'] for c in inspect(engine).get_columns('embeddings')]
+    with engine.connect() as conn:
+        if 'vector_f32' not in cols:
+            conn.execute(text("ALTER TABLE embeddings ADD COLUMN vector_f32 BLOB"))
+        if 'content_hash' not in cols:
+            conn.execute(text("ALTER TABLE embeddings ADD COLUMN content_hash VARCHAR"))
+        if 'chunk_no' not in cols:
+            conn.execute(text("ALTER TABLE embeddings ADD COLUMN chunk_no INTEGER DEFAULT 0"))
+        if 'chunk_offset' not in cols:
+            conn.execute(text("ALTER TABLE embeddings ADD COLUMN chunk_offset INTEGER DEFAULT 0"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_embeddings_doc ON embeddings (doc_type, doc_id)"))
+        conn.commit()
+except Exception:
+    pass
+# Best-effort migration: normalised-key lookup and LRU bookkeeping for the QnA answer cache
+try:
+    cols = [c['name'] for c in inspect(engine).get_columns('qa_cache')]
+    with engine.connect() as conn:
+        if 'question_key' not in cols:
+            conn.execute(text("ALTER TABLE qa_cache ADD COLUMN question_key VARCHAR"))
+        if 'hits' not in cols:
+            conn.execute(text("ALTER TABLE qa_cache ADD COLUMN hits INTEGER DEFAULT 0"))
+        if 'last_used_at' not in cols:
+            conn.execute(text("ALTER TABLE qa_cache ADD COLUMN last_used_at VARCHAR"))
+        if 'question_vector' not in cols:
+            conn.execute(text("ALTER TABLE qa_cache ADD COLUMN question_vector BLOB"))
+        if 'vector_model' not in cols:
+            conn.execute(text("ALTER TABLE qa_cache ADD COLUMN vector_model VARCHAR"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_qa_cache_key_lang ON qa_cache (question_key, lang)"))
+        conn.commit()
+except Exception:
+    pass
+# Index child foreign keys on databases created before they were declared (batched catalog loads filter on them)
+try:
+    with engine.connect() as conn:
+        for table in ("media", "events", "archive_items", "audio_highlights"):
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_monastery_id ON {table} (monastery_id)"))
+        conn.commit()
+except Exception:
+    pass
+# Ensure the single catalog version row exists
+try:
+    with engine.connect() as conn:
+        conn.execute(text("INSERT OR IGNORE INTO catalog_state (id, version) VALUES (1, 0)"))
+        conn.commit()
+except Exception:
+    pass
+
+# ------------------- Embedding Dirty Tracking -------------------
+# Writes to the documents /ai/ingest embeds are recorded in embedding_dirty within the same
+# transaction, so `/ai/ingest?dirty_only=true` only has to look at what actually changed.
+_EMBEDDED_MODELS = (Monastery, MonasteryInfo, Event, ArchiveItem)
+
+def _doc_keys_for(obj) -> List[tuple]:
+    if isinstance(obj, Monastery):
+        return [("monastery", obj.id)]
+    if isinstance(obj, MonasteryInfo):
+        return [("monastery", obj.monastery_id)]
+    if isinstance(obj, Event):
+        return [("event", obj.id)]
+    if isinstance(obj, ArchiveItem):
+        return [("archive", obj.id)]
+    return []
+
+def _record_dirty(session, keys) -> None:
+    session.connection().execute(
+        EmbeddingDirty.__table__.insert().prefix_with("OR IGNORE"),
+        [{"doc_type": t, "doc_id": i} for t, i in keys],
+    )
+
+@sa_event.listens_for(SessionLocal, "after_flush")
+def _mark_embeddings_dirty(session, flush_context):
+    keys = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        keys.update(k for k in _doc_keys_for(obj) if k[1] is not None)
+    if keys:
+        _record_dirty(session, keys)
+
+@sa_event.listens_for(SessionLocal, "do_orm_execute")
+def _mark_bulk_writes_dirty(state):
+    # query(...).delete()/update() bypass the flush; we can't tell which rows changed, so ask for a full check
+    if (state.is_delete or state.is_update) and state.bind_mapper is not None and state.bind_mapper.class_ in _EMBEDDED_MODELS:
+        _record_dirty(state.session, [("*", 0)])
 
 # ------------------- Pydantic Models -------------------
 class MonasteryIn(BaseModel):
@@ -223,12 +578,14 @@ class NarrationIn(BaseModel):
     title: Optional[str] = "Audio Narration"
     voice: Optional[str] = "alloy"
     script: Optional[str] = None
+    chunked: bool = False  # synthesize sentence chunks concurrently and join them
 
 class NarrationMultiIn(BaseModel):
     title: Optional[str] = "Audio Narration"
     voice: Optional[str] = None  # if None, we will select based on language
     script: Optional[str] = None  # source script (assumed EN if translation is needed)
     target_lang: str = "en"  # BCP-47 or ISO code like 'en', 'hi', 'bn', 'ne'
+    chunked: bool = False  # synthesize sentence chunks concurrently and join them
 
 # ------------------- Dependency -------------------
 def get_db():
@@ -238,6 +595,63 @@ def get_db():
     finally:
         db.close()
 
+# ------------------- Catalog Response Cache -------------------
+# Serialized catalog responses keyed by request path+query. Entries are tagged with the
+# catalog version they were built from; any write endpoint bumps the version (persisted in
+# SQLite so all workers agree) which makes older entries stale.
+CATALOG_CACHE_MAX_ENTRIES = int(os.getenv("CATALOG_CACHE_MAX_ENTRIES", "256"))
+_catalog_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_catalog_cache_lock = threading.Lock()
+
+def bump_catalog_version(db) -> None:
+    """Mark the catalog as changed; call before the commit of any catalog write."""
+    db.query(CatalogState).filter(CatalogState.id == 1).update({CatalogState.version: CatalogState.version + 1})
+
+def current_catalog_version(db) -> int:
+    row = db.query(CatalogState.version).filter(CatalogState.id == 1).first()
+    return int(row[0] or 0) if row else 0
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as required for If-None-Match
+    candidates = [t.strip() for t in if_none_match.split(",")]
+    return any((t[2:] if t.startswith("W/") else t) == etag for t in candidates)
+
+def cached_catalog_response(request: Request, db, build) -> Response:
+    """Serve a catalog read from the response cache, rebuilding via build() when stale.
+    build() returns the JSON content, or (content, extra_headers) for headers that should be
+    cached alongside it (e.g. pagination cursors).
+    Sends a strong ETag and answers a matching If-None-Match with 304.
+    """
+    version = current_catalog_version(db)
+    key = request.url.path + ("?" + request.url.query if request.url.query else "")
+    with _catalog_cache_lock:
+        entry = _catalog_cache.get(key)
+        if entry and entry[0] == version:
+            _catalog_cache.move_to_end(key)
+        else:
+            entry = None
+    if entry is None:
+        content, extra_headers = build(), {}
+        if isinstance(content, tuple):
+            content, extra_headers = content
+        body = JSONResponse(content=content).body
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        entry = (version, body, etag, extra_headers)
+        with _catalog_cache_lock:
+            _catalog_cache[key] = entry
+            _catalog_cache.move_to_end(key)
+            while len(_catalog_cache) > CATALOG_CACHE_MAX_ENTRIES:
+                _catalog_cache.popitem(last=False)
+    _, body, etag, extra_headers = entry
+    headers = {"ETag": etag, "Cache-Control": "no-cache", **extra_headers}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @app.post("/admin/seed/coordinates")
 def admin_seed_coordinates(items: List[Dict]):
     """Upsert coordinates for monasteries matched by name (case-insensitive contains).
@@ -267,6 +681,7 @@ def admin_seed_coordinates(items: List[Dict]):
                 info.latitude = float(lat)
                 info.longitude = float(lng)
             updated.append({"id": m.id, "name": m.name, "lat": float(lat), "lng": float(lng)})
+        bump_catalog_version(db)
         db.commit()
         return {"updated": updated}
     finally:
@@ -278,6 +693,7 @@ def api_delete_all_events():
     db = SessionLocal()
     try:
         deleted = db.query(Event).delete()
+        bump_catalog_version(db)
         db.commit()
         return {"deleted": deleted}
     finally:
@@ -323,6 +739,7 @@ def api_create_monastery_event(monastery_id: int, payload: EventIn):
             max_participants=payload.max_participants,
         )
         db.add(row)
+        bump_catalog_version(db)
         db.commit()
         db.refresh(row)
         return {"id": row.id}
@@ -336,6 +753,7 @@ def api_delete_monastery_events(monastery_id: int):
         if not db.query(Monastery).filter(Monastery.id == monastery_id).first():
             raise HTTPException(status_code=404, detail="Monastery not found")
         deleted = db.query(Event).filter(Event.monastery_id == monastery_id).delete()
+        bump_catalog_version(db)
         db.commit()
         return {"deleted": deleted}
     finally:
@@ -366,6 +784,7 @@ def admin_seed_events():
                 can_book="false",
             )
             db.add(row)
+            bump_catalog_version(db)
             db.commit()
             db.refresh(row)
             seeded.append({"monastery_id": mon.id, "event_id": row.id})
@@ -387,19 +806,12 @@ def api_delete_monastery(monastery_id: int):
         db.query(Event).filter(Event.monastery_id == monastery_id).delete()
         db.query(AudioHighlight).filter(AudioHighlight.monastery_id == monastery_id).delete()
         db.query(MonasteryInfo).filter(MonasteryInfo.monastery_id == monastery_id).delete()
-        # Remove media files & rows
-        medias = db.query(Media).filter(Media.monastery_id == monastery_id).all()
-        for md in medias:
-            try:
-                if md.file_path:
-                    fp = os.path.join(MEDIA_ROOT, md.file_path)
-                    if os.path.isfile(fp):
-                        os.remove(fp)
-            except Exception:
-                pass
-            db.delete(md)
+        # Remove media rows, then files no other row references
+        released = delete_media_files(db, db.query(Media).filter(Media.monastery_id == monastery_id).all())
         db.delete(m)
+        bump_catalog_version(db)
         db.commit()
+        blob_store.collect(released)
         return {"deleted": True, "id": monastery_id}
     finally:
         db.close()
@@ -411,7 +823,7 @@ def admin_import_panoramas():
     Matching logic:
     - For each monastery, try to locate a folder in ASSETS_DIR whose name is a substring match of the monastery name tokens.
     - Inside that folder (recursively), pick files containing '360', 'pano', or 'panorama' in their filename and with an image extension.
-    - Copy the first match to MEDIA_ROOT and insert a Media row with type='panorama' if not already present for that monastery.
+    - Store the first match in the blob store (once per distinct file) and insert a Media row with type='panorama' if not already present for that monastery.
     Idempotent: if the monastery already has at least one panorama media, it will skip.
     """
     db = SessionLocal()
@@ -505,15 +917,14 @@ def admin_import_panoramas():
             if not src_file:
                 continue
 
-            base = f"pano_{m.id}_{os.path.basename(src_file)}"
-            dest = os.path.join(MEDIA_ROOT, base)
             try:
-                shutil.copyfile(src_file, dest)
+                base = blob_store.put_file(db, src_file, os.path.splitext(src_file)[1], move=False)
                 db.add(Media(monastery_id=m.id, title=f"{m.name} Panorama", type="panorama", file_path=base))
                 imported.append({"id": m.id, "name": m.name, "file": base})
             except Exception:
                 pass
 
+        bump_catalog_version(db)
         db.commit()
         return {"imported": len(imported), "items": imported}
     finally:
@@ -527,30 +938,23 @@ def admin_delete_panoramas(monastery_id: int):
         m = db.query(Monastery).filter(Monastery.id == monastery_id).first()
         if not m:
             raise HTTPException(status_code=404, detail="Monastery not found")
-        removed = 0
-        for md in list(m.media):
-            if (md.type or "").lower() == "panorama":
-                # remove file
-                try:
-                    if md.file_path:
-                        fp = os.path.join(MEDIA_ROOT, md.file_path)
-                        if os.path.isfile(fp):
-                            os.remove(fp)
-                except Exception:
-                    pass
-                db.delete(md)
-                removed += 1
+        panoramas = [md for md in m.media if (md.type or "").lower() == "panorama"]
+        released = delete_media_files(db, panoramas)
+        bump_catalog_version(db)
         db.commit()
-        return {"removed": removed}
+        blob_store.collect(released)
+        return {"removed": len(panoramas)}
     finally:
         db.close()
 
 @app.post("/admin/monasteries/{monastery_id}/panorama")
-def admin_set_panorama(monastery_id: int, image: UploadFile = File(None), image_url: Optional[str] = Form(None)):
+def admin_set_panorama(monastery_id: int, image: UploadFile = File(None), image_url: Optional[str] = Form(None),
+                       upload_id: Optional[str] = Form(None)):
     """Replace panorama for a monastery.
     - If file uploaded via 'image', save it.
+    - Else if 'upload_id' names a completed resumable upload (kind 'panorama'), use its file.
     - Else if 'image_url' Form provided (e.g., /assets/... or full path under assets), copy it.
-    Removes existing panoramas first, then creates one new entry.
+    Writes the new file, then replaces existing panoramas with one new entry.
     """
     db = SessionLocal()
     try:
@@ -558,27 +962,17 @@ def admin_set_panorama(monastery_id: int, image: UploadFile = File(None), image_
         if not m:
             raise HTTPException(status_code=404, detail="Monastery not found")
 
-        # Remove old panoramas
-        for md in list(m.media):
-            if (md.type or "").lower() == "panorama":
-                try:
-                    if md.file_path:
-                        fp = os.path.join(MEDIA_ROOT, md.file_path)
-                        if os.path.isfile(fp):
-                            os.remove(fp)
-                except Exception:
-                    pass
-                db.delete(md)
-        db.commit()
-
         # Decide source and write new file
         dest_name = None
         if image is not None:
             ext = os.path.splitext(image.filename or "")[1].lower() or ".jpg"
-            dest_name = f"pano_{monastery_id}_{uuid4().hex}{ext}"
-            dest_path = os.path.join(MEDIA_ROOT, dest_name)
-            with open(dest_path, "wb") as f:
-                f.write(image.file.read())
+            tmp = upload_temp_path()
+            _, sha256 = copy_upload(image.file, tmp, PANORAMA_MAX_UPLOAD_BYTES)
+            dest_name = blob_store.put_file(db, tmp, ext, sha256)
+        elif upload_id:
+            tmp = upload_temp_path()
+            original, sha256 = take_upload(upload_id, "panorama", tmp)
+            dest_name = blob_store.put_file(db, tmp, os.path.splitext(original)[1].lower() or ".jpg", sha256)
         elif image_url:
             # If given an /assets path, translate to filesystem path under ASSETS_DIR
             if image_url.startswith("/assets/"):
@@ -586,17 +980,18 @@ def admin_set_panorama(monastery_id: int, image: UploadFile = File(None), image_
                 src_path = os.path.join(ASSETS_DIR, *rel.split("/"))
                 if not os.path.isfile(src_path):
                     raise HTTPException(status_code=400, detail="image_url not found under assets")
-                ext = os.path.splitext(src_path)[1].lower() or ".jpg"
-                dest_name = f"pano_{monastery_id}_{uuid4().hex}{ext}"
-                dest_path = os.path.join(MEDIA_ROOT, dest_name)
-                shutil.copyfile(src_path, dest_path)
+                dest_name = blob_store.put_file(db, src_path, os.path.splitext(src_path)[1].lower() or ".jpg", move=False)
             else:
                 raise HTTPException(status_code=400, detail="Provide an uploaded file or /assets/... URL")
         else:
             raise HTTPException(status_code=400, detail="Provide an uploaded file or image_url")
 
+        # Remove old panoramas now that the new one is in place
+        released = delete_media_files(db, [md for md in m.media if (md.type or "").lower() == "panorama"])
         db.add(Media(monastery_id=m.id, title=f"{m.name} Panorama", type="panorama", file_path=dest_name))
+        bump_catalog_version(db)
         db.commit()
+        blob_store.collect(released)
         return {"status": "ok", "file": f"/media/{dest_name}"}
     finally:
         db.close()
@@ -667,19 +1062,22 @@ def admin_seed_archives():
                     digitalized_date="",
                 ))
             seeded.append({"id": mon.id, "name": mon.name, "count": len(entry["items"])})
+        bump_catalog_version(db)
         db.commit()
         return {"seeded": seeded}
     finally:
         db.close()
 
 @app.get("/api/monasteries/{monastery_id}")
-def api_get_monastery(monastery_id: int):
+def api_get_monastery(monastery_id: int, request: Request):
     db = SessionLocal()
     try:
-        m = db.query(Monastery).filter(Monastery.id == monastery_id).first()
-        if not m:
-            raise HTTPException(status_code=404, detail="Monastery not found")
-        return serialize_monastery(m)
+        def build():
+            m = db.query(Monastery).filter(Monastery.id == monastery_id).first()
+            if not m:
+                raise HTTPException(status_code=404, detail="Monastery not found")
+            return serialize_monastery(m)
+        return cached_catalog_response(request, db, build)
     finally:
         db.close()
 
@@ -689,14 +1087,15 @@ def admin_embeddings_export():
     db = SessionLocal()
     try:
         rows = db.query(EmbeddingRow).all()
-        import json as _json
         data = [
             {
                 "doc_type": r.doc_type,
                 "doc_id": r.doc_id,
                 "title": r.title,
                 "content": r.content,
-                "vector": r.vector,
+                "chunk_no": r.chunk_no or 0,
+                "chunk_offset": r.chunk_offset or 0,
+                "vector": json.dumps(_row_vector(r)),
             }
             for r in rows
         ]
@@ -707,48 +1106,25 @@ def admin_embeddings_export():
 # ------------------- Monasteries CRUD (Simple API) -------------------
 
 @app.get("/api/monasteries")
-def api_list_monasteries():
+def api_list_monasteries(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    after: Optional[int] = None,
+    fields: Optional[str] = None,
+):
+    """List monasteries in id order.
+    - limit/after: cursor pagination; the next page's cursor is sent in X-Next-Cursor and a Link rel="next" header.
+    - fields: comma-separated subset of id,name,image,info,coordinates,events; only the needed columns are selected.
+    """
     db = SessionLocal()
     try:
-        items = db.query(Monastery).all()
-        # Fallback to asset previews when no media exists
-        asset_map = {
-            "Rumtek Monastery": ("Rumtek", "Preview.jpg"),
-            "Pemayangtse Monastery": ("Pemangytse", "Permangytse-preview.jpg"),
-            "Tashiding Monastery": ("Tashiding", "Tashiding-Monastery-Preview.jpg"),
-        }
-        result = []
-        for m in items:
-            img = None
-            if m.media:
-                img = f"/media/{os.path.basename(m.media[0].file_path)}"
-            elif m.name in asset_map:
-                folder, fname = asset_map[m.name]
-                img = f"/assets/{folder}/{fname}"
-            # include events for Events page
-            evs = [
-                {
-                    "id": e.id,
-                    "title": e.title,
-                    "date": e.date,
-                    "time": e.time,
-                    "description": e.description,
-                    "type": e.type,
-                }
-                for e in m.events
-            ]
-            result.append({
-                "id": m.id,
-                "name": m.name,
-                "image": img,
-                "info": (m.info.description if m.info and m.info.description else None),
-                "coordinates": ({
-                    "lat": (m.info.latitude if m.info else None),
-                    "lng": (m.info.longitude if m.info else None),
-                } if m.info else None),
-                "events": evs,
-            })
-        return result
+        wanted = parse_catalog_fields(fields, SUMMARY_FIELDS)
+        columns, children = catalog_load_plan(wanted, SUMMARY_FIELDS)
+
+        def build():
+            items = load_catalog(db, limit=limit, after=after, columns=columns, children=children)
+            return [serialize_monastery_summary(m, wanted) for m in items], catalog_page_headers(request, items, limit)
+        return cached_catalog_response(request, db, build)
     finally:
         db.close()
 
@@ -767,6 +1143,7 @@ def api_create_monastery(payload: MonasteryCreate):
     try:
         m = Monastery(name=payload.name, location=payload.location, founded=payload.founded)
         db.add(m)
+        bump_catalog_version(db)
         db.commit()
         db.refresh(m)
 
@@ -777,8 +1154,10 @@ def api_create_monastery(payload: MonasteryCreate):
         if payload.image:
             # Accept a URL or /media/ path; store basename in file_path for consistency
             file_name = os.path.basename(payload.image)
+            blob_store.acquire(db, file_name)
             db.add(Media(monastery_id=m.id, title=f"{payload.name} Image", type="image", file_path=file_name))
 
+        bump_catalog_version(db)
         db.commit()
         return {"id": m.id, "name": m.name}
     finally:
@@ -795,8 +1174,11 @@ def api_delete_all_monasteries():
         db.query(AudioHighlight).delete()
         db.query(MonasteryInfo).delete()
         db.query(Media).delete()
+        released = blob_store.release_all(db)
         db.query(Monastery).delete()
+        bump_catalog_version(db)
         db.commit()
+        blob_store.collect(released)
         return {"deleted": True}
     finally:
         db.close()
@@ -858,8 +1240,11 @@ def admin_seed_monasteries():
         db.query(AudioHighlight).delete()
         db.query(MonasteryInfo).delete()
         db.query(Media).delete()
+        released = blob_store.release_all(db)
         db.query(Monastery).delete()
+        bump_catalog_version(db)
         db.commit()
+        blob_store.collect(released)
 
         # Insert seed (attach preview images from /assets when available by copying into /media)
         created = []
@@ -871,6 +1256,7 @@ def admin_seed_monasteries():
         for it in SEED_MONASTERIES:
             m = Monastery(name=it["name"], location="Sikkim", founded=it.get("founded") or "Unknown")
             db.add(m)
+            bump_catalog_version(db)
             db.commit()
             db.refresh(m)
             if it.get("info"):
@@ -880,14 +1266,13 @@ def admin_seed_monasteries():
                 folder, fname = asset_map[it["name"]]
                 src = os.path.join(ASSETS_DIR, folder, fname)
                 if os.path.isfile(src):
-                    base = f"{m.id}_{os.path.splitext(fname)[0]}{os.path.splitext(fname)[1]}"
-                    dest = os.path.join(MEDIA_ROOT, base)
                     try:
-                        shutil.copyfile(src, dest)
+                        base = blob_store.put_file(db, src, os.path.splitext(fname)[1], move=False)
                         db.add(Media(monastery_id=m.id, title=f"{m.name} Image", type="image", file_path=base))
                     except Exception:
                         pass
             created.append({"id": m.id, "name": m.name})
+        bump_catalog_version(db)
         db.commit()
         return {"created": created, "count": len(created)}
     finally:
@@ -901,27 +1286,677 @@ def admin_embeddings_import(payload: Dict = Body(...)):
         # Clear table then insert
         db.query(EmbeddingRow).delete()
         for it in items:
+            vec = it.get("vector")
+            try:
+                vec = json.loads(vec) if isinstance(vec, str) else (vec or [])
+            except Exception:
+                vec = []
+            chunk_no = int(it.get("chunk_no") or 0)
             row = EmbeddingRow(
                 doc_type=it.get("doc_type"),
                 doc_id=it.get("doc_id"),
                 title=it.get("title"),
                 content=it.get("content"),
-                vector=it.get("vector"),
+                chunk_no=chunk_no,
+                chunk_offset=int(it.get("chunk_offset") or 0),
+                vector_f32=_pack_vector(vec),
+                content_hash=(_content_hash(_embed_input(it.get("title"), it.get("content") or "", chunk_no)) if vec else None),
             )
             db.add(row)
         db.commit()
+        rebuild_retrieval_indexes(db)
         return {"imported": len(items)}
     finally:
         db.close()
 
+# ------------------- Vector Store -------------------
+VECTOR_STORE_DIR = os.getenv("VECTOR_STORE_DIR", os.path.join(BASE_DIR, "vector_store"))
+
+def _pack_vector(vec: List[float]) -> Optional[bytes]:
+    return array("f", vec).tobytes() if vec else None
+
+def _row_vector(r: EmbeddingRow) -> List[float]:
+    """Decode an embedding row's vector, preferring the packed float32 column over legacy JSON."""
+    if r.vector_f32:
+        return array("f", r.vector_f32).tolist()
+    try:
+        return json.loads(r.vector) if r.vector else []
+    except Exception:
+        return []
+
+# Approximate nearest-neighbour (IVF-flat) settings. The index is only built once the corpus is large
+# enough for it to beat the exact scan; ANN_INDEX=off disables it entirely.
+ANN_INDEX = os.getenv("ANN_INDEX", "ivf").lower()
+ANN_MIN_VECTORS = int(os.getenv("ANN_MIN_VECTORS", "20000"))
+ANN_DEFAULT_NPROBE = int(os.getenv("ANN_NPROBE", "8"))
+
+def _build_ivf(matrix, iterations: int = 10, seed: int = 0):
+    """Spherical k-means over the (normalised) rows. Returns (centroids, assignment per row)."""
+    n = len(matrix)
+    nlist = max(1, int(np.sqrt(n)))
+    rng = np.random.default_rng(seed)
+    sample = matrix[rng.choice(n, size=min(n, nlist * 64), replace=False)]
+    centroids = np.array(sample[rng.choice(len(sample), size=nlist, replace=False)], dtype=np.float32)
+
+    def assign(rows):
+        out = np.empty(len(rows), dtype=np.int32)
+        for start in range(0, len(rows), 16384):
+            out[start:start + 16384] = np.argmax(rows[start:start + 16384] @ centroids.T, axis=1)
+        return out
+
+    for _ in range(iterations):
+        labels = assign(sample)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        # Empty clusters keep their previous centroid
+        centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids).astype(np.float32)
+    return centroids, assign(matrix)
+
+# One generation of the store. load() publishes a new one with a single assignment, and search() reads
+# it once, so a search during a rebuild never pairs one generation's matrix with another's ids.
+VectorSnapshot = namedtuple("VectorSnapshot", "generation matrix ids centroids offsets")
+
+class VectorStore:
+    """Pre-normalised float32 embedding matrix persisted as memory-mapped .npy sidecars.
+    Each rebuild writes a new generation (<gen>.vectors.npy + <gen>.ids.npy) and then atomically
+    replaces the 'current' pointer file, so readers in any worker never see a half-written store.
+    Readers stat the pointer on each search and remap when it changes.
+    Large stores also get an IVF-flat index: rows are written grouped by cluster so each inverted
+    list is a contiguous slice of the matrix, with <gen>.centroids.npy and <gen>.offsets.npy beside it.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.pointer_path = os.path.join(directory, "current")
+        self._lock = threading.Lock()
+        self._pointer_mtime = None
+        self.snapshot: Optional[VectorSnapshot] = None
+
+    def _paths(self, gen: str):
+        return os.path.join(self.directory, f"{gen}.vectors.npy"), os.path.join(self.directory, f"{gen}.ids.npy")
+
+    def _ann_paths(self, gen: str):
+        return os.path.join(self.directory, f"{gen}.centroids.npy"), os.path.join(self.directory, f"{gen}.offsets.npy")
+
+    def exists(self) -> bool:
+        return os.path.isfile(self.pointer_path)
+
+    def load(self) -> bool:
+        """Map the current generation if it changed since the last call. Returns False when no store exists."""
+        try:
+            mtime = os.stat(self.pointer_path).st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self._pointer_mtime and self.snapshot is not None:
+            return True
+        with self._lock:
+            for attempt in range(2):
+                with open(self.pointer_path) as f:
+                    gen = f.read().strip()
+                if self.snapshot is not None and gen == self.snapshot.generation:
+                    break
+                try:
+                    self.snapshot = self._read(gen)
+                    break
+                except FileNotFoundError:
+                    # A writer swapped the pointer and swept this generation meanwhile; follow it once
+                    if attempt:
+                        raise
+            self._pointer_mtime = mtime
+        return True
+
+    def _read(self, gen: str) -> VectorSnapshot:
+        vec_path, ids_path = self._paths(gen)
+        centroids_path, offsets_path = self._ann_paths(gen)
+        matrix = np.load(vec_path, mmap_mode="r")
+        ids = np.load(ids_path)
+        centroids = offsets = None
+        if os.path.isfile(centroids_path):
+            centroids = np.load(centroids_path)
+            offsets = np.load(offsets_path)
+        return VectorSnapshot(gen, matrix, ids, centroids, offsets)
+
+    def write(self, ids: List[int], matrix, build_ann: Optional[bool] = None) -> str:
+        """Normalise rows, optionally build the IVF index, persist a new generation and swap it in.
+        The previous generation is kept for workers still loading it; older ones are removed.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        ids = np.asarray(ids, dtype=np.int64)
+        if matrix.size:
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            np.divide(matrix, norms, out=matrix, where=norms > 0)
+        if build_ann is None:
+            build_ann = ANN_INDEX != "off" and len(matrix) >= ANN_MIN_VECTORS
+        gen = uuid4().hex
+        vec_path, ids_path = self._paths(gen)
+        if build_ann and len(matrix):
+            centroids, labels = _build_ivf(matrix)
+            order = np.argsort(labels, kind="stable")
+            matrix, ids = matrix[order], ids[order]
+            offsets = np.zeros(len(centroids) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum(np.bincount(labels, minlength=len(centroids)))
+            centroids_path, offsets_path = self._ann_paths(gen)
+            np.save(centroids_path, centroids)
+            np.save(offsets_path, offsets)
+        np.save(vec_path, matrix)
+        np.save(ids_path, ids)
+        try:
+            with open(self.pointer_path) as f:
+                previous = f.read().strip()
+        except OSError:
+            previous = ""
+        tmp = self.pointer_path + f".{gen}.tmp"
+        with open(tmp, "w") as f:
+            f.write(gen)
+        os.replace(tmp, self.pointer_path)
+        keep = (gen, previous) if previous else (gen,)
+        for name in os.listdir(self.directory):
+            if not name.startswith(keep) and name.endswith(".npy"):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+        return gen
+
+    def search(self, q_vec: List[float], k: int, nprobe: Optional[int] = None):
+        """Cosine top-k. Returns [(score, row_id)].
+        With an IVF index, only the nprobe closest inverted lists are scanned (nprobe=0 forces an
+        exact scan; larger values trade latency for recall). Without one, this is a single
+        matrix-vector product plus argpartition.
+        """
+        snap = self.snapshot
+        if snap is None or not len(snap.matrix) or len(q_vec) != snap.matrix.shape[1]:
+            return []
+        matrix, ids, centroids, offsets = snap.matrix, snap.ids, snap.centroids, snap.offsets
+        q = np.asarray(q_vec, dtype=np.float32)
+        qn = np.linalg.norm(q)
+        if qn == 0:
+            return []
+        q = q / qn
+        nprobe = ANN_DEFAULT_NPROBE if nprobe is None else nprobe
+        if centroids is not None and 0 < nprobe < len(centroids):
+            lists = np.argpartition(-(centroids @ q), nprobe - 1)[:nprobe]
+            positions = np.concatenate([np.arange(offsets[i], offsets[i + 1]) for i in lists])
+            scores = np.concatenate([matrix[offsets[i]:offsets[i + 1]] @ q for i in lists])
+        else:
+            positions = None
+            scores = matrix @ q
+        if not len(scores):
+            return []
+        k = max(1, min(k, len(scores)))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        rows = positions[top] if positions is not None else top
+        return [(float(scores[i]), int(ids[r])) for i, r in zip(top, rows)]
+
+def ann_recall_report(store: VectorStore, k: int = 10, nprobes: Optional[List[int]] = None, queries: int = 100, seed: int = 0) -> Dict:
+    """Recall@k and mean latency of IVF search at several nprobe values versus the exact scan.
+    Queries are stored vectors with a little Gaussian noise added.
+    """
+    snap = store.snapshot
+    n = 0 if snap is None else len(snap.matrix)
+    report: Dict = {"vectors": n, "nlist": (len(snap.centroids) if n and snap.centroids is not None else 0), "k": k, "results": []}
+    if not n:
+        return report
+    rng = np.random.default_rng(seed)
+    dim = snap.matrix.shape[1]
+    picks = rng.choice(n, size=min(queries, n), replace=False)
+    qs = [(np.asarray(snap.matrix[i]) + rng.normal(0, 0.5 / np.sqrt(dim), dim).astype(np.float32)).tolist() for i in picks]
+
+    def run(nprobe):
+        t = time.perf_counter()
+        hits = [{rid for _, rid in store.search(q, k, nprobe=nprobe)} for q in qs]
+        return hits, (time.perf_counter() - t) * 1000 / len(qs)
+
+    exact, exact_ms = run(0)
+    report["exact_avg_ms"] = round(exact_ms, 3)
+    if snap.centroids is None:
+        return report
+    for nprobe in nprobes or [1, 2, 4, 8, 16, 32]:
+        hits, ms = run(nprobe)
+        recall = sum(len(h & e) for h, e in zip(hits, exact)) / max(1, sum(len(e) for e in exact))
+        report["results"].append({"nprobe": nprobe, "recall_at_k": round(recall, 4), "avg_ms": round(ms, 3)})
+    return report
+
+vector_store = VectorStore(VECTOR_STORE_DIR)
+
+def rebuild_vector_store(db) -> int:
+    """Rebuild the vector store sidecar from EmbeddingRow. Returns the number of vectors stored."""
+    if np is None:
+        return 0
+    ids: List[int] = []
+    chunks: List = []
+    dim = None
+    for row_id, blob, legacy in db.query(EmbeddingRow.id, EmbeddingRow.vector_f32, EmbeddingRow.vector).order_by(EmbeddingRow.id).yield_per(1000):
+        if blob:
+            vec = np.frombuffer(blob, dtype=np.float32)
+        else:
+            try:
+                vec = np.asarray(json.loads(legacy) if legacy else [], dtype=np.float32)
+            except Exception:
+                continue
+        if not vec.size:
+            continue
+        if dim is None:
+            dim = vec.size
+        if vec.size != dim:
+            continue
+        ids.append(row_id)
+        chunks.append(vec)
+    matrix = np.vstack(chunks) if chunks else np.zeros((0, dim or 0), dtype=np.float32)
+    vector_store.write(ids, matrix)
+    return len(ids)
+
+@app.on_event("startup")
+def map_vector_store():
+    # Memory-map the current vector store / ANN index up front so the first question doesn't pay for it
+    if np is not None:
+        try:
+            vector_store.load()
+        except Exception as e:
+            print(f"vector store load failed: {type(e).__name__}: {e}")
+
+@app.get("/admin/ann/report")
+def admin_ann_report(k: int = 10, queries: int = 100, nprobe: Optional[str] = None):
+    """Recall@k of the ANN index against exact search, per nprobe (comma-separated, e.g. 1,4,16)."""
+    if np is None or not vector_store.load():
+        raise HTTPException(status_code=400, detail="No vector store found. Run /ai/ingest first.")
+    try:
+        nprobes = [int(x) for x in nprobe.split(",") if x.strip()] if nprobe else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="nprobe must be a comma-separated list of integers")
+    return ann_recall_report(vector_store, k=max(1, k), nprobes=nprobes, queries=max(1, min(queries, 1000)))
+
+# ------------------- Keyword Index (BM25) -------------------
+_TOKEN_RE = re.compile(r"\w+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how in is it its of on or that the this to was were what when where which who why will with".split()
+)
+
+def tokenize(text_value: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall((text_value or "").lower()) if t not in _STOPWORDS]
+
+# One generation of the BM25 index, published with a single assignment like VectorSnapshot
+KeywordSnapshot = namedtuple("KeywordSnapshot", "generation postings lengths doc_count avg_len")
+
+class KeywordIndex:
+    """BM25 inverted index over EmbeddingRow title + content.
+    Postings are persisted in SQLite (bm25_terms / bm25_meta) and held in memory per worker;
+    each search compares the stored generation and reloads only after a rebuild.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self.snapshot = KeywordSnapshot(None, {}, {}, 0, 0.0)
+
+    def rebuild(self, db) -> int:
+        """Tokenise every embedding row and replace the persisted index in one transaction."""
+        postings: Dict[str, array] = {}
+        lengths = array("i")
+        for row_id, title, content in db.query(EmbeddingRow.id, EmbeddingRow.title, EmbeddingRow.content).order_by(EmbeddingRow.id).yield_per(1000):
+            tokens = tokenize((title or "") + "\n" + (content or ""))
+            lengths.extend((row_id, len(tokens)))
+            for t, tf in Counter(tokens).items():
+                plist = postings.get(t)
+                if plist is None:
+                    plist = postings[t] = array("i")
+                plist.extend((row_id, tf))
+        doc_count = len(lengths) // 2
+        total = sum(lengths[1::2])
+        db.query(Bm25Term).delete()
+        db.query(Bm25Meta).delete()
+        if postings:
+            db.execute(Bm25Term.__table__.insert(), [{"term": t, "postings": p.tobytes()} for t, p in postings.items()])
+        db.add(Bm25Meta(
+            id=1,
+            generation=uuid4().hex,
+            doc_count=doc_count,
+            avg_len=(total / doc_count if doc_count else 0.0),
+            doc_lengths=lengths.tobytes(),
+        ))
+        db.commit()
+        return doc_count
+
+    def load(self, db) -> bool:
+        """Refresh the in-memory postings if the persisted generation changed. False when unbuilt."""
+        row = db.query(Bm25Meta.generation).filter(Bm25Meta.id == 1).first()
+        if not row:
+            return False
+        if row[0] == self.snapshot.generation:
+            return True
+        with self._lock:
+            meta = db.query(Bm25Meta).filter(Bm25Meta.id == 1).first()
+            if meta is None:
+                return False
+            if meta.generation != self.snapshot.generation:
+                lengths = array("i", meta.doc_lengths or b"")
+                self.snapshot = KeywordSnapshot(
+                    meta.generation,
+                    {t: array("i", p) for t, p in db.query(Bm25Term.term, Bm25Term.postings)},
+                    dict(zip(lengths[0::2], lengths[1::2])),
+                    meta.doc_count or 0,
+                    meta.avg_len or 0.0,
+                )
+        return True
+
+    def search(self, query: str, k: int):
+        """BM25 top-k over the in-memory postings. Returns [(score, row_id)]."""
+        snap = self.snapshot
+        scores: Dict[int, float] = {}
+        n = snap.doc_count
+        avg_len = snap.avg_len or 1.0
+        for term in set(tokenize(query)):
+            plist = snap.postings.get(term)
+            if not plist:
+                continue
+            df = len(plist) // 2
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for row_id, tf in zip(plist[0::2], plist[1::2]):
+                norm = self.k1 * (1 - self.b + self.b * snap.lengths.get(row_id, 0) / avg_len)
+                scores[row_id] = scores.get(row_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        top = sorted(scores.items(), key=lambda x: (-x[1], x[0]))[:k]
+        return [(score, row_id) for row_id, score in top]
+
+keyword_index = KeywordIndex()
+
+def rebuild_retrieval_indexes(db) -> None:
+    """Rebuild the dense vector store and the BM25 index after the embeddings table changes."""
+    rebuild_vector_store(db)
+    keyword_index.rebuild(db)
+
+# ------------------- QnA Answer Cache -------------------
+QA_CACHE_TTL_SECONDS = int(os.getenv("QA_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))  # 0 = never expire
+QA_CACHE_MAX_ROWS = int(os.getenv("QA_CACHE_MAX_ROWS", "10000"))
+QA_CACHE_MEMORY_ENTRIES = int(os.getenv("QA_CACHE_MEMORY_ENTRIES", "512"))
+# Memory entries are per worker; a short TTL bounds how long another worker serves a cleared answer
+QA_CACHE_MEMORY_TTL_SECONDS = int(os.getenv("QA_CACHE_MEMORY_TTL_SECONDS", "300"))
+QA_CACHE_EVICT_EVERY = 50  # run eviction on every Nth insert
+# Hits and last_used_at are counted in memory and written to qa_cache at most this often (and before eviction)
+QA_CACHE_USAGE_FLUSH_SECONDS = float(os.getenv("QA_CACHE_USAGE_FLUSH_SECONDS", "30"))
+# Paraphrases whose question embeddings are at least this cosine-similar share an answer; 0 disables
+QA_SEMANTIC_THRESHOLD = float(os.getenv("QA_SEMANTIC_THRESHOLD", "0.92"))
+_QUESTION_PUNCT_RE = re.compile(r"[^\w\s]+")
+
+def normalize_question(question: str) -> str:
+    """Fold case, punctuation and whitespace so trivially different wordings share a cache key."""
+    return " ".join(_QUESTION_PUNCT_RE.sub(" ", (question or "").casefold()).split())
+
+def qa_cache_key(question: str) -> str:
+    return hashlib.sha256(normalize_question(question).encode("utf-8")).hexdigest()
+
+def _utcnow_iso(offset_seconds: int = 0) -> str:
+    return (datetime.utcnow() + timedelta(seconds=offset_seconds)).isoformat()
+
+class AnswerCache:
+    """Two-tier cache for /ai/qna answers: a per-worker LRU in front of the qa_cache table.
+    Lookups use the hashed normalised question and language (indexed); get_similar() then
+    matches paraphrases by question embedding. Rows expire after QA_CACHE_TTL_SECONDS and the
+    least recently used are evicted beyond QA_CACHE_MAX_ROWS. Hits from either tier are batched
+    and written by flush_usage().
+    """
+
+    def __init__(self, memory_entries: int):
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[tuple, tuple]" = OrderedDict()  # (key, lang) -> (stored_at, row id, answer dict)
+        self._lock = threading.Lock()
+        self._inserts = 0
+        self._usage: Dict[int, tuple] = {}  # row id -> (hits, last_used_at) not yet written
+        self._usage_flushed_at = time.monotonic()
+        # (lang, embedder) -> {"ids": [...], "vectors": normalised matrix (or list of lists without numpy), "max_id": int}
+        self._semantic: Dict[tuple, Dict] = {}
+        self._semantic_lock = threading.Lock()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.semantic_hits = 0
+        self.exact_misses = 0
+
+    def _remember(self, mkey: tuple, row_id: int, value: Dict) -> None:
+        with self._lock:
+            self._memory[mkey] = (time.monotonic(), row_id, value)
+            self._memory.move_to_end(mkey)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, db, question: str, lang: str) -> Optional[Dict]:
+        """Cached {"answer", "citations"} for the question, or None."""
+        mkey = (qa_cache_key(question), lang)
+        with self._lock:
+            entry = self._memory.get(mkey)
+            if entry is not None:
+                if time.monotonic() - entry[0] <= QA_CACHE_MEMORY_TTL_SECONDS:
+                    self._memory.move_to_end(mkey)
+                    self.memory_hits += 1
+                    self._count_use(entry[1])
+                else:
+                    del self._memory[mkey]
+                    entry = None
+        if entry is not None:
+            self.flush_usage(db)
+            return entry[2]
+        q = db.query(QaCache.id, QaCache.answer, QaCache.citations).filter(QaCache.question_key == mkey[0], QaCache.lang == lang)
+        if QA_CACHE_TTL_SECONDS:
+            q = q.filter(QaCache.created_at >= _utcnow_iso(-QA_CACHE_TTL_SECONDS))
+        row = q.order_by(QaCache.id.desc()).first()
+        if row is None:
+            with self._lock:
+                self.exact_misses += 1
+            return None
+        value = self._use(db, row)
+        self._remember(mkey, row.id, value)
+        with self._lock:
+            self.db_hits += 1
+        return value
+
+    def _count_use(self, row_id: int) -> None:
+        # Called with self._lock held
+        hits, _ = self._usage.get(row_id, (0, None))
+        self._usage[row_id] = (hits + 1, _utcnow_iso())
+
+    def _use(self, db, row) -> Dict:
+        """Count a hit on a cached row and return its answer."""
+        try:
+            citations = json.loads(row.citations) if row.citations else []
+        except Exception:
+            citations = []
+        with self._lock:
+            self._count_use(row.id)
+        self.flush_usage(db)
+        return {"answer": row.answer, "citations": citations}
+
+    def flush_usage(self, db, force: bool = False) -> None:
+        """Add the hits counted since the last flush to qa_cache and set last_used_at, in one
+        transaction. Unless forced, does nothing until QA_CACHE_USAGE_FLUSH_SECONDS have passed.
+        """
+        with self._lock:
+            if not self._usage or (not force and time.monotonic() - self._usage_flushed_at < QA_CACHE_USAGE_FLUSH_SECONDS):
+                return
+            usage, self._usage = self._usage, {}
+            self._usage_flushed_at = time.monotonic()
+        for row_id, (hits, used_at) in usage.items():
+            db.query(QaCache).filter(QaCache.id == row_id).update(
+                {"hits": func.coalesce(QaCache.hits, 0) + hits, "last_used_at": used_at}, synchronize_session=False
+            )
+        db.commit()
+
+    def _semantic_index(self, db, lang: str) -> Dict:
+        """Cached question vectors for a language, topped up with rows added since the last call.
+        Reloaded in full when rows were also deleted (eviction, clear, replaced answers).
+        """
+        sig = embedder_signature()
+        base = db.query(QaCache.id, QaCache.question_vector).filter(
+            QaCache.lang == lang, QaCache.vector_model == sig, QaCache.question_vector.isnot(None)
+        )
+        count, max_id = base.with_entities(func.count(QaCache.id), func.max(QaCache.id)).one()
+        max_id = max_id or 0
+        idx = self._semantic.get((lang, sig))
+        if idx is not None and idx["count"] == count and idx["max_id"] == max_id:
+            return idx
+        rows = None
+        if idx is not None and count > idx["count"]:
+            rows = base.filter(QaCache.id > idx["max_id"]).order_by(QaCache.id).all()
+            if idx["count"] + len(rows) != count:
+                rows = None
+        appending = rows is not None
+        if not appending:
+            idx = {"ids": [], "vectors": [], "dim": None, "count": 0, "max_id": 0}
+            rows = base.order_by(QaCache.id).all()
+        dim = idx["dim"]
+        ids, vecs = [], []
+        for row_id, blob in rows:
+            vec = array("f", blob).tolist()
+            dim = dim or len(vec)
+            if len(vec) == dim:
+                ids.append(row_id)
+                vecs.append(vec)
+        if np is not None:
+            mat = np.asarray(vecs, dtype=np.float32).reshape(len(vecs), dim or 0)
+            norms = np.linalg.norm(mat, axis=1, keepdims=True)
+            mat = mat / np.where(norms == 0, 1, norms)
+            if appending and len(idx["ids"]):
+                mat = np.vstack([idx["vectors"], mat])
+        else:
+            mat = idx["vectors"] + [[x / (math.sqrt(sum(y * y for y in v)) or 1.0) for x in v] for v in vecs]
+        idx = {"ids": idx["ids"] + ids, "vectors": mat, "dim": dim, "count": count, "max_id": max_id}
+        self._semantic[(lang, sig)] = idx
+        return idx
+
+    def get_similar(self, db, question: str, q_vec: Optional[List[float]], lang: str) -> Optional[Dict]:
+        """Answer cached for a paraphrase: the most similar cached question (same language and
+        embedder) if its cosine similarity is at least QA_SEMANTIC_THRESHOLD.
+        """
+        if QA_SEMANTIC_THRESHOLD <= 0 or not q_vec:
+            return None
+        with self._semantic_lock:
+            idx = self._semantic_index(db, lang)
+            if not idx["ids"] or len(q_vec) != idx["dim"]:
+                return None
+            if np is not None:
+                q = np.asarray(q_vec, dtype=np.float32)
+                scores = idx["vectors"] @ (q / (np.linalg.norm(q) or 1.0))
+                best = int(np.argmax(scores))
+                score = float(scores[best])
+            else:
+                scores = [_cosine(q_vec, v) for v in idx["vectors"]]
+                best = max(range(len(scores)), key=scores.__getitem__)
+                score = scores[best]
+            row_id = idx["ids"][best]
+        if score < QA_SEMANTIC_THRESHOLD:
+            return None
+        q = db.query(QaCache.id, QaCache.answer, QaCache.citations).filter(QaCache.id == row_id)
+        if QA_CACHE_TTL_SECONDS:
+            q = q.filter(QaCache.created_at >= _utcnow_iso(-QA_CACHE_TTL_SECONDS))
+        row = q.first()
+        if row is None:
+            return None  # expired or deleted since the index was loaded
+        value = self._use(db, row)
+        self._remember((qa_cache_key(question), lang), row.id, value)
+        with self._lock:
+            self.semantic_hits += 1
+        return value
+
+    def put(self, db, question: str, lang: str, answer: str, citations: List[Dict], q_vec: Optional[List[float]] = None) -> None:
+        key = qa_cache_key(question)
+        now = _utcnow_iso()
+        # One row per (key, lang): a refreshed answer replaces the expired or paraphrased one
+        db.query(QaCache).filter(QaCache.question_key == key, QaCache.lang == lang).delete(synchronize_session=False)
+        entry = QaCache(
+            question=question,
+            question_key=key,
+            lang=lang,
+            answer=answer,
+            citations=json.dumps(citations),
+            created_at=now,
+            hits=0,
+            last_used_at=now,
+            question_vector=_pack_vector(q_vec),
+            vector_model=(embedder_signature() if q_vec else None),
+        )
+        db.add(entry)
+        db.flush()
+        row_id = entry.id
+        db.commit()
+        self._remember((key, lang), row_id, {"answer": answer, "citations": citations})
+        with self._lock:
+            self._inserts += 1
+            due = self._inserts % QA_CACHE_EVICT_EVERY == 1
+        if due:
+            self.evict(db)
+
+    def evict(self, db) -> int:
+        """Delete expired rows, then the least recently used rows beyond QA_CACHE_MAX_ROWS."""
+        self.flush_usage(db, force=True)  # so recent hits count towards recency
+        deleted = 0
+        if QA_CACHE_TTL_SECONDS:
+            deleted += db.query(QaCache).filter(QaCache.created_at < _utcnow_iso(-QA_CACHE_TTL_SECONDS)).delete(synchronize_session=False)
+        excess = db.query(func.count(QaCache.id)).scalar() - QA_CACHE_MAX_ROWS
+        if excess > 0:
+            oldest = (
+                db.query(QaCache.id)
+                .order_by(func.coalesce(QaCache.last_used_at, QaCache.created_at), QaCache.id)
+                .limit(excess)
+                .subquery()
+            )
+            deleted += db.query(QaCache).filter(QaCache.id.in_(oldest.select())).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._usage.clear()
+        with self._semantic_lock:
+            self._semantic.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            hits = self.memory_hits + self.db_hits + self.semantic_hits
+            lookups = self.memory_hits + self.db_hits + self.exact_misses
+            return {
+                "memory_hits": self.memory_hits,
+                "db_hits": self.db_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.exact_misses - self.semantic_hits,
+                "hit_rate": (hits / lookups) if lookups else 0.0,
+                "semantic_hit_rate": (self.semantic_hits / self.exact_misses) if self.exact_misses else 0.0,
+                "semantic_threshold": QA_SEMANTIC_THRESHOLD,
+                "memory_entries": len(self._memory),
+            }
+
+answer_cache = AnswerCache(QA_CACHE_MEMORY_ENTRIES)
+
+@app.on_event("startup")
+def backfill_qa_cache_keys():
+    # Rows cached before normalised keys existed are keyed once so the indexed lookup finds them
+    db = SessionLocal()
+    try:
+        rows = db.query(QaCache.id, QaCache.question).filter(QaCache.question_key.is_(None)).all()
+        for row_id, question in rows:
+            db.query(QaCache).filter(QaCache.id == row_id).update({"question_key": qa_cache_key(question)}, synchronize_session=False)
+        if rows:
+            db.commit()
+    except Exception as e:
+        print(f"qa_cache key backfill failed: {type(e).__name__}: {e}")
+    finally:
+        db.close()
+
 # ------------------- RAG QnA and Route Planning -------------------
 class QnAIn(BaseModel):
     question: str
     top_k: int = 5
     target_lang: Optional[str] = None  # if provided, translate question/answer
+    nprobe: Optional[int] = None  # ANN lists to scan; higher = better recall, slower; 0 = exact search
+    hybrid: bool = False  # fuse dense and BM25 keyword rankings
 
 class IngestOut(BaseModel):
     count: int
+    chunks: int = 0
+    embedded: int = 0
+    unchanged: int = 0
+    deleted: int = 0
 
 class RouteIn(BaseModel):
     question: str
@@ -941,168 +1976,494 @@ class RouteOut(BaseModel):
     steps: List[RouteStep]
     path: Optional[List[Dict[str, float]]] = None  # [{lat, lng}] polyline of the full route if available
 
+_ingest_lock = threading.Lock()
+
+def _content_hash(content: str) -> str:
+    # Includes the embedder so switching providers/models re-embeds everything
+    return hashlib.sha256(f"{embedder_signature()}\n{content}".encode("utf-8")).hexdigest()
+
+# Passage chunking: documents longer than CHUNK_MAX_CHARS are split into sentence-aligned windows
+# that share CHUNK_OVERLAP_SENTENCES sentences with their neighbour. Shorter documents stay whole.
+CHUNK_MAX_CHARS = int(os.getenv("CHUNK_MAX_CHARS", "1000"))
+CHUNK_OVERLAP_SENTENCES = int(os.getenv("CHUNK_OVERLAP_SENTENCES", "1"))
+CHUNKS_PER_DOCUMENT = int(os.getenv("CHUNKS_PER_DOCUMENT", "2"))  # max chunks of one document in a QnA prompt
+_SENTENCE_END_RE = re.compile(r"[.!?\u0964]+[\"')\]]*\s+|\n\s*\n")
+
+def split_sentences(text_value: str, max_chars: Optional[int] = None) -> List[tuple]:
+    """[(offset, sentence)] covering the text; sentences longer than max_chars are cut at whitespace."""
+    max_chars = max_chars or CHUNK_MAX_CHARS
+    spans: List[tuple] = []
+    start = 0
+    ends = [m.end() for m in _SENTENCE_END_RE.finditer(text_value)] + [len(text_value)]
+    for end in ends:
+        while end - start > max_chars:
+            cut = text_value.rfind(" ", start + 1, start + max_chars)
+            cut = cut + 1 if cut > start else start + max_chars
+            spans.append((start, text_value[start:cut]))
+            start = cut
+        if text_value[start:end].strip():
+            spans.append((start, text_value[start:end]))
+        start = end
+    return spans
+
+def chunk_text(text_value: str, max_chars: Optional[int] = None, overlap: Optional[int] = None) -> List[tuple]:
+    """Split a document into [(offset, chunk)] windows of whole sentences, up to max_chars each,
+    repeating the last `overlap` sentences of a window at the start of the next.
+    """
+    max_chars = max_chars or CHUNK_MAX_CHARS
+    overlap = CHUNK_OVERLAP_SENTENCES if overlap is None else overlap
+    if len(text_value) <= max_chars:
+        return [(0, text_value)]
+    sentences = split_sentences(text_value, max_chars)
+    chunks: List[tuple] = []
+    i = 0
+    while i < len(sentences):
+        j, size = i, 0
+        while j < len(sentences) and (j == i or size + len(sentences[j][1]) <= max_chars):
+            size += len(sentences[j][1])
+            j += 1
+        start = sentences[i][0]
+        end = sentences[j - 1][0] + len(sentences[j - 1][1])
+        chunks.append((start, text_value[start:end].rstrip()))
+        if j >= len(sentences):
+            break
+        i = max(j - overlap, i + 1)
+    return chunks
+
+def _embed_input(title: Optional[str], content: str, chunk_no: int) -> str:
+    # Later chunks lose the document's heading; prefix the title so they still embed in context
+    return content if not chunk_no else f"{title or ''}\n{content}"
+
+def group_by_document(top: List, k: int) -> List[Dict]:
+    """Fold ranked (score, EmbeddingRow) chunks back into their parent documents, best first.
+    Keeps at most CHUNKS_PER_DOCUMENT chunks per document (in document order) and k documents.
+    """
+    groups: "OrderedDict[tuple, Dict]" = OrderedDict()
+    for _, r in top:
+        g = groups.get((r.doc_type, r.doc_id))
+        if g is None:
+            if len(groups) >= k:
+                continue
+            g = groups[(r.doc_type, r.doc_id)] = {"doc_type": r.doc_type, "doc_id": r.doc_id, "title": r.title, "chunks": []}
+        if len(g["chunks"]) < CHUNKS_PER_DOCUMENT:
+            g["chunks"].append(r)
+    for g in groups.values():
+        g["chunks"].sort(key=lambda r: r.chunk_no or 0)
+    return list(groups.values())
+
+def _context_block(group: Dict) -> str:
+    """Prompt block for one document: its retrieved chunks in order, with overlapping text merged."""
+    parts: List[str] = []
+    prev_end = None
+    for r in group["chunks"]:
+        content, offset = r.content or "", r.chunk_offset or 0
+        if prev_end is not None and offset <= prev_end:
+            parts[-1] += " " + content[prev_end - offset:].strip()
+        else:
+            parts.append(content)
+        prev_end = max(prev_end or 0, offset + len(content))
+    return f"[{group['doc_type']}:{group['doc_id']}] {group['title']}\n" + "\n...\n".join(parts)
+
+def _embedding_documents(db, scope: Optional[set] = None) -> List[Dict]:
+    """Text of every monastery/event/archive document to embed.
+    With scope (a set of (doc_type, doc_id) keys), only those documents are built; a monastery key
+    also rebuilds its events and archives, whose text includes the monastery name.
+    """
+    names = dict(db.query(Monastery.id, Monastery.name).all())
+    mon_ids = ev_ids = ar_ids = None
+    if scope is not None:
+        mon_ids = {i for t, i in scope if t == "monastery"}
+        ev_ids = {i for t, i in scope if t == "event"}
+        ar_ids = {i for t, i in scope if t == "archive"}
+
+    items: List[Dict] = []
+    # Monasteries
+    mq = db.query(Monastery)
+    if mon_ids is not None:
+        mq = mq.filter(Monastery.id.in_(mon_ids))
+    monasteries = mq.order_by(Monastery.id).all()
+    descriptions = dict(
+        db.query(MonasteryInfo.monastery_id, MonasteryInfo.description)
+        .filter(MonasteryInfo.monastery_id.in_([m.id for m in monasteries])).all()
+    ) if monasteries else {}
+    for m in monasteries:
+        text = f"{m.name}. {m.location}. Founded {m.founded}. "
+        if descriptions.get(m.id):
+            text += descriptions[m.id]
+        items.append({
+            "doc_type": "monastery",
+            "doc_id": m.id,
+            "title": m.name,
+            "content": text,
+        })
+    # Events
+    eq = db.query(Event)
+    if scope is not None:
+        eq = eq.filter(Event.id.in_(ev_ids) | Event.monastery_id.in_(mon_ids))
+    for e in eq.order_by(Event.id).all():
+        text = f"Event: {e.title}. {e.description}. Date {e.date} {e.time}. Monastery {names.get(e.monastery_id, '')}."
+        items.append({
+            "doc_type": "event",
+            "doc_id": e.id,
+            "title": e.title,
+            "content": text,
+        })
+    # Archives
+    aq = db.query(ArchiveItem)
+    if scope is not None:
+        aq = aq.filter(ArchiveItem.id.in_(ar_ids) | ArchiveItem.monastery_id.in_(mon_ids))
+    for a in aq.order_by(ArchiveItem.id).all():
+        text = f"Archive: {a.title}. {a.description}. Type {a.type}. Monastery {names.get(a.monastery_id, '')}."
+        items.append({
+            "doc_type": "archive",
+            "doc_id": a.id,
+            "title": a.title,
+            "content": text,
+        })
+    return items
+
 @app.post("/ai/ingest", response_model=IngestOut)
-def ai_ingest():
-    """Build embeddings for Monasteries, Events, Archives into SQLite."""
-    db = SessionLocal()
-    try:
-        # Clear table
-        db.query(EmbeddingRow).delete()
-        db.commit()
+def ai_ingest(dirty_only: bool = False):
+    """Incrementally sync embeddings for Monasteries, Events, Archives into SQLite.
+    Long documents are split into overlapping sentence chunks (one row each). Only new or changed
+    chunks (by content hash) and chunks still missing a vector are embedded; rows for removed
+    documents or chunks are deleted. All row changes commit in one transaction
+    and the retrieval indexes swap in afterwards, so QnA keeps serving the previous index meanwhile.
+    With dirty_only=true, only documents marked dirty by catalog writes since the last ingest are checked.
+    """
+    with _ingest_lock:
+        db = SessionLocal()
+        try:
+            marks = db.query(EmbeddingDirty.id, EmbeddingDirty.doc_type, EmbeddingDirty.doc_id).all()
+            scope = None
+            if dirty_only and not any(t == "*" for _, t, _ in marks):
+                scope = {(t, i) for _, t, i in marks}
+            items = _embedding_documents(db, scope)
+
+            has_vector = or_(
+                EmbeddingRow.vector_f32.isnot(None),
+                and_(EmbeddingRow.vector.isnot(None), EmbeddingRow.vector.notin_(["", "[]"])),
+            )
+            # Rows written before content hashing: hash their stored content instead
+            legacy_content = case((EmbeddingRow.content_hash.is_(None), EmbeddingRow.content), else_=None)
+            eq = db.query(
+                EmbeddingRow.id, EmbeddingRow.doc_type, EmbeddingRow.doc_id, func.coalesce(EmbeddingRow.chunk_no, 0),
+                func.coalesce(EmbeddingRow.chunk_offset, 0), EmbeddingRow.content_hash, has_vector, legacy_content,
+            )
+            if scope is not None:
+                keys = scope | {(it["doc_type"], it["doc_id"]) for it in items}
+                eq = eq.filter(EmbeddingRow.doc_id.in_({i for _, i in keys}))
+            existing = {}
+            for row_id, doc_type, doc_id, chunk_no, offset, content_hash, row_has_vector, legacy in eq.all():
+                if scope is None or (doc_type, doc_id) in keys:
+                    if content_hash is None and legacy is not None:
+                        content_hash = _content_hash(legacy)
+                    existing.setdefault((doc_type, doc_id, chunk_no), []).append((row_id, content_hash, bool(row_has_vector), offset))
+
+            # Split documents into chunks and decide which chunks changed
+            todo, unchanged, seen, chunk_count = [], 0, set(), 0
+            for it in items:
+                for chunk_no, (offset, chunk) in enumerate(chunk_text(it["content"])):
+                    ch = {
+                        "doc_type": it["doc_type"],
+                        "doc_id": it["doc_id"],
+                        "chunk_no": chunk_no,
+                        "offset": offset,
+                        "title": it["title"],
+                        "content": chunk,
+                        "input": _embed_input(it["title"], chunk, chunk_no),
+                    }
+                    key = (ch["doc_type"], ch["doc_id"], chunk_no)
+                    seen.add(key)
+                    chunk_count += 1
+                    ch["hash"] = _content_hash(ch["input"])
+                    rows = existing.get(key) or []
+                    if len(rows) == 1 and rows[0][1] == ch["hash"] and rows[0][2]:
+                        unchanged += 1
+                        if rows[0][3] != offset:
+                            # Same text, shifted by an edit earlier in the document
+                            db.query(EmbeddingRow).filter(EmbeddingRow.id == rows[0][0]).update({"chunk_offset": offset})
+                    else:
+                        todo.append(ch)
+            stale_ids = [row_id for key, rows in existing.items() if key not in seen for row_id, _, _, _ in rows]
+
+            # Compute embeddings for the changed chunks only
+            vectors: Optional[List[List[float]]] = embed_texts([ch["input"] for ch in todo]) if todo else None
+            embedded = 0
+            changed = bool(stale_ids)
+            for idx, ch in enumerate(todo):
+                vec = vectors[idx] if vectors and idx < len(vectors) else []
+                rows = existing.get((ch["doc_type"], ch["doc_id"], ch["chunk_no"])) or []
+                # Collapse duplicates left by older full re-ingests onto the first row
+                stale_ids.extend(row_id for row_id, _, _, _ in rows[1:])
+                content_changed = not rows or rows[0][1] != ch["hash"]
+                if vec:
+                    embedded += 1
+                elif not content_changed:
+                    continue  # still no vector for the same content; nothing to write
+                changed = True
+                # A failed embed of changed content drops the stale vector so the next ingest retries it
+                values = {
+                    "title": ch["title"],
+                    "content": ch["content"],
+                    "chunk_offset": ch["offset"],
+                    "content_hash": ch["hash"],
+                    "vector": None,
+                    "vector_f32": _pack_vector(vec),
+                }
+                if rows:
+                    db.query(EmbeddingRow).filter(EmbeddingRow.id == rows[0][0]).update(values)
+                else:
+                    db.add(EmbeddingRow(doc_type=ch["doc_type"], doc_id=ch["doc_id"], chunk_no=ch["chunk_no"], **values))
+            if stale_ids:
+                db.query(EmbeddingRow).filter(EmbeddingRow.id.in_(stale_ids)).delete(synchronize_session=False)
+            if marks:
+                db.query(EmbeddingDirty).filter(EmbeddingDirty.id.in_([m[0] for m in marks])).delete(synchronize_session=False)
+            db.commit()
+            if changed or not keyword_index.load(db):
+                rebuild_retrieval_indexes(db)
+            return {"count": len(items), "chunks": chunk_count, "embedded": embedded, "unchanged": unchanged, "deleted": len(stale_ids)}
+        finally:
+            db.close()
+
+def _dense_top(db, q_vec: List[float], k: int, nprobe: Optional[int] = None):
+    """Dense top-k as [(score, row_id)]: vector store when numpy is available, else a Python scan."""
+    if np is not None:
+        if not vector_store.exists():
+            rebuild_vector_store(db)
+        if vector_store.load():
+            return vector_store.search(q_vec, k, nprobe=nprobe)
+        return []
+    scored = []
+    for r in db.query(EmbeddingRow).all():
+        vec = _row_vector(r)
+        if vec:
+            scored.append((_cosine(q_vec, vec), r.id))
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return scored[:k]
+
+def _sparse_top(db, question: str, k: int):
+    if not keyword_index.load(db):
+        keyword_index.rebuild(db)
+        keyword_index.load(db)
+    return keyword_index.search(question, k)
+
+def _rrf(rankings: List[List], k: int, c: int = 60):
+    """Reciprocal rank fusion of several [(score, row_id)] rankings."""
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, (_, row_id) in enumerate(ranking):
+            fused[row_id] = fused.get(row_id, 0.0) + 1.0 / (c + rank + 1)
+    return sorted(((score, rid) for rid, score in fused.items()), key=lambda x: (-x[0], x[1]))[:k]
+
+def retrieve_top(db, question: str, q_vec: Optional[List[float]], k: int, nprobe: Optional[int] = None, hybrid: bool = False):
+    """Return the k best (score, EmbeddingRow) pairs for a question.
+    Dense (cosine) retrieval is used when there is a query vector and BM25 keyword retrieval
+    otherwise; with hybrid=True both rankings are combined by reciprocal rank fusion.
+    """
+    dense = _dense_top(db, q_vec, k * 4 if hybrid else k, nprobe) if q_vec else []
+    if dense and not hybrid:
+        hits = dense
+    else:
+        sparse = _sparse_top(db, question, k * 4 if dense else k)
+        hits = _rrf([dense, sparse], k) if dense else sparse
+    if not hits:
+        # Nothing matched; keep answering from the first documents rather than an empty context
+        return [(0.0, r) for r in db.query(EmbeddingRow).order_by(EmbeddingRow.id).limit(k).all()]
+    rows = {r.id: r for r in db.query(EmbeddingRow).filter(EmbeddingRow.id.in_([rid for _, rid in hits])).all()}
+    return [(score, rows[rid]) for score, rid in hits if rid in rows]
+
+QNA_CHAT_MODEL = "gpt-4o-mini"
+QNA_SYSTEM_PROMPT = "You are a helpful assistant for a monastery visitor app. Answer succinctly and cite sources using the [type:id] labels."
+
+def _qna_prepare(db, payload: QnAIn) -> Dict:
+    """Cache lookups and retrieval shared by /ai/qna and /ai/qna/stream.
+    Returns {"lang", "cached"} on a cache hit, else the question, vector, citations and context blocks.
+    """
+    # Try cache first
+    lang = (payload.target_lang or "en").lower()
+    cached = answer_cache.get(db, payload.question, lang)
+    if cached:
+        return {"lang": lang, "cached": cached}
+
+    # Translate question to English for retrieval if needed
+    retrieval_question = payload.question if lang.startswith("en") else translate_with_openai(payload.question, "en")
+
+    if not db.query(EmbeddingRow.id).first():
+        raise HTTPException(status_code=400, detail="No embeddings found. Run /ai/ingest first.")
+
+    # Build query vector if possible
+    q_vecs = embed_texts([retrieval_question])
+    q_vec = q_vecs[0] if q_vecs else None
+    # A paraphrase of a cached question reuses its answer
+    cached = answer_cache.get_similar(db, payload.question, q_vec, lang)
+    if cached:
+        return {"lang": lang, "cached": cached}
+    k = max(1, payload.top_k)
+    # Over-fetch chunks so that k distinct documents survive folding chunks into their parents
+    top = retrieve_top(db, retrieval_question, q_vec, k * 3, nprobe=payload.nprobe, hybrid=payload.hybrid)
+    docs = group_by_document(top, k)
+    return {
+        "lang": lang,
+        "question": retrieval_question,
+        "q_vec": q_vec,
+        "citations": [{"doc_type": g["doc_type"], "doc_id": g["doc_id"], "title": g["title"]} for g in docs],
+        "context_blocks": [_context_block(g) for g in docs],
+    }
 
-        items: List[Dict] = []
-        # Monasteries
-        for m in db.query(Monastery).all():
-            info = m.info
-            text = f"{m.name}. {m.location}. Founded {m.founded}. "
-            if info and info.description:
-                text += info.description
-            items.append({
-                "doc_type": "monastery",
-                "doc_id": m.id,
-                "title": m.name,
-                "content": text,
-            })
-        # Events
-        for e in db.query(Event).all():
-            mon = db.query(Monastery).filter(Monastery.id == e.monastery_id).first()
-            mon_name = mon.name if mon else ""
-            text = f"Event: {e.title}. {e.description}. Date {e.date} {e.time}. Monastery {mon_name}."
-            items.append({
-                "doc_type": "event",
-                "doc_id": e.id,
-                "title": e.title,
-                "content": text,
-            })
-        # Archives
-        for a in db.query(ArchiveItem).all():
-            mon = db.query(Monastery).filter(Monastery.id == a.monastery_id).first()
-            mon_name = mon.name if mon else ""
-            text = f"Archive: {a.title}. {a.description}. Type {a.type}. Monastery {mon_name}."
-            items.append({
-                "doc_type": "archive",
-                "doc_id": a.id,
-                "title": a.title,
-                "content": text,
-            })
+def _qna_messages(ctx: Dict, answer_lang: Optional[str] = None) -> List[Dict]:
+    context = "\n\n".join(ctx["context_blocks"])
+    prompt = f"Context:\n{context}\n\nQuestion: {ctx['question']}\n\nAnswer with brief bullet points and cite [type:id]."
+    if answer_lang:
+        prompt += f" Answer in the language with code '{answer_lang}'."
+    return [
+        {"role": "system", "content": QNA_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
 
-        # Compute embeddings if possible
-        vectors: Optional[List[List[float]]]= _openai_embed([it["content"] for it in items])
-        import json as _json
-        for idx, it in enumerate(items):
-            vec = vectors[idx] if vectors and idx < len(vectors) else []
-            row = EmbeddingRow(
-                doc_type=it["doc_type"],
-                doc_id=it["doc_id"],
-                title=it["title"],
-                content=it["content"],
-                vector=_json.dumps(vec),
-            )
-            db.add(row)
-        db.commit()
-        return {"count": len(items)}
+def _qna_context(payload: QnAIn) -> Dict:
+    db = SessionLocal()
+    try:
+        return _qna_prepare(db, payload)
     finally:
         db.close()
 
-@app.post("/ai/qna")
-def ai_qna(payload: QnAIn):
+def _qna_cache_answer(question: str, ctx: Dict, answer: str) -> None:
     db = SessionLocal()
     try:
-        import json as _json
-        # Try cache first
-        lang = (payload.target_lang or "en").lower()
-        cache_row = db.query(QaCache).filter(QaCache.question == payload.question, QaCache.lang == lang).first()
-        if cache_row:
-            try:
-                cits = _json.loads(cache_row.citations) if cache_row.citations else []
-            except Exception:
-                cits = []
-            return {"answer": cache_row.answer, "citations": cits}
-
-        # Translate question to English for retrieval if needed
-        retrieval_question = payload.question if lang.startswith("en") else translate_with_openai(payload.question, "en")
-
-        rows = db.query(EmbeddingRow).all()
-        if not rows:
-            raise HTTPException(status_code=400, detail="No embeddings found. Run /ai/ingest first.")
-
-        # Build query vector if possible
-        q_vecs = _openai_embed([retrieval_question])
-        q_vec = q_vecs[0] if q_vecs else None
+        answer_cache.put(db, question, ctx["lang"], answer, ctx["citations"], ctx["q_vec"])
+    finally:
+        db.close()
 
-        scored = []
-        for r in rows:
-            try:
-                vec = _json.loads(r.vector) if r.vector else []
-            except Exception:
-                vec = []
-            if q_vec and vec:
-                score = _cosine(q_vec, vec)
-            else:
-                score = _tf_score(retrieval_question, (r.title or "") + "\n" + (r.content or ""))
-            scored.append((score, r))
-        scored.sort(key=lambda x: x[0], reverse=True)
-        top = scored[: max(1, payload.top_k)]
+async def _localize_answer(answer_en: str, citations: List[Dict], lang: str):
+    """The answer and its citation titles in lang, translated together in one batch."""
+    if lang.startswith("en"):
+        return answer_en, citations
+    out = await translate_many_async([answer_en] + [c.get("title") or "" for c in citations], lang)
+    return out[0], [dict(c, title=title) for c, title in zip(citations, out[1:])]
 
-        context_blocks = [f"[{r.doc_type}:{r.doc_id}] {r.title}\n{r.content}" for _, r in top]
-        context = "\n\n".join(context_blocks)
+@app.post("/ai/qna")
+async def ai_qna(payload: QnAIn):
+    # Database work runs in the threadpool; provider calls are awaited on the shared outbound client
+    ctx = await run_in_threadpool(_qna_context, payload)
+    if "cached" in ctx:
+        return ctx["cached"]
+    lang, citations = ctx["lang"], ctx["citations"]
 
-        api_key = os.getenv("OPENAI_API_KEY")
-        if api_key:
-            try:
-                resp = requests.post(
-                    "https://api.openai.com/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {api_key}",
-                        "Content-Type": "application/json",
-                    },
-                    json={
-                        "model": "gpt-4o-mini",
-                        "temperature": 0.2,
-                        "messages": [
-                            {"role": "system", "content": "You are a helpful assistant for a monastery visitor app. Answer succinctly and cite sources using the [type:id] labels."},
-                            {"role": "user", "content": f"Context:\n{context}\n\nQuestion: {retrieval_question}\n\nAnswer with brief bullet points and cite [type:id]."},
-                        ],
-                    },
-                    timeout=60,
-                )
-                if resp.status_code == 200:
-                    data = resp.json()
-                    answer_en = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-                    answer = answer_en if lang.startswith("en") else translate_with_openai(answer_en, lang)
-                    citations = [
-                        {"doc_type": r.doc_type, "doc_id": r.doc_id, "title": r.title} for _, r in top
-                    ]
-                    # Save to cache
-                    from datetime import datetime
-                    db.add(QaCache(question=payload.question, lang=lang, answer=answer, citations=_json.dumps(citations), created_at=datetime.utcnow().isoformat()))
-                    db.commit()
-                    return {"answer": answer, "citations": citations}
-            except Exception:
-                pass
-        # Fallback: return top snippets
-        snippet_en = "\n\n".join(context_blocks)
-        answer = snippet_en if lang.startswith("en") else translate_with_openai(snippet_en, lang)
-        citations = [
-            {"doc_type": r.doc_type, "doc_id": r.doc_id, "title": r.title} for _, r in top
-        ]
-        from datetime import datetime
-        db.add(QaCache(question=payload.question, lang=lang, answer=answer, citations=_json.dumps(citations), created_at=datetime.utcnow().isoformat()))
-        db.commit()
-        return {"answer": answer, "citations": citations}
+    api_key = os.getenv("OPENAI_API_KEY")
+    if api_key:
+        try:
+            resp = await outbound.request(
+                "POST",
+                f"{OPENAI_BASE_URL}/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {api_key}",
+                    "Content-Type": "application/json",
+                },
+                json={
+                    "model": QNA_CHAT_MODEL,
+                    "temperature": 0.2,
+                    "messages": _qna_messages(ctx),
+                },
+                timeout=60,
+            )
+            if resp.status_code == 200:
+                data = resp.json()
+                answer_en = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+                answer, ctx["citations"] = await _localize_answer(answer_en, citations, lang)
+                # Save to cache
+                await run_in_threadpool(_qna_cache_answer, payload.question, ctx, answer)
+                return {"answer": answer, "citations": ctx["citations"]}
+        except Exception:
+            pass
+    # Fallback: return top snippets
+    answer, ctx["citations"] = await _localize_answer("\n\n".join(ctx["context_blocks"]), citations, lang)
+    await run_in_threadpool(_qna_cache_answer, payload.question, ctx, answer)
+    return {"answer": answer, "citations": ctx["citations"]}
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def _stream_chat_completion(messages: List[Dict]):
+    """Yield content deltas from a streamed OpenAI chat completion. Raises if the call fails."""
+    lines = outbound.stream_lines(
+        "POST",
+        f"{OPENAI_BASE_URL}/chat/completions",
+        headers={
+            "Authorization": f"Bearer {os.getenv('OPENAI_API_KEY')}",
+            "Content-Type": "application/json",
+        },
+        json={
+            "model": QNA_CHAT_MODEL,
+            "temperature": 0.2,
+            "stream": True,
+            "messages": messages,
+        },
+        timeout=httpx.Timeout(60.0, connect=10.0),  # read timeout is the max gap between streamed chunks
+    )
+    try:
+        async for line in lines:
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            choices = json.loads(data).get("choices") or [{}]
+            delta = (choices[0].get("delta") or {}).get("content")
+            if delta:
+                yield delta
     finally:
-        db.close()
-
-@app.post("/ai/route", response_model=RouteOut)
-def ai_route(payload: RouteIn):
-    """Greedy nearest-neighbor route:
-    - If start_lat/lng provided, start from there, else from the first monastery with coords.
-    - Estimate walking travel time between points (~12 min per km) and include stop durations (~20 min default each).
-    - Fit within duration_minutes budget.
+        await lines.aclose()  # releases the connection and its per-host slot
+
+async def _qna_event_stream(question: str, ctx: Dict):
+    """SSE events for one answer: `citations`, then `token` deltas, then `done` (or `error`)."""
+    if "cached" in ctx:
+        yield _sse("citations", ctx["cached"]["citations"])
+        yield _sse("token", {"text": ctx["cached"]["answer"]})
+        yield _sse("done", {"cached": True})
+        return
+    lang = ctx["lang"]
+    if not lang.startswith("en"):
+        titles = await translate_many_async([c.get("title") or "" for c in ctx["citations"]], lang)
+        ctx["citations"] = [dict(c, title=title) for c, title in zip(ctx["citations"], titles)]
+    yield _sse("citations", ctx["citations"])
+    parts: List[str] = []
+    if os.getenv("OPENAI_API_KEY"):
+        try:
+            # Stream straight in the target language; translating afterwards would hold back every token
+            async for delta in _stream_chat_completion(_qna_messages(ctx, None if lang.startswith("en") else lang)):
+                parts.append(delta)
+                yield _sse("token", {"text": delta})
+        except Exception as e:
+            if parts:
+                # Tokens already went out; report the truncation and don't cache a partial answer
+                yield _sse("error", {"detail": f"{type(e).__name__}: {e}"})
+                return
+            print(f"streamed chat completion failed: {type(e).__name__}: {e}")
+    if not parts:
+        # Fallback: return top snippets
+        snippet_en = "\n\n".join(ctx["context_blocks"])
+        parts.append(snippet_en if lang.startswith("en") else await translate_with_openai_async(snippet_en, lang))
+        yield _sse("token", {"text": parts[0]})
+    await run_in_threadpool(_qna_cache_answer, question, ctx, "".join(parts))
+    yield _sse("done", {"cached": False})
+
+@app.post("/ai/qna/stream")
+async def ai_qna_stream(payload: QnAIn):
+    """Like /ai/qna, but streams Server-Sent Events: citations first, then answer tokens as the
+    completion produces them. The full answer is written to the QnA cache once the stream completes.
     """
+    ctx = await run_in_threadpool(_qna_context, payload)
+    return StreamingResponse(
+        _qna_event_stream(payload.question, ctx),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def _route_candidates() -> List[Dict]:
+    """Every monastery as a route stop: title, description, coordinates and estimated visit minutes."""
     db = SessionLocal()
     try:
-        # Pull points with coordinates
         monasteries = db.query(Monastery).all()
         mons = []
         for m in monasteries:
@@ -1122,202 +2483,213 @@ def ai_route(payload: RouteIn):
                 "lng": lng,
                 "visit_min": visit_min,
             })
+        return mons
+    finally:
+        db.close()
 
-        # Filter those with coords first
-        pts = [p for p in mons if p["lat"] is not None and p["lng"] is not None]
-        if not pts:
-            # Fallback: return a generic step
-            return {"steps": [RouteStep(title="Explore the area", description="Walk around the monastery complex.", estimated_minutes=min(30, payload.duration_minutes))]}
-
-        import math
-        def haversine_km(lat1, lon1, lat2, lon2):
-            R = 6371.0
-            phi1 = math.radians(lat1)
-            phi2 = math.radians(lat2)
-            dphi = math.radians(lat2 - lat1)
-            dl = math.radians(lon2 - lon1)
-            a = math.sin(dphi/2)**2 + math.cos(phi1)*math.cos(phi2)*math.sin(dl/2)**2
-            c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-            return R * c
-
-        # ------------------- Routing helpers (Google preferred, OSRM fallback) -------------------
-        def _gmaps_mode(mode: str) -> str:
-            m = (mode or "foot").lower()
-            if m in ("foot", "walk", "walking"): return "walking"
-            if m in ("bike", "bicycle", "cycling"): return "bicycling"
-            if m in ("car", "drive", "driving"): return "driving"
-            return "walking"
-
-        def _decode_polyline(encoded: str) -> List[Dict[str, float]]:
-            # Google Encoded Polyline Algorithm Format
-            coords: List[Dict[str, float]] = []
-            if not encoded:
-                return coords
-            index, lat, lng = 0, 0, 0
-            length = len(encoded)
-            while index < length:
-                result, shift = 0, 0
-                while True:
-                    b = ord(encoded[index]) - 63
-                    index += 1
-                    result |= (b & 0x1f) << shift
-                    shift += 5
-                    if b < 0x20:
-                        break
-                dlat = ~(result >> 1) if (result & 1) else (result >> 1)
-                lat += dlat
-
-                result, shift = 0, 0
-                while True:
-                    b = ord(encoded[index]) - 63
-                    index += 1
-                    result |= (b & 0x1f) << shift
-                    shift += 5
-                    if b < 0x20:
-                        break
-                dlng = ~(result >> 1) if (result & 1) else (result >> 1)
-                lng += dlng
+@app.post("/ai/route", response_model=RouteOut)
+async def ai_route(payload: RouteIn):
+    """Greedy nearest-neighbor route:
+    - If start_lat/lng provided, start from there, else from the first monastery with coords.
+    - Estimate walking travel time between points (~12 min per km) and include stop durations (~20 min default each).
+    - Fit within duration_minutes budget.
+    """
+    # Pull points with coordinates
+    mons = await run_in_threadpool(_route_candidates)
 
-                coords.append({"lat": lat / 1e5, "lng": lng / 1e5})
-            return coords
+    # Filter those with coords first
+    pts = [p for p in mons if p["lat"] is not None and p["lng"] is not None]
+    if not pts:
+        # Fallback: return a generic step
+        return {"steps": [RouteStep(title="Explore the area", description="Walk around the monastery complex.", estimated_minutes=min(30, payload.duration_minutes))]}
 
-        def google_route_duration_and_geom(a_lat: float, a_lng: float, b_lat: float, b_lng: float, mode: str):
-            """Use Google Directions API to compute duration (minutes) and polyline path.
-            Returns (minutes, path_coords). Requires GOOGLE_MAPS_API_KEY env variable.
-            """
-            api_key = os.getenv("GOOGLE_MAPS_API_KEY")
-            if not api_key:
+    import math
+    def haversine_km(lat1, lon1, lat2, lon2):
+        R = 6371.0
+        phi1 = math.radians(lat1)
+        phi2 = math.radians(lat2)
+        dphi = math.radians(lat2 - lat1)
+        dl = math.radians(lon2 - lon1)
+        a = math.sin(dphi/2)**2 + math.cos(phi1)*math.cos(phi2)*math.sin(dl/2)**2
+        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+        return R * c
+
+    # ------------------- Routing helpers (Google preferred, OSRM fallback) -------------------
+    def _gmaps_mode(mode: str) -> str:
+        m = (mode or "foot").lower()
+        if m in ("foot", "walk", "walking"): return "walking"
+        if m in ("bike", "bicycle", "cycling"): return "bicycling"
+        if m in ("car", "drive", "driving"): return "driving"
+        return "walking"
+
+    def _decode_polyline(encoded: str) -> List[Dict[str, float]]:
+        # Google Encoded Polyline Algorithm Format
+        coords: List[Dict[str, float]] = []
+        if not encoded:
+            return coords
+        index, lat, lng = 0, 0, 0
+        length = len(encoded)
+        while index < length:
+            result, shift = 0, 0
+            while True:
+                b = ord(encoded[index]) - 63
+                index += 1
+                result |= (b & 0x1f) << shift
+                shift += 5
+                if b < 0x20:
+                    break
+            dlat = ~(result >> 1) if (result & 1) else (result >> 1)
+            lat += dlat
+
+            result, shift = 0, 0
+            while True:
+                b = ord(encoded[index]) - 63
+                index += 1
+                result |= (b & 0x1f) << shift
+                shift += 5
+                if b < 0x20:
+                    break
+            dlng = ~(result >> 1) if (result & 1) else (result >> 1)
+            lng += dlng
+
+            coords.append({"lat": lat / 1e5, "lng": lng / 1e5})
+        return coords
+
+    async def google_route_duration_and_geom(a_lat: float, a_lng: float, b_lat: float, b_lng: float, mode: str):
+        """Use Google Directions API to compute duration (minutes) and polyline path.
+        Returns (minutes, path_coords). Requires GOOGLE_MAPS_API_KEY env variable.
+        """
+        api_key = os.getenv("GOOGLE_MAPS_API_KEY")
+        if not api_key:
+            return None
+        try:
+            gmode = _gmaps_mode(mode)
+            url = (
+                "https://maps.googleapis.com/maps/api/directions/json"
+                f"?origin={a_lat},{a_lng}&destination={b_lat},{b_lng}&mode={gmode}&key={api_key}"
+            )
+            r = await outbound.request("GET", url, timeout=15)
+            if r.status_code != 200:
                 return None
-            try:
-                gmode = _gmaps_mode(mode)
-                url = (
-                    "https://maps.googleapis.com/maps/api/directions/json"
-                    f"?origin={a_lat},{a_lng}&destination={b_lat},{b_lng}&mode={gmode}&key={api_key}"
-                )
-                r = requests.get(url, timeout=15)
-                if r.status_code != 200:
-                    return None
-                data = r.json() or {}
-                routes = data.get("routes") or []
-                if not routes:
-                    return None
-                route0 = routes[0]
-                legs = route0.get("legs") or []
-                seconds = 0
-                for leg in legs:
-                    dur = (leg.get("duration") or {}).get("value", 0)
-                    seconds += int(dur or 0)
-                minutes = max(0, int(round(seconds / 60.0)))
-                enc = (route0.get("overview_polyline") or {}).get("points") or ""
-                path = _decode_polyline(enc) if enc else []
-                return minutes, path
-            except Exception:
+            data = r.json() or {}
+            routes = data.get("routes") or []
+            if not routes:
                 return None
+            route0 = routes[0]
+            legs = route0.get("legs") or []
+            seconds = 0
+            for leg in legs:
+                dur = (leg.get("duration") or {}).get("value", 0)
+                seconds += int(dur or 0)
+            minutes = max(0, int(round(seconds / 60.0)))
+            enc = (route0.get("overview_polyline") or {}).get("points") or ""
+            path = _decode_polyline(enc) if enc else []
+            return minutes, path
+        except Exception:
+            return None
 
-        # OSRM helpers
-        def _osrm_profile(mode: str):
-            m = (mode or "foot").lower()
-            if m in ("foot", "walk", "walking"):
-                return "foot"
-            if m in ("bike", "bicycle", "cycling"):
-                return "bicycle"
-            if m in ("car", "drive", "driving"):
-                return "driving"
+    # OSRM helpers
+    def _osrm_profile(mode: str):
+        m = (mode or "foot").lower()
+        if m in ("foot", "walk", "walking"):
             return "foot"
-
-        def osrm_route_duration_and_geom(a_lat: float, a_lng: float, b_lat: float, b_lng: float, mode: str):
-            """Returns (minutes, path_coords) using OSRM public server. path_coords is a list of (lat,lng)."""
-            try:
-                profile = _osrm_profile(mode)
-                url = f"https://router.project-osrm.org/route/v1/{profile}/{a_lng},{a_lat};{b_lng},{b_lat}?overview=full&geometries=geojson"
-                r = requests.get(url, timeout=12)
-                if r.status_code == 200:
-                    data = r.json()
-                    routes = (data or {}).get("routes") or []
-                    if routes:
-                        route0 = routes[0]
-                        seconds = route0.get("duration", 0.0) or 0.0
-                        minutes = max(0, int(round(seconds / 60.0)))
-                        coords = route0.get("geometry", {}).get("coordinates", [])
-                        # OSRM returns [lng, lat]
-                        path = [{"lat": float(lat), "lng": float(lng)} for (lng, lat) in coords]
-                        return minutes, path
-            except Exception:
-                pass
-            # Fallback to haversine speed if OSRM fails
-            dist_km = haversine_km(a_lat, a_lng, b_lat, b_lng)
-            prof = _osrm_profile(mode)
-            if prof == "foot":
-                m_per_km = 12  # ~12 min per km
-            elif prof == "bicycle":
-                m_per_km = 3   # ~20 km/h -> 3 min per km
-            else:  # driving
-                m_per_km = 1   # rough fallback
-            minutes = int(round(dist_km * m_per_km))
-            return minutes, []
-
-        def route_duration_and_geom(a_lat: float, a_lng: float, b_lat: float, b_lng: float, mode: str):
-            # Prefer Google if key present
-            g = google_route_duration_and_geom(a_lat, a_lng, b_lat, b_lng, mode)
-            if g:
-                return g
-            # else OSRM
-            return osrm_route_duration_and_geom(a_lat, a_lng, b_lat, b_lng, mode)
-
-        # Establish start position: ALWAYS from fixed Sikkim Station
-        # We ignore any client-provided start_lat/start_lng to keep routes consistent.
-        start_lat = STATION_LAT
-        start_lng = STATION_LNG
-        curr_lat, curr_lng = float(start_lat), float(start_lng)
-
-        remaining = pts.copy()
-        route: List[RouteStep] = []
-        time_left = max(10, payload.duration_minutes)
-        full_path: List[Dict[str, float]] = []
-
-        # Greedy pick next nearest, consume travel time + visit time, until budget exhausts
-        while remaining and time_left > 5:
-            # choose nearest
-            remaining.sort(key=lambda p: haversine_km(curr_lat, curr_lng, float(p["lat"]), float(p["lng"])) )
-            nxt = remaining.pop(0)
-            # Calculate travel based on selected transport mode using Google Directions (if available), else OSRM
-            travel_min, seg_path = route_duration_and_geom(curr_lat, curr_lng, float(nxt["lat"]), float(nxt["lng"]), payload.transport_mode or "foot")
-
-            visit_min = int(nxt["visit_min"]) if nxt.get("visit_min") else 20
-
-            # if first step and start is same as first point, reduce travel
-            dist_km = haversine_km(curr_lat, curr_lng, float(nxt["lat"]), float(nxt["lng"]))
-            if len(route) == 0 and dist_km < 0.05:
-                travel_min = 0
-
-            needed = travel_min + visit_min
-            if needed > time_left:
-                break
-
-            # Add travel as a step if non-zero
-            if travel_min > 0:
-                mode = (_osrm_profile(payload.transport_mode or "foot"))
-                label = "Walk" if mode == "foot" else ("Bike" if mode == "bicycle" else "Drive")
-                route.append(RouteStep(title=label, description=f"{label} to {nxt['title']} (~{dist_km:.2f} km)", lat=None, lng=None, estimated_minutes=travel_min))
-                # Append path geometry if available
-                if seg_path:
-                    # If we already have path, avoid duplicating the starting point
-                    if full_path and seg_path:
-                        seg_path = seg_path[1:]
-                    full_path.extend(seg_path)
-            route.append(RouteStep(title=nxt["title"], description=nxt["desc"], lat=float(nxt["lat"]), lng=float(nxt["lng"]), estimated_minutes=visit_min))
-
-            time_left -= needed
-            curr_lat, curr_lng = float(nxt["lat"]), float(nxt["lng"])
-
-        if not route:
-            # Couldn’t fit any visit; suggest nearest single POI name
-            nearest = min(pts, key=lambda p: haversine_km(curr_lat, curr_lng, float(p["lat"]), float(p["lng"])) )
-            route = [RouteStep(title=nearest["title"], description=nearest["desc"], lat=float(nearest["lat"]), lng=float(nearest["lng"]), estimated_minutes=min(20, time_left))]
-
-        return {"steps": route, "path": full_path or None}
-    finally:
-        db.close()
+        if m in ("bike", "bicycle", "cycling"):
+            return "bicycle"
+        if m in ("car", "drive", "driving"):
+            return "driving"
+        return "foot"
+
+    async def osrm_route_duration_and_geom(a_lat: float, a_lng: float, b_lat: float, b_lng: float, mode: str):
+        """Returns (minutes, path_coords) using OSRM public server. path_coords is a list of (lat,lng)."""
+        try:
+            profile = _osrm_profile(mode)
+            url = f"https://router.project-osrm.org/route/v1/{profile}/{a_lng},{a_lat};{b_lng},{b_lat}?overview=full&geometries=geojson"
+            r = await outbound.request("GET", url, timeout=12)
+            if r.status_code == 200:
+                data = r.json()
+                routes = (data or {}).get("routes") or []
+                if routes:
+                    route0 = routes[0]
+                    seconds = route0.get("duration", 0.0) or 0.0
+                    minutes = max(0, int(round(seconds / 60.0)))
+                    coords = route0.get("geometry", {}).get("coordinates", [])
+                    # OSRM returns [lng, lat]
+                    path = [{"lat": float(lat), "lng": float(lng)} for (lng, lat) in coords]
+                    return minutes, path
+        except Exception:
+            pass
+        # Fallback to haversine speed if OSRM fails
+        dist_km = haversine_km(a_lat, a_lng, b_lat, b_lng)
+        prof = _osrm_profile(mode)
+        if prof == "foot":
+            m_per_km = 12  # ~12 min per km
+        elif prof == "bicycle":
+            m_per_km = 3   # ~20 km/h -> 3 min per km
+        else:  # driving
+            m_per_km = 1   # rough fallback
+        minutes = int(round(dist_km * m_per_km))
+        return minutes, []
+
+    async def route_duration_and_geom(a_lat: float, a_lng: float, b_lat: float, b_lng: float, mode: str):
+        # Prefer Google if key present
+        g = await google_route_duration_and_geom(a_lat, a_lng, b_lat, b_lng, mode)
+        if g:
+            return g
+        # else OSRM
+        return await osrm_route_duration_and_geom(a_lat, a_lng, b_lat, b_lng, mode)
+
+    # Establish start position: ALWAYS from fixed Sikkim Station
+    # We ignore any client-provided start_lat/start_lng to keep routes consistent.
+    start_lat = STATION_LAT
+    start_lng = STATION_LNG
+    curr_lat, curr_lng = float(start_lat), float(start_lng)
+
+    remaining = pts.copy()
+    route: List[RouteStep] = []
+    time_left = max(10, payload.duration_minutes)
+    full_path: List[Dict[str, float]] = []
+
+    # Greedy pick next nearest, consume travel time + visit time, until budget exhausts
+    while remaining and time_left > 5:
+        # choose nearest
+        remaining.sort(key=lambda p: haversine_km(curr_lat, curr_lng, float(p["lat"]), float(p["lng"])) )
+        nxt = remaining.pop(0)
+        # Calculate travel based on selected transport mode using Google Directions (if available), else OSRM
+        travel_min, seg_path = await route_duration_and_geom(curr_lat, curr_lng, float(nxt["lat"]), float(nxt["lng"]), payload.transport_mode or "foot")
+
+        visit_min = int(nxt["visit_min"]) if nxt.get("visit_min") else 20
+
+        # if first step and start is same as first point, reduce travel
+        dist_km = haversine_km(curr_lat, curr_lng, float(nxt["lat"]), float(nxt["lng"]))
+        if len(route) == 0 and dist_km < 0.05:
+            travel_min = 0
+
+        needed = travel_min + visit_min
+        if needed > time_left:
+            break
+
+        # Add travel as a step if non-zero
+        if travel_min > 0:
+            mode = (_osrm_profile(payload.transport_mode or "foot"))
+            label = "Walk" if mode == "foot" else ("Bike" if mode == "bicycle" else "Drive")
+            route.append(RouteStep(title=label, description=f"{label} to {nxt['title']} (~{dist_km:.2f} km)", lat=None, lng=None, estimated_minutes=travel_min))
+            # Append path geometry if available
+            if seg_path:
+                # If we already have path, avoid duplicating the starting point
+                if full_path and seg_path:
+                    seg_path = seg_path[1:]
+                full_path.extend(seg_path)
+        route.append(RouteStep(title=nxt["title"], description=nxt["desc"], lat=float(nxt["lat"]), lng=float(nxt["lng"]), estimated_minutes=visit_min))
+
+        time_left -= needed
+        curr_lat, curr_lng = float(nxt["lat"]), float(nxt["lng"])
+
+    if not route:
+        # Couldn’t fit any visit; suggest nearest single POI name
+        nearest = min(pts, key=lambda p: haversine_km(curr_lat, curr_lng, float(p["lat"]), float(p["lng"])) )
+        route = [RouteStep(title=nearest["title"], description=nearest["desc"], lat=float(nearest["lat"]), lng=float(nearest["lng"]), estimated_minutes=min(20, time_left))]
+
+    return {"steps": route, "path": full_path or None}
 
 # ------------------- Admin: QnA Cache -------------------
 class QaCacheEntryOut(BaseModel):
@@ -1325,11 +2697,14 @@ class QaCacheEntryOut(BaseModel):
     question: str
     lang: str
     created_at: Optional[str] = None
+    hits: int = 0
+    last_used_at: Optional[str] = None
 
 @app.get("/admin/qa_cache", response_model=List[QaCacheEntryOut])
 def admin_list_qa_cache():
     db = SessionLocal()
     try:
+        answer_cache.flush_usage(db, force=True)
         rows = db.query(QaCache).order_by(QaCache.id.desc()).limit(200).all()
         return [
             {
@@ -1337,43 +2712,251 @@ def admin_list_qa_cache():
                 "question": r.question or "",
                 "lang": r.lang or "en",
                 "created_at": r.created_at,
+                "hits": r.hits or 0,
+                "last_used_at": r.last_used_at,
             }
             for r in rows
         ]
     finally:
         db.close()
 
+@app.get("/admin/qa_cache/stats")
+def admin_qa_cache_stats():
+    """Hit/miss counters for this worker's answer cache, plus table size and limits."""
+    db = SessionLocal()
+    try:
+        stats = answer_cache.stats()
+        stats.update({
+            "rows": db.query(func.count(QaCache.id)).scalar(),
+            "max_rows": QA_CACHE_MAX_ROWS,
+            "ttl_seconds": QA_CACHE_TTL_SECONDS,
+        })
+        return stats
+    finally:
+        db.close()
+
 @app.post("/admin/qa_cache/clear")
 def admin_clear_qa_cache():
     db = SessionLocal()
     try:
         deleted = db.query(QaCache).delete()
         db.commit()
+        answer_cache.clear_memory()
+        return {"deleted": deleted}
+    finally:
+        db.close()
+
+# ------------------- Admin: Translation Memory -------------------
+@app.get("/admin/translation_memory/stats")
+def admin_translation_memory_stats():
+    """Hit/miss counters for this worker's translation memory, plus rows per target language."""
+    db = SessionLocal()
+    try:
+        stats = translation_memory.stats()
+        stats["rows"] = dict(
+            db.query(TranslationRow.target_lang, func.count(TranslationRow.id)).group_by(TranslationRow.target_lang).all()
+        )
+        return stats
+    finally:
+        db.close()
+
+@app.post("/admin/translation_memory/clear")
+def admin_clear_translation_memory():
+    db = SessionLocal()
+    try:
+        deleted = db.query(TranslationRow).delete()
+        db.commit()
+        translation_memory.clear_memory()
         return {"deleted": deleted}
     finally:
         db.close()
 
 # ------------------- Helpers -------------------
-def serialize_monastery(m: Monastery) -> Dict:
+# Child collections of Monastery that load_catalog can preload, by relationship name
+CATALOG_RELATIONSHIPS = {
+    "media": Media,
+    "info": MonasteryInfo,
+    "events": Event,
+    "archives": ArchiveItem,
+    "highlights": AudioHighlight,
+}
+
+def load_catalog(
+    db,
+    limit: Optional[int] = None,
+    after: Optional[int] = None,
+    columns: Optional[List[str]] = None,
+    children: Optional[Dict[str, Optional[List[str]]]] = None,
+) -> List[Monastery]:
+    """Fetch a page of monasteries (ordered by id) with child collections preloaded.
+    Issues one query for the page plus one per child table, regardless of page size, and
+    populates the relationships so serialize_monastery never triggers lazy loads.
+    - columns: Monastery columns to select (None selects all; id is always included).
+    - children: relationship name -> child columns to select (None selects all). Defaults to
+      every relationship; relationships left out are not loaded at all.
+    """
+    page = db.query(Monastery.id).order_by(Monastery.id)
+    if after is not None:
+        page = page.filter(Monastery.id > after)
+    if limit is not None:
+        page = page.limit(limit)
+    page_ids = page.subquery()
+
+    q = db.query(Monastery).filter(Monastery.id.in_(page_ids.select())).order_by(Monastery.id)
+    if columns is not None:
+        q = q.options(load_only(Monastery.id, *[getattr(Monastery, c) for c in columns]))
+    monasteries = q.all()
+    if not monasteries:
+        return []
+
+    plan = children if children is not None else {name: None for name in CATALOG_RELATIONSHIPS}
+    for name, cols in plan.items():
+        model = CATALOG_RELATIONSHIPS[name]
+        cq = db.query(model).filter(model.monastery_id.in_(page_ids.select())).order_by(model.id)
+        if cols is not None:
+            cq = cq.options(load_only(model.monastery_id, *[getattr(model, c) for c in cols]))
+        grouped: Dict[int, List] = {}
+        for row in cq.all():
+            grouped.setdefault(row.monastery_id, []).append(row)
+        for m in monasteries:
+            rows = grouped.get(m.id, [])
+            set_committed_value(m, name, (rows[0] if rows else None) if name == "info" else rows)
+    return monasteries
+
+# Projection specs for ?fields=: output key -> (Monastery columns, {relationship: child columns or None for all})
+SUMMARY_FIELDS = {
+    "id": ((), {}),
+    "name": (("name",), {}),
+    "image": (("name",), {"media": ["file_path"]}),
+    "info": ((), {"info": ["description"]}),
+    "coordinates": ((), {"info": ["latitude", "longitude"]}),
+    "events": ((), {"events": ["title", "date", "time", "description", "type"]}),
+}
+
+DETAIL_FIELDS = {
+    "id": ((), {}),
+    "name": (("name",), {}),
+    "location": (("location",), {}),
+    "founded": (("founded",), {}),
+    "media": ((), {"media": ["title", "type", "file_path", "language"]}),
+    "image": ((), {"media": ["title", "type", "file_path", "language"]}),
+    "panoramas": ((), {"media": ["title", "type", "file_path", "language"]}),
+    "info": ((), {"info": None, "highlights": None}),
+    "events": ((), {"events": None}),
+    "archiveItems": ((), {"archives": None}),
+}
+
+def parse_catalog_fields(fields: Optional[str], spec: Dict) -> Optional[set]:
+    """Parse a comma-separated ?fields= value against a projection spec; None means all fields."""
+    if not fields:
+        return None
+    wanted = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = sorted(wanted - set(spec))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(spec)}")
+    return wanted
+
+def catalog_load_plan(wanted: Optional[set], spec: Dict):
+    """Translate requested output fields into load_catalog(columns=..., children=...) arguments."""
+    if wanted is None:
+        return None, None
+    columns: set = set()
+    children: Dict[str, Optional[set]] = {}
+    for key in wanted:
+        cols, rels = spec[key]
+        columns.update(cols)
+        for rel, rel_cols in rels.items():
+            if rel_cols is None or (rel in children and children[rel] is None):
+                children[rel] = None
+            else:
+                children.setdefault(rel, set()).update(rel_cols)
+    return sorted(columns), {rel: (sorted(c) if c is not None else None) for rel, c in children.items()}
+
+def catalog_page_headers(request: Request, monasteries: List[Monastery], limit: Optional[int]) -> Dict[str, str]:
+    """Next-page cursor headers for a paginated catalog read (empty when this is the last page)."""
+    if limit is None or len(monasteries) < limit:
+        return {}
+    next_after = monasteries[-1].id
+    params = dict(request.query_params)
+    params["after"] = str(next_after)
+    return {
+        "X-Next-Cursor": str(next_after),
+        "Link": f'<{request.url.path}?{urlencode(params)}>; rel="next"',
+    }
+
+# Fallback to asset previews when no media exists
+ASSET_PREVIEWS = {
+    "Rumtek Monastery": ("Rumtek", "Preview.jpg"),
+    "Pemayangtse Monastery": ("Pemangytse", "Permangytse-preview.jpg"),
+    "Tashiding Monastery": ("Tashiding", "Tashiding-Monastery-Preview.jpg"),
+}
+
+def serialize_monastery_summary(m: Monastery, fields: Optional[set] = None) -> Dict:
+    """Compact shape used by /api/monasteries (map, list and events pages).
+    With fields, only those keys are computed so unloaded columns are never touched.
+    """
+    def want(key: str) -> bool:
+        return fields is None or key in fields
+
+    out: Dict = {}
+    if want("id"):
+        out["id"] = m.id
+    if want("name"):
+        out["name"] = m.name
+    if want("image"):
+        img = None
+        if m.media:
+            img = f"/media/{os.path.basename(m.media[0].file_path)}"
+        elif m.name in ASSET_PREVIEWS:
+            folder, fname = ASSET_PREVIEWS[m.name]
+            img = f"/assets/{folder}/{fname}"
+        out["image"] = img
+    if want("info"):
+        out["info"] = (m.info.description if m.info and m.info.description else None)
+    if want("coordinates"):
+        out["coordinates"] = ({
+            "lat": (m.info.latitude if m.info else None),
+            "lng": (m.info.longitude if m.info else None),
+        } if m.info else None)
+    if want("events"):
+        # include events for Events page
+        out["events"] = [
+            {
+                "id": e.id,
+                "title": e.title,
+                "date": e.date,
+                "time": e.time,
+                "description": e.description,
+                "type": e.type,
+            }
+            for e in m.events
+        ]
+    return out
+
+def serialize_monastery(m: Monastery, fields: Optional[set] = None) -> Dict:
+    def want(*keys: str) -> bool:
+        return fields is None or any(k in fields for k in keys)
+
     # media
     media_list = []
-    for md in m.media:
-        # Guard against null/invalid file paths that can occur from partial seeds
-        filename = os.path.basename(md.file_path) if (getattr(md, "file_path", None)) else ""
-        file_url = f"http://127.0.0.1:8000/media/{filename}" if filename else ""
-        media_list.append({
-            "title": md.title,
-            "type": md.type,
-            "file_url": file_url,
-            "language": getattr(md, "language", None)
-        })
+    if want("media", "image", "panoramas"):
+        for md in m.media:
+            # Guard against null/invalid file paths that can occur from partial seeds
+            filename = os.path.basename(md.file_path) if (getattr(md, "file_path", None)) else ""
+            file_url = f"http://127.0.0.1:8000/media/{filename}" if filename else ""
+            media_list.append({
+                "title": md.title,
+                "type": md.type,
+                "file_url": file_url,
+                "language": getattr(md, "language", None)
+            })
 
     # panoramas (subset of media)
     panoramas = [m for m in media_list if (m.get("type") or "").lower() == "panorama"]
 
     # info
     info = None
-    if m.info:
+    if want("info") and m.info:
         info = {
             "district": m.info.district,
             "coordinates": {
@@ -1411,7 +2994,7 @@ def serialize_monastery(m: Monastery) -> Dict:
             "canBook": e.can_book == "true",
             "maxParticipants": e.max_participants,
         }
-        for e in m.events
+        for e in (m.events if want("events") else [])
     ]
 
     # archives
@@ -1425,14 +3008,14 @@ def serialize_monastery(m: Monastery) -> Dict:
             "dateCreated": a.date_created,
             "digitalizedDate": a.digitalized_date,
         }
-        for a in m.archives
+        for a in (m.archives if want("archiveItems") else [])
     ]
 
-    return {
+    out = {
         "id": m.id,
-        "name": m.name,
-        "location": m.location,
-        "founded": m.founded,
+        "name": m.name if want("name") else None,
+        "location": m.location if want("location") else None,
+        "founded": m.founded if want("founded") else None,
         "media": media_list,
         # Convenience fields for simpler frontends
         "image": (media_list[0]["file_url"] if media_list else None),
@@ -1441,6 +3024,9 @@ def serialize_monastery(m: Monastery) -> Dict:
         "events": events,
         "archiveItems": archives,
     }
+    if fields is None:
+        return out
+    return {k: v for k, v in out.items() if k in fields}
 
 # ------------------- Featured Monasteries -------------------
 class FeaturedMonasteryOut(BaseModel):
@@ -1499,95 +3085,933 @@ def _pick_edge_voice_for_lang(lang_code: str) -> str:
     }
     return mapping.get(lc, mapping.get(lc.split("-")[0], "en-US-AriaNeural"))
 
+# ------------------- TTS audio cache -------------------
+# Synthesized audio is stored once per (provider, model, voice, lang, text) under a name derived from
+# that key. A variant is a (provider, model, voice) tuple; endpoints list theirs in the order their
+# provider chain would try them.
+
+def tts_audio_key(text_value: str, lang: str, variant: tuple) -> str:
+    provider, model, voice = variant
+    parts = [provider, model or "", voice or "", (lang or "").lower(), text_value]
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+def tts_temp_path() -> str:
+    """Scratch file for a synthesis in progress; tts_cache_store moves it to its cached name."""
+    return os.path.join(MEDIA_ROOT, f".tts_{uuid4().hex}.part")
+
+def tts_discard(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def tts_cache_lookup(text_value: str, lang: str, variants: List[tuple], count_hit: bool = True) -> Optional[str]:
+    """Filename of cached audio for text in the earliest variant that has any, or None.
+    Rows whose file has disappeared are dropped.
+    """
+    keys = [tts_audio_key(text_value, lang, v) for v in variants]
+    db = SessionLocal()
+    try:
+        rows = {r.audio_key: r for r in db.query(TtsAudio).filter(TtsAudio.audio_key.in_(keys)).all()}
+        for key in keys:
+            row = rows.get(key)
+            if row is None:
+                continue
+            if not os.path.exists(os.path.join(MEDIA_ROOT, row.filename)):
+                db.delete(row)
+                db.commit()
+                continue
+            if count_hit:
+                row.hits = (row.hits or 0) + 1
+                row.last_used_at = _utcnow_iso()
+                db.commit()
+            return row.filename
+        return None
+    finally:
+        db.close()
+
+def tts_filename(text_value: str, lang: str, variant: tuple) -> str:
+    return f"tts_{(lang or 'en').lower()}_{tts_audio_key(text_value, lang, variant)[:32]}.mp3"
+
+def tts_cache_store(text_value: str, lang: str, variant: tuple, tmp_path: str) -> str:
+    """Move freshly synthesized audio to its content-keyed name and record it. Returns the filename."""
+    key = tts_audio_key(text_value, lang, variant)
+    fname = tts_filename(text_value, lang, variant)
+    os.replace(tmp_path, os.path.join(MEDIA_ROOT, fname))
+    media_index.register(fname)
+    now = _utcnow_iso()
+    db = SessionLocal()
+    try:
+        db.query(TtsAudio).filter(TtsAudio.audio_key == key).delete(synchronize_session=False)
+        db.add(TtsAudio(
+            audio_key=key,
+            filename=fname,
+            provider=variant[0],
+            model=variant[1],
+            voice=variant[2],
+            lang=lang,
+            size_bytes=os.path.getsize(os.path.join(MEDIA_ROOT, fname)),
+            created_at=now,
+            hits=0,
+            last_used_at=now,
+        ))
+        db.commit()
+    finally:
+        db.close()
+    return fname
+
+def narration_media(db, monastery_id: int, title: str, fname: str, language: Optional[str]) -> Media:
+    """The monastery's audio Media row for a narration file, created on first use."""
+    fpath = os.path.join(MEDIA_ROOT, fname)
+    media_item = db.query(Media).filter(Media.monastery_id == monastery_id, Media.file_path == fpath).first()
+    if media_item is not None and media_item.title == title:
+        return media_item
+    if media_item is None:
+        media_item = Media(monastery_id=monastery_id, title=title, type="audio", file_path=fpath, language=language)
+        db.add(media_item)
+    else:
+        media_item.title = title
+    bump_catalog_version(db)
+    db.commit()
+    db.refresh(media_item)
+    return media_item
+
+# ------------------- Speech synthesis -------------------
+# Each provider is a coroutine writing MP3 audio for text to a path, using the (provider, model, voice)
+# variant it is given. TtsEngine runs them on the outbound HTTP loop.
+NARRATION_CHUNK_CHARS = int(os.getenv("NARRATION_CHUNK_CHARS", "600"))  # max characters per chunk in chunked mode
+NARRATION_CHUNK_CONCURRENCY = int(os.getenv("NARRATION_CHUNK_CONCURRENCY", "4"))  # chunks synthesized at once per narration
+TTS_TIMEOUT_SECONDS = float(os.getenv("TTS_TIMEOUT_SECONDS", "60"))  # per provider attempt
+TTS_HEDGE_SECONDS = float(os.getenv("TTS_HEDGE_SECONDS", "0"))  # start the next provider after this long; 0 disables hedging
+TTS_BREAKER_FAILURES = int(os.getenv("TTS_BREAKER_FAILURES", "3"))  # consecutive failures that open a provider's breaker
+TTS_BREAKER_COOLDOWN_SECONDS = float(os.getenv("TTS_BREAKER_COOLDOWN_SECONDS", "30"))  # open breakers let one trial through after this
+TTS_INSTALL_HINT = "Text-to-speech requires OPENAI_API_KEY, ELEVENLABS_API_KEY, edge-tts, or gTTS installed. Install one: pip install edge-tts OR pip install gTTS"
+
+# Providers run on the outbound loop, so file writes go to a thread rather than stall other calls.
+# on_audio, when given, receives audio chunks as a provider streams them (only edge-tts streams).
+def _write_audio(fpath: str, data: bytes) -> None:
+    with open(fpath, "wb") as f:
+        f.write(data)
+
+async def _tts_openai(text_value: str, variant: tuple, fpath: str, on_audio=None) -> None:
+    try:
+        resp = await outbound.request(
+            "POST",
+            f"{OPENAI_BASE_URL}/audio/speech",
+            headers={
+                "Authorization": f"Bearer {os.getenv('OPENAI_API_KEY')}",
+                "Content-Type": "application/json",
+            },
+            json={"model": variant[1], "voice": variant[2], "input": text_value, "format": "mp3"},
+            timeout=TTS_TIMEOUT_SECONDS,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Failed to call TTS service: {e}")
+    if resp.status_code != 200:
+        try:
+            err = resp.json()
+        except Exception:
+            err = {"message": resp.text}
+        raise HTTPException(status_code=502, detail={"message": "TTS error", "data": err})
+    await asyncio.to_thread(_write_audio, fpath, resp.content)
+
+async def _tts_elevenlabs(text_value: str, variant: tuple, fpath: str, on_audio=None) -> None:
+    resp = await outbound.request(
+        "POST",
+        f"https://api.elevenlabs.io/v1/text-to-speech/{variant[2]}",
+        json={
+            "text": text_value,
+            "model_id": variant[1],
+            "voice_settings": {"stability": 0.5, "similarity_boost": 0.5},
+        },
+        headers={"Accept": "audio/mpeg", "Content-Type": "application/json", "xi-api-key": os.getenv("ELEVENLABS_API_KEY")},
+        timeout=TTS_TIMEOUT_SECONDS,
+    )
+    if resp.status_code != 200:
+        raise Exception(f"ElevenLabs API error: {resp.status_code}")
+    await asyncio.to_thread(_write_audio, fpath, resp.content)
+
+async def _tts_edge(text_value: str, variant: tuple, fpath: str, on_audio=None) -> None:
+    import edge_tts  # type: ignore
+    communicate = edge_tts.Communicate(text_value, variant[2])
+    parts: List[bytes] = []
+    async for chunk in communicate.stream():
+        if chunk["type"] == "audio":
+            parts.append(chunk["data"])
+            if on_audio is not None:
+                on_audio(chunk["data"])
+    await asyncio.to_thread(_write_audio, fpath, b"".join(parts))
+
+async def _tts_gtts(text_value: str, variant: tuple, fpath: str, on_audio=None) -> None:
+    try:
+        from gtts import gTTS  # type: ignore
+    except Exception:
+        raise HTTPException(status_code=500, detail=TTS_INSTALL_HINT)
+    try:
+        # gTTS is blocking; a cancelled attempt leaves its thread to finish writing a discarded scratch file
+        await asyncio.to_thread(gTTS(text=text_value, lang=variant[2]).save, fpath)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to synthesize audio with gTTS: {e}")
+
+TTS_PROVIDERS = {"openai": _tts_openai, "elevenlabs": _tts_elevenlabs, "edge": _tts_edge, "gtts": _tts_gtts}
+
+class TtsEngine:
+    """Runs a provider chain for one synthesis, with a circuit breaker and latency stats per provider.
+
+    Providers are tried in chain order. One whose last TTS_BREAKER_FAILURES attempts failed is skipped
+    until TTS_BREAKER_COOLDOWN_SECONDS have passed; then a single trial attempt decides whether it is
+    used again. With hedge_seconds > 0, the next provider is started when the current one hasn't
+    finished after that long, and the first successful attempt wins; the others are cancelled.
+    A synthesis that streams its audio (on_audio) is never hedged, and once a provider has streamed
+    any audio its failure ends the synthesis instead of falling back.
+    """
+
+    def __init__(self, timeout: float, hedge_seconds: float, breaker_failures: int, breaker_cooldown: float):
+        self.timeout = timeout
+        self.hedge_seconds = hedge_seconds
+        self.breaker_failures = breaker_failures
+        self.breaker_cooldown = breaker_cooldown
+        self._lock = threading.Lock()
+        self._health: Dict[str, Dict] = {}
+
+    def _provider(self, name: str) -> Dict:
+        h = self._health.get(name)
+        if h is None:
+            h = self._health[name] = {
+                "attempts": 0, "successes": 0, "failures": 0, "timeouts": 0, "cancelled": 0, "hedged": 0,
+                "consecutive_failures": 0, "open_until": 0.0, "trial": False, "latencies": [],
+            }
+        return h
+
+    def _allow(self, name: str) -> bool:
+        """Whether the provider's breaker lets an attempt through; claims the trial of an open breaker."""
+        with self._lock:
+            h = self._provider(name)
+            if h["consecutive_failures"] < self.breaker_failures:
+                return True
+            if h["trial"] or time.monotonic() < h["open_until"]:
+                return False
+            h["trial"] = True
+            return True
+
+    def _record(self, name: str, outcome: str, seconds: float) -> None:
+        with self._lock:
+            h = self._provider(name)
+            h["trial"] = False
+            if outcome == "cancelled":
+                h["cancelled"] += 1
+                return
+            h["attempts"] += 1
+            if outcome == "ok":
+                h["successes"] += 1
+                h["consecutive_failures"] = 0
+                h["latencies"].append(seconds)
+                del h["latencies"][:-256]
+                return
+            h["failures"] += 1
+            if outcome == "timeout":
+                h["timeouts"] += 1
+            h["consecutive_failures"] += 1
+            if h["consecutive_failures"] >= self.breaker_failures:
+                h["open_until"] = time.monotonic() + self.breaker_cooldown
+
+    async def _attempt(self, variant: tuple, text_value: str, fpath: str, on_audio=None) -> None:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(TTS_PROVIDERS[variant[0]](text_value, variant, fpath, on_audio), self.timeout)
+            if not os.path.exists(fpath) or not os.path.getsize(fpath):
+                raise RuntimeError(f"{variant[0]} returned no audio")
+        except asyncio.CancelledError:
+            self._record(variant[0], "cancelled", time.perf_counter() - started)
+            raise
+        except asyncio.TimeoutError:
+            self._record(variant[0], "timeout", time.perf_counter() - started)
+            raise HTTPException(status_code=504, detail=f"{variant[0]} TTS timed out after {self.timeout:g}s")
+        except Exception:
+            self._record(variant[0], "failed", time.perf_counter() - started)
+            raise
+        self._record(variant[0], "ok", time.perf_counter() - started)
+
+    async def synthesize(self, text_value: str, variants: List[tuple], fpath: str, on_audio=None) -> tuple:
+        """Write audio for text to fpath with the first variant that succeeds, and return that variant.
+        If every variant fails, raises the last failure (an HTTPException where the provider gave one).
+        on_audio(chunk) is called with audio as a streaming provider produces it.
+        """
+        pending = list(variants)
+        running: Dict[asyncio.Future, tuple] = {}  # attempt -> (variant, scratch file)
+        last: Optional[Exception] = None
+        streamed = False
+        tee = None
+        if on_audio is not None:
+            def tee(data: bytes) -> None:
+                nonlocal streamed
+                streamed = True
+                on_audio(data)
+
+        def launch() -> Optional[tuple]:
+            """Start the next provider whose breaker allows it; returns its variant."""
+            while pending:
+                variant = pending.pop(0)
+                if self._allow(variant[0]):
+                    scratch = tts_temp_path()
+                    running[asyncio.ensure_future(self._attempt(variant, text_value, scratch, tee))] = (variant, scratch)
+                    return variant
+            return None
+
+        launch()
+        try:
+            while running:
+                hedge = self.hedge_seconds if self.hedge_seconds > 0 and pending and on_audio is None else None
+                done, _ = await asyncio.wait(list(running), timeout=hedge, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = launch()
+                    if hedged is not None:
+                        with self._lock:
+                            self._provider(hedged[0])["hedged"] += 1
+                    continue
+                for attempt in done:
+                    variant, scratch = running.pop(attempt)
+                    if attempt.exception() is None:
+                        os.replace(scratch, fpath)
+                        return variant
+                    last = attempt.exception()
+                    tts_discard(scratch)
+                    print(f"{variant[0]} TTS failed: {last}")
+                    if streamed:
+                        raise last  # the listener already has part of this provider's audio
+                    launch()  # a failure hands over to the next provider at once
+        finally:
+            for attempt in running:
+                attempt.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+            for _, scratch in running.values():
+                tts_discard(scratch)
+        if isinstance(last, HTTPException):
+            raise last
+        if last is None:
+            raise HTTPException(status_code=503, detail="All text-to-speech providers are failing; try again shortly")
+        raise HTTPException(status_code=500, detail=f"TTS failed: {last}")
+
+    def stats(self) -> Dict:
+        """Per-provider counters, breaker state and latency percentiles of successful attempts."""
+        now = time.monotonic()
+        out: Dict[str, Dict] = {}
+        with self._lock:
+            for name, h in self._health.items():
+                lat = sorted(h["latencies"])
+                pct = lambda q: round(lat[min(len(lat) - 1, int(q * len(lat)))] * 1000, 1) if lat else None
+                if h["consecutive_failures"] < self.breaker_failures:
+                    state = "closed"
+                else:
+                    state = "half_open" if h["trial"] or now >= h["open_until"] else "open"
+                out[name] = {
+                    "state": state,
+                    **{k: h[k] for k in ("attempts", "successes", "failures", "timeouts", "cancelled", "hedged", "consecutive_failures")},
+                    "latency_ms": {"p50": pct(0.5), "p95": pct(0.95), "mean": round(sum(lat) * 1000 / len(lat), 1) if lat else None},
+                }
+        return out
+
+tts_engine = TtsEngine(TTS_TIMEOUT_SECONDS, TTS_HEDGE_SECONDS, TTS_BREAKER_FAILURES, TTS_BREAKER_COOLDOWN_SECONDS)
+
+def synthesize_speech(text_value: str, variants: List[tuple], fpath: str) -> tuple:
+    """Blocking tts_engine.synthesize, for sync callers."""
+    return outbound.run(tts_engine.synthesize(text_value, variants, fpath))
+
+@app.get("/admin/tts/stats")
+def admin_tts_stats():
+    """Breaker state, attempt counters and latency percentiles per TTS provider (this worker)."""
+    return {"hedge_seconds": tts_engine.hedge_seconds, "providers": tts_engine.stats()}
+
+def synthesize_cached(text_value: str, lang: str, variants: List[tuple]) -> str:
+    """Filename of audio for text: from the TTS cache, else synthesized through the chain and cached."""
+    fname = tts_cache_lookup(text_value, lang, variants)
+    if fname is not None:
+        return fname
+    fpath = tts_temp_path()
+    try:
+        used = synthesize_speech(text_value, variants, fpath)
+    except BaseException:
+        tts_discard(fpath)
+        raise
+    return tts_cache_store(text_value, lang, used, fpath)
+
+def narration_chunks(script: str) -> List[str]:
+    """Split a script into synthesis chunks: one per paragraph, with paragraphs longer than
+    NARRATION_CHUNK_CHARS cut into windows of whole sentences. Paragraphs are chunked independently,
+    so editing one leaves the other chunks (and their cached audio) unchanged.
+    """
+    chunks: List[str] = []
+    for para in re.split(r"\n\s*\n", script):
+        para = para.strip()
+        if para:
+            chunks.extend(c for _, c in chunk_text(para, NARRATION_CHUNK_CHARS, overlap=0))
+    return chunks
+
+_MP3_BITRATES_KBPS = {
+    True: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),  # MPEG-1 layer III
+    False: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),  # MPEG-2/2.5 layer III
+}
+_MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+def _mp3_frame_length(data: bytes, i: int) -> int:
+    """Length of the MPEG layer III frame whose header starts at data[i], or 0 if none does."""
+    if i + 4 > len(data) or data[i] != 0xFF or (data[i + 1] & 0xE0) != 0xE0:
+        return 0
+    version = (data[i + 1] >> 3) & 3  # 3: MPEG-1, 2: MPEG-2, 0: MPEG-2.5, 1: reserved
+    layer = (data[i + 1] >> 1) & 3  # 1: layer III
+    bitrate_index = data[i + 2] >> 4
+    rate_index = (data[i + 2] >> 2) & 3
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+        return 0
+    bitrate = _MP3_BITRATES_KBPS[version == 3][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    padding = (data[i + 2] >> 1) & 1
+    return (144 if version == 3 else 72) * bitrate // sample_rate + padding
+
+def mp3_audio_frames(data: bytes) -> bytes:
+    """The audio frames of an MP3 file: ID3 tags and a leading Xing/Info/VBRI header frame removed, so
+    files can be joined into one stream. Data that doesn't parse as MP3 is returned unchanged.
+    """
+    start, end = 0, len(data)
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size = ((data[6] & 0x7F) << 21) | ((data[7] & 0x7F) << 14) | ((data[8] & 0x7F) << 7) | (data[9] & 0x7F)
+        start = 10 + size + (10 if data[5] & 0x10 else 0)  # flag 0x10: a footer follows the tag
+    if end - start >= 128 and data[end - 128:end - 125] == b"TAG":
+        end -= 128  # ID3v1 trailer
+    data = data[:end]
+    # The first frame header is one whose successor is also a frame header (or the end of the data)
+    i = start
+    while i < end:
+        n = _mp3_frame_length(data, i)
+        if n and (i + n >= end or _mp3_frame_length(data, i + n)):
+            break
+        i += 1
+    else:
+        return data
+    frames = bytearray()
+    first = True
+    while i < end:
+        n = _mp3_frame_length(data, i)
+        if not n or i + n > end:
+            break  # trailing junk or a truncated frame
+        frame = data[i:i + n]
+        if not (first and (b"Xing" in frame[4:48] or b"Info" in frame[4:48] or frame[36:40] == b"VBRI")):
+            frames += frame
+        first = False
+        i += n
+    return bytes(frames) or data
+
+def chunked_narration_variant(variants: List[tuple]) -> tuple:
+    """The variant a joined chunked narration is cached under. It depends on the chunking and on every
+    variant a chunk may have come from.
+    """
+    return ("chunked", f"{NARRATION_CHUNK_CHARS}|" + "|".join("/".join(v) for v in variants), variants[0][2])
+
+def narration_cache_variants(text_value: str, variants: List[tuple], chunked: bool = False) -> List[tuple]:
+    """The variants synthesize_narration caches text under: a script of several chunks in chunked mode
+    is cached as one joined file, anything else by the variant that synthesized it.
+    """
+    if chunked and len(narration_chunks(text_value)) > 1:
+        return [chunked_narration_variant(variants)]
+    return variants
+
+def synthesize_chunked(text_value: str, lang: str, variants: List[tuple], progress=None) -> str:
+    """Filename of audio for text synthesized chunk by chunk: chunks go through the provider chain
+    NARRATION_CHUNK_CONCURRENCY at a time, each cached on its own, and their MP3 frames are joined in
+    order. The joined file is cached too. All chunks come from one variant, since providers differ in
+    voice and sample rate: chunks that fell back to another one are synthesized again with the variant
+    most chunks used.
+    """
+    progress = progress or (lambda stage, fraction: None)
+    joined = chunked_narration_variant(variants)
+    fname = tts_cache_lookup(text_value, lang, [joined])
+    if fname is not None:
+        return fname
+    chunks = narration_chunks(text_value)
+    if len(chunks) <= 1:
+        progress("synthesizing", 0.3)
+        return synthesize_cached(text_value, lang, variants)
+
+    done = 0
+    done_lock = threading.Lock()
+
+    def one(chunk: str) -> str:
+        nonlocal done
+        chunk_fname = synthesize_cached(chunk, lang, variants)
+        with done_lock:
+            done += 1
+            progress("synthesizing", 0.3 + 0.6 * done / len(chunks))
+        return chunk_fname
+
+    progress("synthesizing", 0.3)
+    # A chunk that fails everywhere fails the narration; the chunks that finished stay cached for a retry
+    with ThreadPoolExecutor(max_workers=min(NARRATION_CHUNK_CONCURRENCY, len(chunks))) as pool:
+        names = list(pool.map(one, chunks))
+        # A cached chunk's filename tells which variant made it; ties go to the earlier variant
+        used = [next((v for v in variants if tts_filename(c, lang, v) == n), None) for c, n in zip(chunks, names)]
+        counts = Counter(used)
+        voice = max(variants, key=lambda v: (counts[v], -variants.index(v)))
+        redo = [i for i, v in enumerate(used) if v != voice]
+        for i, name in zip(redo, pool.map(lambda i: synthesize_cached(chunks[i], lang, [voice]), redo)):
+            names[i] = name
+    fpath = tts_temp_path()
+    try:
+        with open(fpath, "wb") as out:
+            for name in names:
+                with open(os.path.join(MEDIA_ROOT, name), "rb") as f:
+                    out.write(mp3_audio_frames(f.read()))
+    except BaseException:
+        tts_discard(fpath)
+        raise
+    return tts_cache_store(text_value, lang, joined, fpath)
+
+def synthesize_narration(text_value: str, lang: str, variants: List[tuple], chunked: bool = False, progress=None) -> str:
+    """Filename of cached or newly synthesized audio for text; chunked selects synthesize_chunked."""
+    if chunked:
+        return synthesize_chunked(text_value, lang, variants, progress)
+    if progress:
+        progress("synthesizing", 0.3)
+    return synthesize_cached(text_value, lang, variants)
+
 # ------------------- TTS Narration (no external API keys required) -------------------
 class NarrateIn(BaseModel):
     text: str
     lang: str = "en"  # e.g., 'en', 'hi', 'bn', 'ne'
     title: Optional[str] = "Narration"
+    chunked: bool = False  # synthesize sentence chunks concurrently and join them
 
 @app.post("/ai/narrate")
 async def ai_narrate(payload: NarrateIn):
     """Synthesize speech from text using Edge TTS; fallback to gTTS.
-    Returns { file_url } to the generated MP3 under /media.
+    Returns { file_url } to the generated MP3 under /media. Repeated requests reuse the cached file.
     """
     if not payload.text:
         raise HTTPException(status_code=400, detail="Missing text")
     lang = (payload.lang or "en").lower()
-    fname = f"tts_{lang}_{uuid4().hex}.mp3"
-    fpath = os.path.join(MEDIA_ROOT, fname)
+    voice = _pick_edge_voice_for_lang(lang)
+    variants = [("edge", "edge-tts", voice), ("gtts", "gtts", lang.split('-')[0] or 'en')]
 
-    # Try Edge TTS first (neural voices)
-    try:
-        import edge_tts  # type: ignore
-        voice = _pick_edge_voice_for_lang(lang)
-        communicate = edge_tts.Communicate(payload.text, voice=voice)
-        await communicate.save(fpath)
-    except Exception:
-        # Fallback to gTTS (Google client library that works unauthenticated)
-        try:
-            from gtts import gTTS  # type: ignore
-            tts = gTTS(text=payload.text, lang=(lang.split('-')[0] or 'en'))
-            tts.save(fpath)
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"TTS failed: {e}")
+    fname = await run_in_threadpool(synthesize_narration, payload.text, lang, variants, payload.chunked)
 
     url = f"http://127.0.0.1:8000/media/{fname}"
     return {"file_url": url, "title": payload.title or "Narration", "lang": lang}
 
-def translate_with_openai(text: str, target_lang: str) -> str:
-    """Translate text to target_lang using OpenAI if available; else return original text.
-    Uses gpt-4o-mini via /chat/completions. This keeps dependencies minimal (requests only).
+_background_tasks: set = set()  # strong references; the event loop only keeps weak ones
+
+async def _narration_tee(text_value: str, lang: str, variants: List[tuple], queue: asyncio.Queue) -> None:
+    """Synthesize through tts_engine, handing audio to queue as a streaming provider produces it.
+    The finished file is moved into the narration cache even if nobody is reading the queue any more.
+    Ends the queue with the cached filename, or with the exception if synthesis failed.
     """
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key or not text or not target_lang:
-        return text
+    loop = asyncio.get_running_loop()
+    fpath = tts_temp_path()
     try:
-        resp = requests.post(
-            "https://api.openai.com/v1/chat/completions",
+        used = await outbound.call(tts_engine.synthesize(
+            text_value, variants, fpath, on_audio=lambda data: loop.call_soon_threadsafe(queue.put_nowait, data)
+        ))
+        queue.put_nowait(await run_in_threadpool(tts_cache_store, text_value, lang, used, fpath))
+    except Exception as e:
+        tts_discard(fpath)
+        queue.put_nowait(e)
+
+def _read_audio(fpath: str) -> bytes:
+    with open(fpath, "rb") as f:
+        return f.read()
+
+async def _stream_narration_audio(text_value: str, lang: str, variants: List[tuple]):
+    """MP3 chunks for text, relayed as edge-tts synthesizes them. When the audio comes from a provider
+    that doesn't stream (edge-tts failed before its first chunk), its whole file is sent once cached.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    task = asyncio.create_task(_narration_tee(text_value, lang, variants, queue))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    sent = False
+    while True:
+        item = await queue.get()
+        if isinstance(item, Exception):
+            raise item
+        if isinstance(item, str):
+            if not sent:
+                data = await run_in_threadpool(_read_audio, os.path.join(MEDIA_ROOT, item))
+                for start in range(0, len(data), 64 * 1024):
+                    yield data[start:start + 64 * 1024]
+            return
+        sent = True
+        yield item
+
+def _narration_stream_response(text_value: str, lang: str, voice: str) -> Response:
+    """The cached MP3 for text if there is one, else a chunked stream of it as it is synthesized.
+    Content-Location names the /media file the audio is cached under.
+    """
+    variants = [("edge", "edge-tts", voice), ("gtts", "gtts", lang.split("-")[0] or "en")]
+    fname = tts_cache_lookup(text_value, lang, variants)
+    if fname is not None:
+        return FileResponse(os.path.join(MEDIA_ROOT, fname), media_type="audio/mpeg", headers={"Content-Location": f"/media/{fname}"})
+    return StreamingResponse(
+        _stream_narration_audio(text_value, lang, variants),
+        media_type="audio/mpeg",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+            "Content-Location": f"/media/{tts_filename(text_value, lang, variants[0])}",
+        },
+    )
+
+@app.post("/ai/narrate/stream")
+async def ai_narrate_stream(payload: NarrateIn):
+    """Like /ai/narrate, but sends the MP3 as a chunked audio/mpeg response while edge-tts produces it.
+    The same bytes are written to the narration cache; repeated requests are served from the cached file.
+    """
+    if not payload.text:
+        raise HTTPException(status_code=400, detail="Missing text")
+    lang = (payload.lang or "en").lower()
+    return await run_in_threadpool(_narration_stream_response, payload.text, lang, _pick_edge_voice_for_lang(lang))
+
+# ------------------- Translation -------------------
+TRANSLATION_MODEL = "gpt-4o-mini"
+TRANSLATION_MEMORY_ENTRIES = int(os.getenv("TRANSLATION_MEMORY_ENTRIES", "2048"))
+TRANSLATE_BATCH_SIZE = int(os.getenv("TRANSLATE_BATCH_SIZE", "32"))  # strings per LLM call
+TRANSLATE_BATCH_CHARS = int(os.getenv("TRANSLATE_BATCH_CHARS", "12000"))  # source characters per LLM call
+TRANSLATOR_PROMPT = "You are a helpful translator. Translate the user text faithfully into the requested language without additional commentary."
+TRANSLATOR_BATCH_PROMPT = (
+    "You are a helpful translator. Translate every string in `texts` faithfully into `target_language` "
+    'without additional commentary. Reply with JSON {"translations": [...]}: one string per input, in the same order.'
+)
+
+def translation_key(text_value: str) -> str:
+    return hashlib.sha256(text_value.encode("utf-8")).hexdigest()
+
+class TranslationMemory:
+    """Translations keyed by (source hash, target language): a per-worker LRU in front of the
+    translation_memory table. Keys are exact source strings, so entries never go stale and have no TTL.
+    """
+
+    def __init__(self, memory_entries: int):
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[tuple, str]" = OrderedDict()  # (source hash, lang) -> translation
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.llm_calls = 0
+
+    def _remember(self, mkey: tuple, translation: str) -> None:
+        with self._lock:
+            self._memory[mkey] = translation
+            self._memory.move_to_end(mkey)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def recall(self, texts: List[str], lang: str) -> Dict[str, str]:
+        """Translations of texts held in this worker's memory."""
+        found: Dict[str, str] = {}
+        with self._lock:
+            for t in texts:
+                mkey = (translation_key(t), lang)
+                hit = self._memory.get(mkey)
+                if hit is not None:
+                    self._memory.move_to_end(mkey)
+                    found[t] = hit
+            self.memory_hits += len(found)
+        return found
+
+    def load(self, texts: List[str], lang: str) -> Dict[str, str]:
+        """Translations of texts stored in the table; counts a hit on each row found."""
+        by_key = {translation_key(t): t for t in texts}
+        found: Dict[str, str] = {}
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(TranslationRow.id, TranslationRow.source_hash, TranslationRow.translation)
+                .filter(TranslationRow.target_lang == lang, TranslationRow.source_hash.in_(list(by_key)))
+                .all()
+            )
+            for row in rows:
+                found[by_key[row.source_hash]] = row.translation
+                self._remember((row.source_hash, lang), row.translation)
+            if rows:
+                db.query(TranslationRow).filter(TranslationRow.id.in_([r.id for r in rows])).update(
+                    {"hits": func.coalesce(TranslationRow.hits, 0) + 1}, synchronize_session=False
+                )
+                db.commit()
+        finally:
+            db.close()
+        with self._lock:
+            self.db_hits += len(found)
+            self.misses += len(texts) - len(found)
+        return found
+
+    def store(self, lang: str, translations: Dict[str, str]) -> None:
+        now = _utcnow_iso()
+        keyed = {translation_key(t): (t, out) for t, out in translations.items()}
+        for key, (_, out) in keyed.items():
+            self._remember((key, lang), out)
+        db = SessionLocal()
+        try:
+            # Another worker may have stored the same strings meanwhile; the newer translation wins
+            db.query(TranslationRow).filter(
+                TranslationRow.target_lang == lang, TranslationRow.source_hash.in_(list(keyed))
+            ).delete(synchronize_session=False)
+            db.add_all([
+                TranslationRow(source_hash=key, target_lang=lang, source_text=t, translation=out,
+                               model=TRANSLATION_MODEL, created_at=now, hits=0)
+                for key, (t, out) in keyed.items()
+            ])
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"translation memory write failed: {type(e).__name__}: {e}")
+        finally:
+            db.close()
+
+    def count_llm_call(self) -> None:
+        with self._lock:
+            self.llm_calls += 1
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.memory_hits + self.db_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "hit_rate": ((self.memory_hits + self.db_hits) / lookups) if lookups else 0.0,
+                "llm_calls": self.llm_calls,
+                "memory_entries": len(self._memory),
+            }
+
+translation_memory = TranslationMemory(TRANSLATION_MEMORY_ENTRIES)
+
+def _translation_batches(texts: List[str]) -> List[List[str]]:
+    """Group texts into LLM calls bounded by TRANSLATE_BATCH_SIZE strings and TRANSLATE_BATCH_CHARS."""
+    batches: List[List[str]] = []
+    current: List[str] = []
+    chars = 0
+    for t in texts:
+        if current and (len(current) >= TRANSLATE_BATCH_SIZE or chars + len(t) > TRANSLATE_BATCH_CHARS):
+            batches.append(current)
+            current, chars = [], 0
+        current.append(t)
+        chars += len(t)
+    if current:
+        batches.append(current)
+    return batches
+
+async def _translation_chat(messages: List[Dict], **options) -> Optional[str]:
+    """Content of one chat completion from the translation model, or None if the call failed."""
+    translation_memory.count_llm_call()
+    try:
+        resp = await outbound.request(
+            "POST",
+            f"{OPENAI_BASE_URL}/chat/completions",
             headers={
-                "Authorization": f"Bearer {api_key}",
+                "Authorization": f"Bearer {os.getenv('OPENAI_API_KEY')}",
                 "Content-Type": "application/json",
             },
-            json={
-                "model": "gpt-4o-mini",
-                "messages": [
-                    {"role": "system", "content": "You are a helpful translator. Translate the user text faithfully into the requested language without additional commentary."},
-                    {"role": "user", "content": f"Target language: {target_lang}.\nText: {text}"},
-                ],
-                "temperature": 0.2,
-            },
+            json={"model": TRANSLATION_MODEL, "messages": messages, "temperature": 0.2, **options},
             timeout=60,
         )
         if resp.status_code != 200:
-            return text
-        data = resp.json()
-        return data.get("choices", [{}])[0].get("message", {}).get("content", text) or text
+            return None
+        return resp.json().get("choices", [{}])[0].get("message", {}).get("content") or None
     except Exception:
-        return text
+        return None
 
-def _openai_embed(texts: List[str]) -> Optional[List[List[float]]]:
+async def _openai_translate(texts: List[str], target_lang: str) -> Dict[str, str]:
+    """Translate texts with one LLM call per batch. Returns only the strings that were translated."""
+    async def one(text_value: str) -> Dict[str, str]:
+        out = await _translation_chat([
+            {"role": "system", "content": TRANSLATOR_PROMPT},
+            {"role": "user", "content": f"Target language: {target_lang}.\nText: {text_value}"},
+        ])
+        return {text_value: out} if out else {}
+
+    async def batch(group: List[str]) -> Dict[str, str]:
+        if len(group) == 1:
+            return await one(group[0])
+        out = await _translation_chat(
+            [
+                {"role": "system", "content": TRANSLATOR_BATCH_PROMPT},
+                {"role": "user", "content": json.dumps({"target_language": target_lang, "texts": group}, ensure_ascii=False)},
+            ],
+            response_format={"type": "json_object"},
+        )
+        try:
+            translations = json.loads(out or "").get("translations")
+        except Exception:
+            translations = None
+        if isinstance(translations, list) and len(translations) == len(group) and all(isinstance(t, str) and t for t in translations):
+            return dict(zip(group, translations))
+        # A malformed batch reply is retried string by string
+        merged: Dict[str, str] = {}
+        for part in await asyncio.gather(*(one(t) for t in group)):
+            merged.update(part)
+        return merged
+
+    done: Dict[str, str] = {}
+    for part in await asyncio.gather(*(batch(group) for group in _translation_batches(texts))):
+        done.update(part)
+    return done
+
+async def translate_many_async(texts: List[str], target_lang: str) -> List[str]:
+    """Translate texts into target_lang, one output per input. Strings come from the translation
+    memory where possible; the rest go to OpenAI in as few calls as the batch limits allow. Strings
+    that can't be translated (no OPENAI_API_KEY, provider errors) are returned unchanged.
+    """
+    if not os.getenv("OPENAI_API_KEY") or not target_lang:
+        return list(texts)
+    pending = list(dict.fromkeys(t for t in texts if t and t.strip()))
+    done = translation_memory.recall(pending, target_lang)
+    pending = [t for t in pending if t not in done]
+    if pending:
+        done.update(await run_in_threadpool(translation_memory.load, pending, target_lang))
+        pending = [t for t in pending if t not in done]
+    if pending:
+        fresh = await _openai_translate(pending, target_lang)
+        if fresh:
+            await run_in_threadpool(translation_memory.store, target_lang, fresh)
+            done.update(fresh)
+    return [done.get(t, t) for t in texts]
+
+def translate_many(texts: List[str], target_lang: str) -> List[str]:
+    """Blocking translate_many_async, for sync endpoints."""
+    if not os.getenv("OPENAI_API_KEY") or not target_lang:
+        return list(texts)
+    return outbound.run(translate_many_async(texts, target_lang))
+
+async def translate_with_openai_async(text: str, target_lang: str) -> str:
+    """Translate text to target_lang using OpenAI if available; else return original text."""
+    return (await translate_many_async([text], target_lang))[0]
+
+def translate_with_openai(text: str, target_lang: str) -> str:
+    """Blocking translate_with_openai_async, for sync endpoints."""
+    return translate_many([text], target_lang)[0]
+
+# ------------------- Embeddings -------------------
+EMBEDDING_MODEL = "text-embedding-3-small"
+# EMBEDDER: 'openai' (default; needs OPENAI_API_KEY), 'hashing' (offline, deterministic) or 'none'
+EMBEDDER = os.getenv("EMBEDDER", "openai").lower()
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "256"))  # inputs per request
+EMBED_BATCH_TOKENS = int(os.getenv("EMBED_BATCH_TOKENS", "100000"))  # approx tokens per request
+EMBED_MAX_INPUT_CHARS = int(os.getenv("EMBED_MAX_INPUT_CHARS", "24000"))  # keeps each input under the model limit
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "4"))
+HASHING_EMBED_DIM = int(os.getenv("HASHING_EMBED_DIM", "512"))
+
+def embedder_signature() -> str:
+    """Identifies the active embedder; stored vectors are only comparable within one signature."""
+    if EMBEDDER == "hashing":
+        return f"hashing-{HASHING_EMBED_DIM}"
+    return EMBEDDING_MODEL
+
+def embed_texts(texts: List[str]) -> Optional[List[List[float]]]:
+    """Embed texts with the configured embedder. Returns one vector per text ([] where that text
+    failed), or None when no embedder is available.
+    """
+    if EMBEDDER == "hashing":
+        return [_hashing_embed(t) for t in texts]
+    if EMBEDDER == "none":
+        return None
+    return _openai_embed(texts)
+
+def _hashing_embed(text_value: str, dim: Optional[int] = None) -> List[float]:
+    """Hashing-trick bag of words + bigrams, log-scaled and L2-normalised. Deterministic across
+    processes (blake2b, not hash()), so it needs no network and no fitted vocabulary.
+    """
+    dim = dim or HASHING_EMBED_DIM
+    tokens = tokenize(text_value)
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    vec = [0.0] * dim
+    for feature, count in Counter(features).items():
+        h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+        vec[h % dim] += (1.0 + math.log(count)) * (1.0 if (h >> 63) & 1 else -1.0)
+    norm = math.sqrt(sum(x * x for x in vec))
+    return [x / norm for x in vec] if norm else vec
+
+def _embedding_batches(texts: List[str]) -> List[List[int]]:
+    """Group text indices into requests bounded by EMBED_BATCH_SIZE inputs and EMBED_BATCH_TOKENS."""
+    batches: List[List[int]] = []
+    current: List[int] = []
+    tokens = 0
+    for i, t in enumerate(texts):
+        cost = len(t) // 4 + 1  # rough token estimate
+        if current and (len(current) >= EMBED_BATCH_SIZE or tokens + cost > EMBED_BATCH_TOKENS):
+            batches.append(current)
+            current, tokens = [], 0
+        current.append(i)
+        tokens += cost
+    if current:
+        batches.append(current)
+    return batches
+
+async def _post_with_retry(url: str, headers: Dict, payload: Dict, timeout: int = 60, retries: Optional[int] = None):
+    """POST with exponential backoff (plus jitter, honouring Retry-After) on 429/5xx and network errors.
+    Returns the last response, or None if every attempt raised.
+    """
+    retries = EMBED_MAX_RETRIES if retries is None else retries
+    resp = None
+    for attempt in range(retries):
+        delay = min(30.0, 0.5 * (2 ** attempt)) * (0.5 + random.random())
+        try:
+            resp = await outbound.request("POST", url, headers=headers, json=payload, timeout=timeout)
+            if resp.status_code not in (429, 500, 502, 503, 504):
+                return resp
+            try:
+                delay = max(delay, float(resp.headers.get("Retry-After") or 0))
+            except ValueError:
+                pass
+        except httpx.HTTPError as e:
+            print(f"POST {url} failed (attempt {attempt + 1}/{retries}): {type(e).__name__}: {e}")
+        if attempt + 1 < retries:
+            await asyncio.sleep(delay)
+    return resp
+
+async def _openai_embed_async(texts: List[str]) -> Optional[List[List[float]]]:
+    """Embed texts via OpenAI in size/token-bounded batches, sent concurrently with retries.
+    A batch that still fails leaves [] for its texts instead of discarding the whole call.
+    """
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         return None
-    try:
-        resp = requests.post(
-            "https://api.openai.com/v1/embeddings",
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-            },
-            json={
-                "model": "text-embedding-3-small",
-                "input": texts,
-            },
-            timeout=60,
-        )
-        if resp.status_code != 200:
-            return None
-        data = resp.json()
-        return [item.get("embedding", []) for item in data.get("data", [])]
-    except Exception:
+    inputs = [t[:EMBED_MAX_INPUT_CHARS] or " " for t in texts]
+    out: List[List[float]] = [[] for _ in inputs]
+    in_flight = asyncio.Semaphore(max(1, EMBED_CONCURRENCY))
+
+    async def run(batch: List[int]) -> None:
+        async with in_flight:
+            resp = await _post_with_retry(
+                f"{OPENAI_BASE_URL}/embeddings",
+                headers={
+                    "Authorization": f"Bearer {api_key}",
+                    "Content-Type": "application/json",
+                },
+                payload={
+                    "model": EMBEDDING_MODEL,
+                    "input": [inputs[i] for i in batch],
+                },
+            )
+        if resp is None or resp.status_code != 200:
+            print(f"embedding batch of {len(batch)} failed: {getattr(resp, 'status_code', 'no response')}")
+            return
+        try:
+            for pos, item in enumerate(resp.json().get("data", [])):
+                out[batch[item.get("index", pos)]] = item.get("embedding", [])
+        except Exception as e:
+            print(f"embedding batch of {len(batch)} returned bad data: {e}")
+
+    await asyncio.gather(*(run(batch) for batch in _embedding_batches(inputs)))
+    return out
+
+def _openai_embed(texts: List[str]) -> Optional[List[List[float]]]:
+    if not os.getenv("OPENAI_API_KEY"):
         return None
+    return outbound.run(_openai_embed_async(texts))
 
 def _cosine(a: List[float], b: List[float]) -> float:
     if not a or not b or len(a) != len(b):
@@ -1600,13 +4024,6 @@ def _cosine(a: List[float], b: List[float]) -> float:
         return 0.0
     return dot / (na * nb)
 
-def _tf_score(query: str, text: str) -> float:
-    if not query or not text:
-        return 0.0
-    q = query.lower().split()
-    t = text.lower()
-    return sum(t.count(term) for term in q)
-
 # ------------------- CRUD APIs -------------------
 
 @app.get("/health")
@@ -1692,33 +4109,88 @@ def dashboard():
     """
     return HTMLResponse(content=html)
 
-@app.get("/monasteries", response_model=List[Dict])
-def get_monasteries():
+CATALOG_STREAM_BATCH = 200
+
+def stream_catalog_ndjson(after: Optional[int], limit: Optional[int], wanted: Optional[set], columns, children):
+    """Yield one serialized monastery per line, walking the catalog in id-keyset batches.
+    Uses its own session (the response outlives the endpoint) and drops each batch from the
+    identity map once written, so memory stays flat regardless of catalog size.
+    """
     db = SessionLocal()
     try:
-        monasteries = db.query(Monastery).all()
-        safe_list = []
-        for m in monasteries:
-            try:
-                safe_list.append(serialize_monastery(m))
-            except Exception as e:
-                # Log and skip problematic rows to avoid 500 on list
+        sent = 0
+        while limit is None or sent < limit:
+            batch_size = CATALOG_STREAM_BATCH if limit is None else min(CATALOG_STREAM_BATCH, limit - sent)
+            batch = load_catalog(db, limit=batch_size, after=after, columns=columns, children=children)
+            if not batch:
+                break
+            lines = []
+            for m in batch:
                 try:
+                    lines.append(json.dumps(serialize_monastery(m, wanted), ensure_ascii=False, separators=(",", ":")))
+                except Exception as e:
                     print(f"serialize_monastery error for id={getattr(m, 'id', None)}: {type(e).__name__}: {e}")
-                except Exception:
-                    pass
-        return safe_list
+            after = batch[-1].id
+            sent += len(batch)
+            db.expunge_all()
+            if lines:
+                yield ("\n".join(lines) + "\n").encode("utf-8")
+            if len(batch) < batch_size:
+                break
+    finally:
+        db.close()
+
+@app.get("/monasteries", response_model=List[Dict])
+def get_monasteries(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    after: Optional[int] = None,
+    fields: Optional[str] = None,
+    stream: bool = False,
+):
+    """List monasteries in id order, with optional limit/after cursor pagination and a
+    comma-separated fields= projection (see DETAIL_FIELDS).
+    With Accept: application/x-ndjson or ?stream=1 the catalog is streamed as NDJSON, one
+    monastery per line, instead of being built as a single JSON array.
+    """
+    wanted = parse_catalog_fields(fields, DETAIL_FIELDS)
+    columns, children = catalog_load_plan(wanted, DETAIL_FIELDS)
+    if stream or "application/x-ndjson" in (request.headers.get("accept") or ""):
+        return StreamingResponse(
+            stream_catalog_ndjson(after, limit, wanted, columns, children),
+            media_type="application/x-ndjson",
+        )
+
+    db = SessionLocal()
+    try:
+
+        def build():
+            monasteries = load_catalog(db, limit=limit, after=after, columns=columns, children=children)
+            safe_list = []
+            for m in monasteries:
+                try:
+                    safe_list.append(serialize_monastery(m, wanted))
+                except Exception as e:
+                    # Log and skip problematic rows to avoid 500 on list
+                    try:
+                        print(f"serialize_monastery error for id={getattr(m, 'id', None)}: {type(e).__name__}: {e}")
+                    except Exception:
+                        pass
+            return safe_list, catalog_page_headers(request, monasteries, limit)
+        return cached_catalog_response(request, db, build)
     finally:
         db.close()
 
 @app.get("/monasteries/{id}", response_model=Dict)
-def get_monastery(id: int):
+def get_monastery(id: int, request: Request):
     db = SessionLocal()
     try:
-        monastery = db.query(Monastery).filter(Monastery.id == id).first()
-        if not monastery:
-            raise HTTPException(status_code=404, detail="Monastery not found")
-        return serialize_monastery(monastery)
+        def build():
+            monastery = db.query(Monastery).filter(Monastery.id == id).first()
+            if not monastery:
+                raise HTTPException(status_code=404, detail="Monastery not found")
+            return serialize_monastery(monastery)
+        return cached_catalog_response(request, db, build)
     finally:
         db.close()
 
@@ -1728,6 +4200,7 @@ def add_monastery(monastery: MonasteryIn):
     try:
         new_monastery = Monastery(**monastery.dict())
         db.add(new_monastery)
+        bump_catalog_version(db)
         db.commit()
         db.refresh(new_monastery)
         return serialize_monastery(new_monastery)
@@ -1747,6 +4220,7 @@ def upsert_monastery_info(monastery_id: int, payload: MonasteryInfoIn):
             db.add(info)
         for field, value in payload.dict().items():
             setattr(info, field, value)
+        bump_catalog_version(db)
         db.commit()
         db.refresh(info)
         return serialize_monastery(monastery)
@@ -1771,6 +4245,7 @@ def add_event(monastery_id: int, payload: EventIn):
             max_participants=payload.max_participants,
         )
         db.add(ev)
+        bump_catalog_version(db)
         db.commit()
         return serialize_monastery(monastery)
     finally:
@@ -1793,6 +4268,7 @@ def add_archive(monastery_id: int, payload: ArchiveItemIn):
             digitalized_date=payload.digitalized_date,
         )
         db.add(ar)
+        bump_catalog_version(db)
         db.commit()
         return serialize_monastery(monastery)
     finally:
@@ -1813,17 +4289,498 @@ def add_audio_highlight(monastery_id: int, payload: AudioHighlightIn):
             location=payload.location,
         )
         db.add(hl)
+        bump_catalog_version(db)
         db.commit()
         return serialize_monastery(monastery)
     finally:
         db.close()
 
+# ------------------- Media blob store -------------------
+# Uploaded, imported and seeded media are stored once per content hash: MEDIA_ROOT/blobs/ab/cd/<sha256><ext>.
+# Media.file_path holds the blob name (<sha256><ext>), so /media/<blob name> URLs work like any other file.
+# media_blobs counts the Media rows referencing each blob; a blob is deleted when its count drops to zero.
+# Narration audio stays in the TTS cache (tts_*.mp3), which is keyed by text rather than bytes.
+BLOB_ROOT = os.path.join(MEDIA_ROOT, "blobs")
+_BLOB_NAME_RE = re.compile(r"^([0-9a-f]{64})(\.[a-z0-9]{1,8})?$")
+_BLOB_EXT_RE = re.compile(r"^\.[a-z0-9]{1,8}$")
+
+def blob_extension(ext: Optional[str]) -> str:
+    """ext lower-cased if a blob name can carry it (.jpg, .mp3, ...), else "" (e.g. .jpg_large, .tif-1)."""
+    ext = (ext or "").lower()
+    return ext if _BLOB_EXT_RE.match(ext) else ""
+
+class BlobStore:
+    """Content-addressed files with reference counts in the media_blobs table.
+
+    put_file()/put_bytes() commit their reference before touching the file, so a collect() in another
+    process either sees it or has already removed the file, which put_file() then stores again. A caller
+    that fails after put_file() leaves the blob referenced; it is kept rather than lost.
+    acquire() adds a reference in the caller's session and release() drops one; the caller commits, then
+    passes released names to collect(), which deletes blobs left unreferenced.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()  # orders file placement against collect() in this process
+
+    @staticmethod
+    def is_blob(name: Optional[str]) -> bool:
+        return bool(name) and _BLOB_NAME_RE.match(os.path.basename(name)) is not None
+
+    def path(self, name: str) -> str:
+        name = os.path.basename(name)
+        return os.path.join(self.root, name[:2], name[2:4], name)
+
+    def _reference(self, db, sha256: str, name: str, size: int) -> None:
+        db.execute(sqlite_insert(MediaBlob).values(
+            sha256=sha256, filename=name, size_bytes=size, refcount=0, created_at=_utcnow_iso()
+        ).on_conflict_do_nothing(index_elements=["sha256"]))
+        db.query(MediaBlob).filter(MediaBlob.sha256 == sha256).update(
+            {"refcount": func.coalesce(MediaBlob.refcount, 0) + 1}, synchronize_session=False
+        )
+
+    def put_file(self, db, src_path: str, ext: str, sha256: Optional[str] = None, move: bool = True) -> str:
+        """Store a file (moved, or copied if move=False) and reference it. Returns the blob name.
+        If the content is already stored, the new file is simply dropped.
+        """
+        sha256 = sha256 or file_sha256(src_path)
+        with self._lock:
+            row = db.query(MediaBlob.filename).filter(MediaBlob.sha256 == sha256).first()
+            name = row.filename if row else f"{sha256}{blob_extension(ext)}"
+            self._reference(db, sha256, name, os.path.getsize(src_path))
+            db.commit()
+            dest = self.path(name)
+            if os.path.exists(dest):
+                if move:
+                    os.remove(src_path)
+                self.touch(name)
+            else:
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                if move:
+                    os.replace(src_path, dest)
+                else:
+                    tmp = f"{dest}.{uuid4().hex}.part"
+                    shutil.copyfile(src_path, tmp)
+                    os.replace(tmp, dest)
+        return name  # indexed for /media on first request; the name already carries the hash
+
+    def put_bytes(self, db, data: bytes, ext: str) -> str:
+        tmp = os.path.join(MEDIA_ROOT, f".blob_{uuid4().hex}.part")
+        with open(tmp, "wb") as f:
+            f.write(data)
+        return self.put_file(db, tmp, ext, hashlib.sha256(data).hexdigest())
+
+    def touch(self, name: str) -> None:
+        """Mark a blob as just used, so the media collector's grace period covers an uncommitted reference."""
+        try:
+            os.utime(self.path(name))
+        except OSError:
+            pass
+
+    def acquire(self, db, name: str) -> bool:
+        """Reference an existing blob again (another Media row for the same file)."""
+        m = _BLOB_NAME_RE.match(os.path.basename(name or ""))
+        if not m:
+            return False
+        self.touch(name)
+        return bool(db.query(MediaBlob).filter(MediaBlob.sha256 == m.group(1)).update(
+            {"refcount": func.coalesce(MediaBlob.refcount, 0) + 1}, synchronize_session=False
+        ))
+
+    def release_all(self, db) -> List[str]:
+        """Drop every reference, for callers that delete all Media rows. Returns the blob names."""
+        names = [row.filename for row in db.query(MediaBlob.filename).all()]
+        db.query(MediaBlob).update({"refcount": 0}, synchronize_session=False)
+        return names
+
+    def release(self, db, name: str) -> None:
+        m = _BLOB_NAME_RE.match(os.path.basename(name or ""))
+        if m:
+            db.query(MediaBlob).filter(MediaBlob.sha256 == m.group(1), MediaBlob.refcount > 0).update(
+                {"refcount": MediaBlob.refcount - 1}, synchronize_session=False
+            )
+
+    def collect(self, names: List[str]) -> int:
+        """Delete those of the named blobs that no longer have references. Returns bytes freed."""
+        shas = [m.group(1) for m in (_BLOB_NAME_RE.match(os.path.basename(n or "")) for n in names) if m]
+        if not shas:
+            return 0
+        freed = 0
+        db = SessionLocal()
+        try:
+            with self._lock:
+                unreferenced = db.query(MediaBlob.id, MediaBlob.filename, MediaBlob.size_bytes).filter(
+                    MediaBlob.sha256.in_(shas), MediaBlob.refcount <= 0
+                ).all()
+                for blob_id, name, size in unreferenced:
+                    deleted = db.query(MediaBlob).filter(MediaBlob.id == blob_id, MediaBlob.refcount <= 0).delete(synchronize_session=False)
+                    db.commit()
+                    if not deleted or not self._remove_unreferenced(db, name):
+                        continue  # referenced again meanwhile
+                    freed += size or 0
+                    media_index.forget(name)
+        finally:
+            db.close()
+        return freed
+
+    def _remove_unreferenced(self, db, name: str) -> bool:
+        """Remove the file of a blob whose row was just deleted, unless put_file() (perhaps in another
+        process) has referenced it again since. The file is set aside before the check, so a put_file()
+        committing after the check finds it missing and stores it anew.
+        """
+        path = self.path(name)
+        aside = f"{path}.{uuid4().hex}.gone"
+        try:
+            os.replace(path, aside)
+        except OSError:
+            return False
+        if db.query(MediaBlob.id).filter(MediaBlob.filename == name).first() is not None:
+            os.replace(aside, path)  # same bytes as any copy put_file() placed meanwhile
+            return False
+        os.remove(aside)
+        return True
+
+blob_store = BlobStore(BLOB_ROOT)
+
+def media_file_path(filename: str) -> str:
+    """Where a /media filename lives on disk: the blob store for blob names, else MEDIA_ROOT."""
+    return blob_store.path(filename) if blob_store.is_blob(filename) else os.path.join(MEDIA_ROOT, filename)
+
+def delete_media_files(db, medias: List["Media"]) -> List[str]:
+    """Delete Media rows, releasing their blobs. Files outside the blob store are removed directly.
+    Returns the released blob names; pass them to blob_store.collect() after committing.
+    """
+    released: List[str] = []
+    for md in medias:
+        if blob_store.is_blob(md.file_path):
+            blob_store.release(db, md.file_path)
+            released.append(md.file_path)
+        else:
+            try:
+                if md.file_path:
+                    fp = os.path.join(MEDIA_ROOT, md.file_path)
+                    if os.path.isfile(fp):
+                        os.remove(fp)
+            except Exception:
+                pass
+        db.delete(md)
+    return released
+
+@app.post("/admin/media/dedupe")
+def admin_media_dedupe(limit: int = 500):
+    """Move up to `limit` legacy media files (stored under their own names) into the blob store.
+    Rows sharing a file share its blob; repeat until `remaining` is 0. Rows whose file is gone are
+    reported as `missing` and left as they are. Narration audio is left alone.
+    """
+    db = SessionLocal()
+    try:
+        legacy: Dict[str, List[Media]] = {}
+        for md in db.query(Media).filter(Media.file_path.isnot(None)).all():
+            base = os.path.basename(md.file_path)
+            if base and not blob_store.is_blob(base) and not base.startswith("tts_"):
+                legacy.setdefault(base, []).append(md)
+        stored = missing = saved = 0
+        for base in legacy:
+            if stored >= limit:
+                break
+            src = os.path.join(MEDIA_ROOT, base)
+            if not os.path.isfile(src):
+                missing += 1
+                continue
+            sha256 = file_sha256(src)
+            if db.query(MediaBlob.id).filter(MediaBlob.sha256 == sha256).first() is not None:
+                saved += os.path.getsize(src)
+            rows = legacy[base]
+            name = blob_store.put_file(db, src, os.path.splitext(base)[1], sha256, move=False)
+            for md in rows[1:]:
+                blob_store.acquire(db, name)
+            for md in rows:
+                md.file_path = name
+            bump_catalog_version(db)
+            db.commit()
+            os.remove(src)
+            media_index.forget(base)
+            stored += 1
+        return {"files": stored, "deduplicated_bytes": saved, "missing": missing,
+                "remaining": max(len(legacy) - stored - missing, 0)}
+    finally:
+        db.close()
+
+# ------------------- Uploads -------------------
+# Uploaded files are copied to disk in UPLOAD_CHUNK_BYTES pieces off the event loop and hashed as they
+# are written. Large files (panoramas) can instead go through a resumable upload session: create it with
+# POST /uploads, PUT the bytes in any number of requests, then pass its upload_id to the media or panorama
+# endpoint in place of a file.
+MEDIA_MAX_UPLOAD_BYTES = int(os.getenv("MEDIA_MAX_UPLOAD_BYTES", str(100 * 1024 * 1024)))
+PANORAMA_MAX_UPLOAD_BYTES = int(os.getenv("PANORAMA_MAX_UPLOAD_BYTES", str(512 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+UPLOAD_EXPIRE_HOURS = int(os.getenv("UPLOAD_EXPIRE_HOURS", "24"))  # unfinished sessions are dropped after this
+UPLOAD_LEASE_SECONDS = 120  # a PUT that stopped updating its session this long ago lost its worker
+UPLOAD_HASHERS_MAX = 256  # running hashes kept per worker; a dropped one means hashing the file at the end
+UPLOAD_LIMITS = {"media": MEDIA_MAX_UPLOAD_BYTES, "panorama": PANORAMA_MAX_UPLOAD_BYTES}
+# Multipart endpoints whose Content-Length is checked before the body is read (form overhead allowed)
+_UPLOAD_ROUTES = [
+    (re.compile(r"^/monasteries/\d+/media$"), MEDIA_MAX_UPLOAD_BYTES),
+    (re.compile(r"^/admin/monasteries/\d+/panorama$"), PANORAMA_MAX_UPLOAD_BYTES),
+]
+
+class UploadSizeLimit:
+    """Pure ASGI middleware: a 413 for uploads whose Content-Length is already over their route's limit,
+    sent before the body is read. Every other request (and every response) passes through untouched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "POST":
+            for pattern, limit in _UPLOAD_ROUTES:
+                if pattern.match(scope["path"]):
+                    length = next((v for k, v in scope["headers"] if k == b"content-length"), b"")
+                    if length.isdigit() and int(length) > limit + 64 * 1024:
+                        response = JSONResponse({"detail": f"Upload exceeds the {limit} byte limit"}, status_code=413)
+                        await response(scope, receive, send)
+                        return
+                    break
+        await self.app(scope, receive, send)
+
+app.add_middleware(UploadSizeLimit)
+
+def copy_upload(src, dest_path: str, max_bytes: int) -> tuple:
+    """Copy a file object to dest_path in UPLOAD_CHUNK_BYTES pieces. Returns (size, sha256).
+    Raises 413 (and removes dest_path) once more than max_bytes have been read.
+    """
+    h = hashlib.sha256()
+    size = 0
+    try:
+        with open(dest_path, "wb") as out:
+            for block in iter(lambda: src.read(UPLOAD_CHUNK_BYTES), b""):
+                size += len(block)
+                if size > max_bytes:
+                    raise HTTPException(status_code=413, detail=f"Upload exceeds the {max_bytes} byte limit")
+                h.update(block)
+                out.write(block)
+    except BaseException:
+        try:
+            os.remove(dest_path)
+        except OSError:
+            pass
+        raise
+    return size, h.hexdigest()
+
+def _upload_part_path(upload_id: str) -> str:
+    return os.path.join(MEDIA_ROOT, f".upload_{upload_id}.part")
+
+def upload_temp_path() -> str:
+    """Scratch file for an upload on its way into the blob store."""
+    return os.path.join(MEDIA_ROOT, f".upload_{uuid4().hex}.part")
+
+# upload id -> (bytes hashed, sha256 object, time.monotonic() of the last PUT), while PUTs arrive in order
+# here; least recently used first
+_upload_hashers: Dict[str, tuple] = {}
+
+def _keep_upload_hasher(upload_id: str, hashed: int, h) -> None:
+    """Keep an upload's running hash for its next PUT. Hashes of sessions idle past UPLOAD_EXPIRE_HOURS
+    (abandoned, or expired by another worker) and the oldest beyond UPLOAD_HASHERS_MAX are dropped.
+    """
+    now = time.monotonic()
+    _upload_hashers.pop(upload_id, None)  # re-inserted last
+    _upload_hashers[upload_id] = (hashed, h, now)
+    cutoff = now - UPLOAD_EXPIRE_HOURS * 3600
+    for key, (_, _, used) in list(_upload_hashers.items()):
+        if len(_upload_hashers) <= UPLOAD_HASHERS_MAX and used >= cutoff:
+            break
+        _upload_hashers.pop(key, None)
+
+class UploadIn(BaseModel):
+    filename: str
+    size: int
+    kind: str = "media"  # media | panorama; selects the size limit
+    sha256: Optional[str] = None  # verified when the last byte arrives
+
+def _upload_out(row: "Upload") -> Dict:
+    return {
+        "upload_id": row.id,
+        "filename": row.filename,
+        "kind": row.kind,
+        "size": row.size_bytes,
+        "offset": row.received_bytes,
+        "status": row.status,
+        "sha256": row.content_sha256,
+    }
+
+def _expire_uploads(db) -> None:
+    cutoff = _utcnow_iso(-UPLOAD_EXPIRE_HOURS * 3600)
+    for row in db.query(Upload).filter(Upload.updated_at < cutoff).limit(50).all():
+        tts_discard(_upload_part_path(row.id))
+        _upload_hashers.pop(row.id, None)
+        db.delete(row)
+    db.commit()
+
+@app.post("/uploads", status_code=201)
+def create_upload(payload: UploadIn):
+    """Start a resumable upload; PUT /uploads/{id} sends the bytes."""
+    limit = UPLOAD_LIMITS.get(payload.kind)
+    if limit is None:
+        raise HTTPException(status_code=400, detail=f"kind must be one of {sorted(UPLOAD_LIMITS)}")
+    if payload.size < 0 or payload.size > limit:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds the {limit} byte limit")
+    db = SessionLocal()
+    try:
+        _expire_uploads(db)
+        now = _utcnow_iso()
+        row = Upload(id=uuid4().hex, filename=os.path.basename(payload.filename), kind=payload.kind, size_bytes=payload.size,
+                     received_bytes=0, sha256=(payload.sha256 or "").lower() or None, status="receiving", created_at=now, updated_at=now)
+        db.add(row)
+        db.commit()
+        open(_upload_part_path(row.id), "wb").close()
+        out = _upload_out(row)
+        out["chunk_size"] = UPLOAD_CHUNK_BYTES
+        return out
+    finally:
+        db.close()
+
+@app.get("/uploads/{upload_id}")
+def get_upload(upload_id: str):
+    """Upload status; `offset` is where the next PUT must start."""
+    db = SessionLocal()
+    try:
+        row = db.query(Upload).filter(Upload.id == upload_id).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="Upload not found")
+        return _upload_out(row)
+    finally:
+        db.close()
+
+def _claim_upload(upload_id: str, offset: int) -> "Upload":
+    """Mark the upload as being written from offset, or raise 404/409 with its current offset."""
+    db = SessionLocal()
+    try:
+        lease_cutoff = _utcnow_iso(-UPLOAD_LEASE_SECONDS)
+        claimed = db.query(Upload).filter(
+            Upload.id == upload_id,
+            Upload.received_bytes == offset,
+            or_(Upload.status == "receiving", and_(Upload.status == "writing", Upload.updated_at < lease_cutoff)),
+        ).update({"status": "writing", "updated_at": _utcnow_iso()}, synchronize_session=False)
+        db.commit()
+        row = db.query(Upload).filter(Upload.id == upload_id).first()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Upload not found")
+        if not claimed:
+            raise HTTPException(status_code=409, detail={"message": "Upload is not accepting data at this offset", **_upload_out(row)})
+        db.expunge(row)
+        return row
+    finally:
+        db.close()
+
+def _write_at(path: str, offset: int, data: bytes) -> None:
+    with open(path, "r+b") as f:
+        f.seek(offset)
+        f.write(data)
+        f.truncate()  # drop bytes past this point left by an earlier interrupted PUT
+
+def _finish_upload_write(upload_id: str, received: int) -> Dict:
+    """Record received bytes after a PUT; on the last byte, hash, verify and complete the upload."""
+    db = SessionLocal()
+    try:
+        row = db.query(Upload).filter(Upload.id == upload_id).first()
+        row.received_bytes = received
+        row.status = "receiving"
+        row.updated_at = _utcnow_iso()
+        if received == row.size_bytes:
+            hashed, h, _ = _upload_hashers.pop(upload_id, (None, None, None))
+            digest = h.hexdigest() if hashed == received else file_sha256(_upload_part_path(upload_id))
+            if row.sha256 and digest != row.sha256:
+                # Corrupted somewhere along the way; start over rather than keep bad bytes
+                row.received_bytes = 0
+                db.commit()
+                open(_upload_part_path(upload_id), "wb").close()
+                raise HTTPException(status_code=422, detail={"message": "SHA-256 mismatch; upload restarted", "sha256": digest})
+            row.content_sha256 = digest
+            row.status = "complete"
+        db.commit()
+        return _upload_out(row)
+    finally:
+        db.close()
+
+@app.put("/uploads/{upload_id}")
+async def put_upload(upload_id: str, request: Request):
+    """Append the request body to an upload at the `Upload-Offset` header (which must equal its offset).
+    A PUT cut short still keeps the bytes that arrived; GET the upload for the offset to resume from.
+    """
+    offset_header = request.headers.get("upload-offset", "")
+    if not offset_header.isdigit():
+        raise HTTPException(status_code=400, detail="Upload-Offset header required")
+    offset = int(offset_header)
+    row = await run_in_threadpool(_claim_upload, upload_id, offset)
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and offset + int(length) > row.size_bytes:
+        await run_in_threadpool(_finish_upload_write, upload_id, offset)
+        raise HTTPException(status_code=413, detail="Body runs past the declared upload size")
+
+    path = _upload_part_path(upload_id)
+    hashed, h, _ = _upload_hashers.get(upload_id, (0, hashlib.sha256(), None))
+    if hashed != offset:
+        h = None  # bytes before offset were hashed elsewhere; hash the whole file at the end
+        _upload_hashers.pop(upload_id, None)
+    received = offset
+    buffer = bytearray()
+
+    async def flush() -> None:
+        nonlocal received
+        data = bytes(buffer)
+        buffer.clear()
+        await run_in_threadpool(_write_at, path, received, data)
+        if h is not None:
+            await run_in_threadpool(h.update, data)
+        received += len(data)
+
+    try:
+        async for piece in request.stream():
+            if received + len(buffer) + len(piece) > row.size_bytes:
+                raise HTTPException(status_code=413, detail="Body runs past the declared upload size")
+            buffer += piece
+            if len(buffer) >= UPLOAD_CHUNK_BYTES:
+                await flush()
+        if buffer:
+            await flush()
+    except ClientDisconnect:
+        pass  # the bytes that arrived are kept below; the client resumes from the recorded offset
+    finally:
+        if buffer and received + len(buffer) <= row.size_bytes:
+            await flush()  # keep what arrived before a disconnect
+        if h is not None:
+            _keep_upload_hasher(upload_id, received, h)
+        result = await run_in_threadpool(_finish_upload_write, upload_id, received)
+    return result
+
+def take_upload(upload_id: str, kind: str, dest_path: str) -> tuple:
+    """Move a completed upload's file to dest_path. Returns (original filename, sha256)."""
+    db = SessionLocal()
+    try:
+        row = db.query(Upload).filter(Upload.id == upload_id).first()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Upload not found")
+        if row.kind != kind:
+            raise HTTPException(status_code=400, detail=f"Upload was created for {row.kind}, not {kind}")
+        taken = db.query(Upload).filter(Upload.id == upload_id, Upload.status == "complete").update(
+            {"status": "consumed", "updated_at": _utcnow_iso()}, synchronize_session=False
+        )
+        db.commit()
+        if not taken:
+            raise HTTPException(status_code=409, detail={"message": "Upload is not complete", **_upload_out(row)})
+        os.replace(_upload_part_path(upload_id), dest_path)
+        return row.filename, row.content_sha256
+    finally:
+        db.close()
+
 # ------------------- Existing media + narration endpoints -------------------
 
 @app.post("/monasteries/{monastery_id}/media", response_model=Dict)
 async def upload_media(
     monastery_id: int,
-    file: UploadFile = File(...),
+    file: UploadFile = File(None),
+    upload_id: Optional[str] = Form(None),  # a completed resumable upload, instead of file
     title: str = Form("Untitled"),
     type: str = Form("image"),
 ):
@@ -1832,16 +4789,21 @@ async def upload_media(
         monastery = db.query(Monastery).filter(Monastery.id == monastery_id).first()
         if not monastery:
             raise HTTPException(status_code=404, detail="Monastery not found")
+        if file is None and not upload_id:
+            raise HTTPException(status_code=400, detail="Provide a file or an upload_id")
 
-        ext = os.path.splitext(file.filename)[1]
-        fname = f"{uuid4().hex}{ext}"
-        fpath = os.path.join(MEDIA_ROOT, fname)
-
-        with open(fpath, "wb") as f:
-            f.write(await file.read())
+        tmp = upload_temp_path()
+        if file is not None:
+            ext = os.path.splitext(file.filename or "")[1]
+            _, sha256 = await run_in_threadpool(copy_upload, file.file, tmp, MEDIA_MAX_UPLOAD_BYTES)
+        else:
+            original, sha256 = await run_in_threadpool(take_upload, upload_id, "media", tmp)
+            ext = os.path.splitext(original)[1]
+        fname = await run_in_threadpool(blob_store.put_file, db, tmp, ext, sha256)
 
-        media_item = Media(monastery_id=monastery_id, title=title, type=type, file_path=fpath)
+        media_item = Media(monastery_id=monastery_id, title=title, type=type, file_path=fname)
         db.add(media_item)
+        bump_catalog_version(db)
         db.commit()
         db.refresh(media_item)
 
@@ -1850,184 +4812,312 @@ async def upload_media(
     finally:
         db.close()
 
-# ------------------- Multilingual AI Narration -------------------
-@app.post("/monasteries/{monastery_id}/narration_multilingual", response_model=Dict)
-def generate_monastery_narration_multilingual(monastery_id: int, payload: NarrationMultiIn, request: Request = None):
+def default_narration_script(monastery: Monastery) -> str:
+    return (
+        f"Welcome to {monastery.name}. Located in {monastery.location}, "
+        f"this monastery was founded in {monastery.founded}. "
+        f"Enjoy this guided audio narration as we explore its history, architecture, and cultural significance."
+    )
+
+@app.get("/monasteries/{monastery_id}/narration/stream")
+def stream_monastery_narration(monastery_id: int, lang: str = "en", voice: Optional[str] = None):
+    """The monastery's default narration in lang as audio/mpeg, streamed while it is synthesized.
+    Usable directly as an <audio> source; shares the cache with /narration_multilingual.
+    """
     db = SessionLocal()
     try:
         monastery = db.query(Monastery).filter(Monastery.id == monastery_id).first()
         if not monastery:
             raise HTTPException(status_code=404, detail="Monastery not found")
+        script = default_narration_script(monastery)
+    finally:
+        db.close()
+    lang = (lang or "en").strip()
+    text_value = script if lang.lower().startswith("en") else translate_with_openai(script, lang)
+    return _narration_stream_response(text_value, lang, voice or _pick_edge_voice_for_lang(lang))
 
-        api_key = os.getenv("OPENAI_API_KEY")
+# ------------------- Multilingual AI Narration -------------------
+def multilingual_narration_variants(target_lang: str, voice: Optional[str] = None) -> List[tuple]:
+    """Provider chain for a narration in target_lang: OpenAI TTS -> ElevenLabs -> Edge TTS -> gTTS."""
+    # Without a voice, use the Edge locale-specific voice; OpenAI gets alloy in its place
+    voice = voice or _pick_edge_voice_for_lang(target_lang)
+    if os.getenv("OPENAI_API_KEY"):
+        return [("openai", "gpt-4o-mini-tts", "alloy" if voice.endswith("Neural") else voice)]
+    variants = [("elevenlabs", "eleven_monolingual_v1", "EXAVITQu4vr4xnSDxMaL")] if os.getenv("ELEVENLABS_API_KEY") else []
+    gtts_lang = target_lang.split("-")[0] if target_lang else "en"
+    return variants + [("edge", "edge-tts", voice), ("gtts", "gtts", gtts_lang)]
+
+def narrate_monastery_multilingual(monastery_id: int, payload: NarrationMultiIn, progress=None) -> Dict:
+    """Translate and synthesize a monastery narration. Returns {"title", "type", "filename"}.
+    progress(stage, fraction), if given, is called as the work advances.
+    """
+    progress = progress or (lambda stage, fraction: None)
+    db = SessionLocal()
+    try:
+        monastery = db.query(Monastery).filter(Monastery.id == monastery_id).first()
+        if not monastery:
+            raise HTTPException(status_code=404, detail="Monastery not found")
 
         # Build a default script if none provided (using English base)
-        base_script = payload.script
-        if not base_script:
-            base_script = (
-                f"Welcome to {monastery.name}. Located in {monastery.location}, "
-                f"this monastery was founded in {monastery.founded}. "
-                f"Enjoy this guided audio narration as we explore its history, architecture, and cultural significance."
-            )
+        base_script = payload.script or default_narration_script(monastery)
 
         # Translate to target language if needed
+        progress("translating", 0.1)
         target_lang = (payload.target_lang or "en").strip()
         translated = base_script if target_lang.lower().startswith("en") else translate_with_openai(base_script, target_lang)
 
-        # Decide title and voice
         title = payload.title or f"Audio Narration ({target_lang})"
-        voice = payload.voice
-        if not voice:
-            # Prefer Edge locale-specific voice if OpenAI key is not present; else use alloy with OpenAI
-            voice = _pick_edge_voice_for_lang(target_lang)
+        gtts_lang = target_lang.split("-")[0] if target_lang else "en"
+        variants = multilingual_narration_variants(target_lang, payload.voice)
 
-        fname = f"{uuid4().hex}.mp3"
-        fpath = os.path.join(MEDIA_ROOT, fname)
+        fname = synthesize_narration(translated, target_lang, variants, payload.chunked, progress)
 
-        # Synthesize using the same provider chain: OpenAI TTS -> ElevenLabs -> Edge TTS -> gTTS
-        if api_key:
-            tts_payload = {
-                "model": "gpt-4o-mini-tts",
-                "voice": ("alloy" if voice.endswith("Neural") else (voice or "alloy")),
-                "input": translated,
-                "format": "mp3",
-            }
-            try:
-                resp = requests.post(
-                    "https://api.openai.com/v1/audio/speech",
-                    headers={
-                        "Authorization": f"Bearer {api_key}",
-                        "Content-Type": "application/json",
-                    },
-                    json=tts_payload,
-                    timeout=60,
-                )
-            except Exception as e:
-                raise HTTPException(status_code=502, detail=f"Failed to call TTS service: {e}")
-
-            if resp.status_code != 200:
-                try:
-                    err = resp.json()
-                except Exception:
-                    err = {"message": resp.text}
-                raise HTTPException(status_code=502, detail={"message": "TTS error", "data": err})
-
-            audio_bytes = resp.content
-            try:
-                with open(fpath, "wb") as f:
-                    f.write(audio_bytes)
-            except Exception as e:
-                raise HTTPException(status_code=500, detail=f"Failed to save audio: {e}")
-        else:
-            # Fallback provider chain
-            elevenlabs_key = os.getenv("ELEVENLABS_API_KEY")
+        progress("saving", 0.9)
+        media_item = narration_media(db, monastery_id, title, fname, gtts_lang.lower())
+        return {"title": media_item.title, "type": media_item.type, "filename": fname}
+    finally:
+        db.close()
 
-            if elevenlabs_key:
-                try:
-                    elevenlabs_voice = "EXAVITQu4vr4xnSDxMaL"  # default voice id
-                    elevenlabs_payload = {
-                        "text": translated,
-                        "model_id": "eleven_monolingual_v1",
-                        "voice_settings": {"stability": 0.5, "similarity_boost": 0.5},
-                    }
-                    headers = {"Accept": "audio/mpeg", "Content-Type": "application/json", "xi-api-key": elevenlabs_key}
-                    resp = requests.post(
-                        f"https://api.elevenlabs.io/v1/text-to-speech/{elevenlabs_voice}",
-                        json=elevenlabs_payload,
-                        headers=headers,
-                        timeout=60,
-                    )
-                    if resp.status_code == 200:
-                        with open(fpath, "wb") as f:
-                            f.write(resp.content)
-                    else:
-                        raise Exception(f"ElevenLabs API error: {resp.status_code}")
-                except Exception as e:
-                    print(f"ElevenLabs failed, trying Edge TTS: {e}")
-                    try:
-                        import edge_tts  # type: ignore
-
-                        async def synth_edge(text: str, selected_voice: str, out_path: str) -> None:
-                            communicate = edge_tts.Communicate(text, selected_voice)
-                            with open(out_path, "wb") as outfile:
-                                async for chunk in communicate.stream():
-                                    if chunk["type"] == "audio":
-                                        outfile.write(chunk["data"])
-
-                        edge_voice = voice or _pick_edge_voice_for_lang(target_lang)
-                        try:
-                            asyncio.run(synth_edge(translated, edge_voice, fpath))
-                        except RuntimeError:
-                            loop = asyncio.get_event_loop()
-                            loop.run_until_complete(synth_edge(translated, edge_voice, fpath))
-                    except Exception:
-                        try:
-                            from gtts import gTTS  # type: ignore
-                        except Exception:
-                            raise HTTPException(status_code=500, detail="Text-to-speech requires OPENAI_API_KEY, ELEVENLABS_API_KEY, edge-tts, or gTTS installed. Install one: pip install edge-tts OR pip install gTTS")
-                        try:
-                            # For gTTS, try to map simple language code
-                            gtts_lang = target_lang.split("-")[0] if target_lang else "en"
-                            tts = gTTS(text=translated, lang=gtts_lang)
-                            tts.save(fpath)
-                        except Exception as e:
-                            raise HTTPException(status_code=500, detail=f"Failed to synthesize audio with gTTS: {e}")
-            else:
-                # Directly try Edge, then gTTS
-                try:
-                    import edge_tts  # type: ignore
+@app.post("/monasteries/{monastery_id}/narration_multilingual", response_model=Dict)
+def generate_monastery_narration_multilingual(monastery_id: int, payload: NarrationMultiIn, request: Request = None):
+    result = narrate_monastery_multilingual(monastery_id, payload)
+    return {"title": result["title"], "type": result["type"], "file_url": media_file_url(request, result["filename"])}
 
-                    async def synth_edge(text: str, selected_voice: str, out_path: str) -> None:
-                        communicate = edge_tts.Communicate(text, selected_voice)
-                        with open(out_path, "wb") as outfile:
-                            async for chunk in communicate.stream():
-                                if chunk["type"] == "audio":
-                                    outfile.write(chunk["data"])
+def media_file_url(request: Optional[Request], fname: str) -> str:
+    """Absolute /media URL for a file, based on the request if available; fallback to localhost:8000."""
+    try:
+        if request is not None:
+            return str(request.url_for("serve_media", filename=fname))
+    except Exception:
+        pass
+    return f"http://127.0.0.1:8000/media/{fname}"
+
+# ------------------- Media serving -------------------
+# Every file under MEDIA_ROOT gets a unique name when it is written (uuid4, pano_*, content-keyed tts_*),
+# and files are never rewritten in place under the same name with different bytes, except by the
+# import/seed endpoints, which re-register what they copy. So /media responses can be cached forever, and
+# their metadata can come from the media_files index without a stat per request.
+MEDIA_INDEX_MEMORY_ENTRIES = int(os.getenv("MEDIA_INDEX_MEMORY_ENTRIES", "4096"))
+MEDIA_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# With nginx in front, e.g. MEDIA_ACCEL_REDIRECT=/_media/ (an internal location aliased to MEDIA_ROOT),
+# /media responses hand the file to nginx, which sends it with sendfile(2)
+MEDIA_ACCEL_REDIRECT = os.getenv("MEDIA_ACCEL_REDIRECT", "")
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+class MediaIndex:
+    """Size, mtime, mime type and SHA-256 of files under MEDIA_ROOT: a per-worker LRU in front of the
+    media_files table. Files are indexed when they are written (register) or on their first request.
+    """
 
-                    edge_voice = voice or _pick_edge_voice_for_lang(target_lang)
-                    try:
-                        asyncio.run(synth_edge(translated, edge_voice, fpath))
-                    except RuntimeError:
-                        loop = asyncio.get_event_loop()
-                        loop.run_until_complete(synth_edge(translated, edge_voice, fpath))
-                except Exception:
-                    try:
-                        from gtts import gTTS  # type: ignore
-                    except Exception:
-                        raise HTTPException(status_code=500, detail="Text-to-speech requires OPENAI_API_KEY, ELEVENLABS_API_KEY, edge-tts, or gTTS installed. Install one: pip install edge-tts OR pip install gTTS")
-                    try:
-                        gtts_lang = target_lang.split("-")[0] if target_lang else "en"
-                        tts = gTTS(text=translated, lang=gtts_lang)
-                        tts.save(fpath)
-                    except Exception as e:
-                        raise HTTPException(status_code=500, detail=f"Failed to synthesize audio with gTTS: {e}")
+    def __init__(self, memory_entries: int):
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()  # filename -> metadata
+        self._lock = threading.Lock()
+
+    def _remember(self, filename: str, info: Dict) -> None:
+        with self._lock:
+            self._memory[filename] = info
+            self._memory.move_to_end(filename)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    @staticmethod
+    def _as_dict(row: "MediaFile") -> Dict:
+        return {"filename": row.filename, "size": row.size_bytes, "mtime": row.mtime, "mime": row.mime, "sha256": row.sha256}
+
+    def lookup(self, filename: str) -> Optional[Dict]:
+        """Metadata for a file under MEDIA_ROOT, indexing it if needed; None if there is no such file."""
+        with self._lock:
+            info = self._memory.get(filename)
+            if info is not None:
+                self._memory.move_to_end(filename)
+                return info
+        db = SessionLocal()
+        try:
+            row = db.query(MediaFile).filter(MediaFile.filename == filename).first()
+            if row is not None:
+                info = self._as_dict(row)
+                self._remember(filename, info)
+                return info
+        finally:
+            db.close()
+        return self.register(filename)
+
+    def register(self, filename: str, sha256: Optional[str] = None) -> Optional[Dict]:
+        """(Re)index a file after writing it; pass sha256 if it was computed while writing."""
+        path = media_file_path(filename)
+        try:
+            st = os.stat(path)
+            if not os.path.isfile(path):
+                return None
+            if sha256 is None and blob_store.is_blob(filename):
+                sha256 = filename[:64]
+            sha256 = sha256 or file_sha256(path)
+        except OSError:
+            return None
+        info = {
+            "filename": filename,
+            "size": st.st_size,
+            "mtime": st.st_mtime,
+            "mime": mimetypes.guess_type(filename)[0] or "application/octet-stream",
+            "sha256": sha256,
+        }
+        db = SessionLocal()
+        try:
+            db.query(MediaFile).filter(MediaFile.filename == filename).delete(synchronize_session=False)
+            db.add(MediaFile(filename=filename, size_bytes=info["size"], mtime=info["mtime"], mime=info["mime"],
+                             sha256=sha256, indexed_at=_utcnow_iso()))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"media index write failed: {type(e).__name__}: {e}")
+        finally:
+            db.close()
+        self._remember(filename, info)
+        return info
+
+    def forget(self, filename: str) -> None:
+        with self._lock:
+            self._memory.pop(filename, None)
+        db = SessionLocal()
+        try:
+            db.query(MediaFile).filter(MediaFile.filename == filename).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
 
-        media_item = Media(monastery_id=monastery_id, title=title, type="audio", file_path=fpath, language="en")
-        db.add(media_item)
-        db.commit()
-        db.refresh(media_item)
+media_index = MediaIndex(MEDIA_INDEX_MEMORY_ENTRIES)
 
+def parse_byte_range(header: str, size: int) -> Optional[tuple]:
+    """(start, end) inclusive for a single-range `bytes=` header, or None to ignore the header and send
+    the whole file (malformed or multi-range). Raises ValueError if the range can't be satisfied.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep or not (first.isdigit() or last.isdigit()) or (first and not first.isdigit()) or (last and not last.isdigit()):
+        return None
+    if not first:  # suffix range: the last N bytes
+        if int(last) == 0 or size == 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - int(last)), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError("range starts past the end")
+    return start, min(int(last), size - 1) if last else size - 1
+
+class MediaFileResponse(Response):
+    """Bytes [start, start + length) of an open file. Uses the ASGI zero-copy send extension when the
+    server offers it, or pathsend for a whole file; otherwise reads chunks in the threadpool.
+    Closes the file when done.
+    """
+    chunk_size = 256 * 1024
+
+    def __init__(self, file, path: str, start: int, length: int, size: int, status_code: int, headers: Dict[str, str], media_type: str):
+        self.file = file
+        self.path = path
+        self.start = start
+        self.length = length
+        self.size = size
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.init_headers(headers)
+
+    def _read_at(self, offset: int, count: int) -> bytes:
+        self.file.seek(offset)
+        return self.file.read(count)
+
+    async def __call__(self, scope, receive, send) -> None:
         try:
-            if request is not None:
-                file_url = str(request.url_for("serve_media", filename=fname))
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            extensions = scope.get("extensions") or {}
+            if scope["method"].upper() == "HEAD" or not self.length:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+            elif "http.response.zerocopysend" in extensions:
+                await send({"type": "http.response.zerocopysend", "file": self.file, "offset": self.start, "count": self.length})
+            elif "http.response.pathsend" in extensions and self.start == 0 and self.length == self.size:
+                await send({"type": "http.response.pathsend", "path": self.path})
             else:
-                file_url = f"http://127.0.0.1:8000/media/{fname}"
-        except Exception:
-            file_url = f"http://127.0.0.1:8000/media/{fname}"
-        return {"title": media_item.title, "type": media_item.type, "file_url": file_url}
-    finally:
-        db.close()
+                offset, end = self.start, self.start + self.length
+                while offset < end:
+                    chunk = await run_in_threadpool(self._read_at, offset, min(self.chunk_size, end - offset))
+                    offset = end if not chunk else offset + len(chunk)  # a file truncated under us ends the body early
+                    await send({"type": "http.response.body", "body": chunk, "more_body": offset < end})
+        finally:
+            self.file.close()
+
+def _media_response(filename: str, headers, method: str) -> Response:
+    info = media_index.lookup(filename)
+    if info is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    etag = f'"{info["sha256"][:32]}"'
+    last_modified = formatdate(info["mtime"], usegmt=True)
+    out = {"Cache-Control": MEDIA_CACHE_CONTROL, "ETag": etag, "Last-Modified": last_modified, "Accept-Ranges": "bytes"}
+
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=out)
+    elif headers.get("if-modified-since"):
+        try:
+            if int(info["mtime"]) <= parsedate_to_datetime(headers["if-modified-since"]).timestamp():
+                return Response(status_code=304, headers=out)
+        except (TypeError, ValueError):
+            pass
+
+    if MEDIA_ACCEL_REDIRECT:
+        # nginx does the conditional and range handling itself from here
+        out["X-Accel-Redirect"] = MEDIA_ACCEL_REDIRECT.rstrip("/") + "/" + os.path.relpath(media_file_path(filename), MEDIA_ROOT).replace(os.sep, "/")
+        return Response(headers=out, media_type=info["mime"])
+
+    size = info["size"]
+    start, length, status = 0, size, 200
+    range_header = headers.get("range")
+    if_range = headers.get("if-range")
+    if range_header and (not if_range or if_range.strip() in (etag, last_modified)):
+        try:
+            byte_range = parse_byte_range(range_header, size)
+        except ValueError:
+            out["Content-Range"] = f"bytes */{size}"
+            return Response(status_code=416, headers=out)
+        if byte_range is not None:
+            start, length, status = byte_range[0], byte_range[1] - byte_range[0] + 1, 206
+            out["Content-Range"] = f"bytes {byte_range[0]}-{byte_range[1]}/{size}"
+    out["Content-Length"] = str(length)
+
+    path = media_file_path(filename)
+    try:
+        f = open(path, "rb", buffering=0)
+    except FileNotFoundError:
+        media_index.forget(filename)
+        raise HTTPException(status_code=404, detail="File not found")
+    return MediaFileResponse(f, path, start, length, size, status, out, info["mime"])
 
-@app.get("/media/{filename}")
-def serve_media(filename: str):
-    fpath = os.path.join(MEDIA_ROOT, filename)
-    if not os.path.exists(fpath):
+@app.api_route("/media/{filename}", methods=["GET", "HEAD"])
+async def serve_media(filename: str, request: Request):
+    """A file under MEDIA_ROOT with immutable caching headers, ETag/Last-Modified revalidation and
+    single byte ranges (for seeking in narration audio).
+    """
+    if filename != os.path.basename(filename) or filename.startswith("."):
         raise HTTPException(status_code=404, detail="File not found")
-    return FileResponse(fpath)
+    return await run_in_threadpool(_media_response, filename, request.headers, request.method)
 
 # ------------------- AI-generated Narration -------------------
-@app.post("/monasteries/{monastery_id}/narration", response_model=Dict)
-def generate_monastery_narration(monastery_id: int, payload: NarrationIn, request: Request = None):
+def narrate_monastery(monastery_id: int, payload: NarrationIn, progress=None) -> Dict:
+    """Synthesize a monastery narration. Returns {"title", "type", "filename"}.
+    progress(stage, fraction), if given, is called as the work advances.
+    """
+    progress = progress or (lambda stage, fraction: None)
     db = SessionLocal()
     try:
         monastery = db.query(Monastery).filter(Monastery.id == monastery_id).first()
@@ -2035,178 +5125,592 @@ def generate_monastery_narration(monastery_id: int, payload: NarrationIn, reques
             raise HTTPException(status_code=404, detail="Monastery not found")
 
         api_key = os.getenv("OPENAI_API_KEY")
+        elevenlabs_key = os.getenv("ELEVENLABS_API_KEY")
 
         title = payload.title or "Audio Narration"
         voice = payload.voice or "alloy"
-        script = payload.script
+        script = payload.script or default_narration_script(monastery)
+
+        # ElevenLabs TTS with very human-like voices
+        voice_mapping = {
+            "maple": "EXAVITQu4vr4xnSDxMaL",
+            "alloy": "pNInz6obpgDQGcFmaJgB",
+            "echo": "AZnzlk1XvdvUeBnXmlld",
+            "fable": "EXAVITQu4vr4xnSDxMaL",
+            "onyx": "pNInz6obpgDQGcFmaJgB",
+            "nova": "EXAVITQu4vr4xnSDxMaL",
+            "shimmer": "EXAVITQu4vr4xnSDxMaL"
+        }
+        edge_voice = voice
+        if voice.lower() in {"maple", "alloy", "verse", "breeze", "ember"}:
+            edge_voice = "en-US-AriaNeural"
 
-        if not script:
-            script = (
-                f"Welcome to {monastery.name}. Located in {monastery.location}, "
-                f"this monastery was founded in {monastery.founded}. "
-                f"Enjoy this guided audio narration as we explore its history, architecture, and cultural significance."
-            )
+        # Provider chain: OpenAI TTS, else ElevenLabs (most human-like) -> Edge TTS -> gTTS
+        if api_key:
+            variants = [("openai", "gpt-4o-mini-tts", voice)]
+        else:
+            variants = [("elevenlabs", "eleven_monolingual_v1", voice_mapping.get(voice.lower(), "EXAVITQu4vr4xnSDxMaL"))] if elevenlabs_key else []
+            variants += [("edge", "edge-tts", edge_voice), ("gtts", "gtts", "en")]
 
-        fname = f"{uuid4().hex}.mp3"
-        fpath = os.path.join(MEDIA_ROOT, fname)
+        fname = synthesize_narration(script, "en", variants, payload.chunked, progress)
 
-        if api_key:
-            tts_payload = {
-                "model": "gpt-4o-mini-tts",
-                "voice": voice,
-                "input": script,
-                "format": "mp3"
-            }
-            try:
-                resp = requests.post(
-                    "https://api.openai.com/v1/audio/speech",
-                    headers={
-                        "Authorization": f"Bearer {api_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json=tts_payload,
-                    timeout=60
+        progress("saving", 0.9)
+        media_item = narration_media(db, monastery_id, title, fname, "en")
+        return {"title": media_item.title, "type": media_item.type, "filename": fname}
+    finally:
+        db.close()
+
+@app.post("/monasteries/{monastery_id}/narration", response_model=Dict)
+def generate_monastery_narration(monastery_id: int, payload: NarrationIn, request: Request = None):
+    result = narrate_monastery(monastery_id, payload)
+    return {"title": result["title"], "type": result["type"], "file_url": media_file_url(request, result["filename"])}
+
+# ------------------- Background jobs -------------------
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+# A running job whose heartbeat is older than this lost its worker (e.g. a restart) and is queued again
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "600"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+class JobRunner:
+    """A bounded pool of worker threads running jobs persisted in the jobs table.
+
+    Workers claim queued jobs with a conditional UPDATE, so several server processes can share the
+    table. Handlers are plain functions handler(payload, progress) -> result dict; each progress
+    report also refreshes the job's heartbeat. Stale running jobs are queued again, up to
+    JOB_MAX_ATTEMPTS, so work survives restarts.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.handlers: Dict[str, object] = {}
+        self._threads: List[threading.Thread] = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._sweep_lock = threading.Lock()
+        self._swept_at = time.monotonic()
+
+    def handler(self, kind: str):
+        def register(fn):
+            self.handlers[kind] = fn
+            return fn
+        return register
+
+    def submit(self, kind: str, payload: Dict) -> str:
+        if kind not in self.handlers:
+            raise ValueError(f"unknown job kind: {kind}")
+        job_id = uuid4().hex
+        db = SessionLocal()
+        try:
+            db.add(Job(id=job_id, kind=kind, payload=json.dumps(payload), status="queued", progress=0.0, attempts=0, created_at=_utcnow_iso()))
+            db.commit()
+        finally:
+            db.close()
+        self._wake.set()
+        return job_id
+
+    def _update(self, job_id: str, **fields) -> None:
+        db = SessionLocal()
+        try:
+            db.query(Job).filter(Job.id == job_id).update(fields, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def requeue_stale(self) -> int:
+        """Queue running jobs whose worker stopped heartbeating again; fail those out of attempts."""
+        cutoff = _utcnow_iso(-JOB_STALE_SECONDS)
+        db = SessionLocal()
+        try:
+            stale = Job.status == "running", func.coalesce(Job.heartbeat_at, Job.started_at) < cutoff
+            failed = db.query(Job).filter(*stale, Job.attempts >= JOB_MAX_ATTEMPTS).update(
+                {"status": "failed", "error": "worker lost too many times", "finished_at": _utcnow_iso()}, synchronize_session=False
+            )
+            requeued = db.query(Job).filter(*stale).update({"status": "queued", "stage": "requeued"}, synchronize_session=False)
+            db.commit()
+            if failed or requeued:
+                print(f"jobs: requeued {requeued} stale job(s), failed {failed}")
+            return requeued
+        finally:
+            db.close()
+
+    def _sweep(self) -> None:
+        """Requeue stale jobs about once a minute; another process may have died holding them."""
+        with self._sweep_lock:
+            if time.monotonic() - self._swept_at < 60:
+                return
+            self._swept_at = time.monotonic()
+        try:
+            self.requeue_stale()
+        except Exception as e:
+            print(f"jobs: stale sweep failed: {type(e).__name__}: {e}")
+
+    def _claim(self) -> Optional[tuple]:
+        db = SessionLocal()
+        try:
+            while True:
+                row = db.query(Job.id, Job.kind, Job.payload).filter(Job.status == "queued").order_by(Job.created_at, Job.id).first()
+                if row is None:
+                    return None
+                now = _utcnow_iso()
+                claimed = db.query(Job).filter(Job.id == row.id, Job.status == "queued").update(
+                    {"status": "running", "started_at": now, "heartbeat_at": now, "attempts": func.coalesce(Job.attempts, 0) + 1},
+                    synchronize_session=False,
                 )
-            except Exception as e:
-                raise HTTPException(status_code=502, detail=f"Failed to call TTS service: {e}")
+                db.commit()
+                if claimed:
+                    return row
+        finally:
+            db.close()
 
-            if resp.status_code != 200:
-                try:
-                    err = resp.json()
-                except Exception:
-                    err = {"message": resp.text}
-                raise HTTPException(status_code=502, detail={"message": "TTS error", "data": err})
+    def _run(self, job_id: str, kind: str, payload: str) -> None:
+        def progress(stage: str, fraction: float) -> None:
+            self._update(job_id, stage=stage, progress=fraction, heartbeat_at=_utcnow_iso())
 
-            audio_bytes = resp.content
+        try:
+            result = self.handlers[kind](json.loads(payload or "{}"), progress)
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else f"{type(e).__name__}: {e}"
+            error = detail if isinstance(detail, str) else json.dumps(detail)
+            self._update(job_id, status="failed", error=error, finished_at=_utcnow_iso())
+            return
+        self._update(job_id, status="done", stage="done", progress=1.0, result=json.dumps(result), finished_at=_utcnow_iso())
+
+    def _worker(self) -> None:
+        while not self._stop.is_set():
             try:
-                with open(fpath, "wb") as f:
-                    f.write(audio_bytes)
+                job = self._claim()
             except Exception as e:
-                raise HTTPException(status_code=500, detail=f"Failed to save audio: {e}")
-        else:
-            # Try ElevenLabs first (most human-like), then Edge TTS, then gTTS
-            elevenlabs_key = os.getenv("ELEVENLABS_API_KEY")
-            
-            if elevenlabs_key:
-                try:
-                    # ElevenLabs TTS with very human-like voices
-                    voice_mapping = {
-                        "maple": "EXAVITQu4vr4xnSDxMaL",
-                        "alloy": "pNInz6obpgDQGcFmaJgB",
-                        "echo": "AZnzlk1XvdvUeBnXmlld",
-                        "fable": "EXAVITQu4vr4xnSDxMaL",
-                        "onyx": "pNInz6obpgDQGcFmaJgB",
-                        "nova": "EXAVITQu4vr4xnSDxMaL",
-                        "shimmer": "EXAVITQu4vr4xnSDxMaL"
-                    }
-                    
-                    elevenlabs_voice = voice_mapping.get(voice.lower(), "EXAVITQu4vr4xnSDxMaL")
-                    
-                    elevenlabs_payload = {
-                        "text": script,
-                        "model_id": "eleven_monolingual_v1",
-                        "voice_settings": {
-                            "stability": 0.5,
-                            "similarity_boost": 0.5
-                        }
-                    }
-                    
-                    headers = {
-                        "Accept": "audio/mpeg",
-                        "Content-Type": "application/json",
-                        "xi-api-key": elevenlabs_key
-                    }
-                    
-                    resp = requests.post(
-                        f"https://api.elevenlabs.io/v1/text-to-speech/{elevenlabs_voice}",
-                        json=elevenlabs_payload,
-                        headers=headers,
-                        timeout=60
-                    )
-                    
-                    if resp.status_code == 200:
-                        with open(fpath, 'wb') as f:
-                            f.write(resp.content)
-                    else:
-                        raise Exception(f"ElevenLabs API error: {resp.status_code}")
-                        
-                except Exception as e:
-                    print(f"ElevenLabs failed, trying Edge TTS: {e}")
-                    # Fallback to Edge TTS
-                    try:
-                        import edge_tts  # type: ignore
-                        async def synth_edge(text: str, selected_voice: str, out_path: str) -> None:
-                            communicate = edge_tts.Communicate(text, selected_voice)
-                            with open(out_path, "wb") as outfile:
-                                async for chunk in communicate.stream():
-                                    if chunk["type"] == "audio":
-                                        outfile.write(chunk["data"])
-                        edge_voice = voice
-                        if voice.lower() in {"maple", "alloy", "verse", "breeze", "ember"}:
-                            edge_voice = "en-US-AriaNeural"
-                        try:
-                            asyncio.run(synth_edge(script, edge_voice, fpath))
-                        except RuntimeError:
-                            loop = asyncio.get_event_loop()
-                            loop.run_until_complete(synth_edge(script, edge_voice, fpath))
-                    except Exception:
-                        try:
-                            from gtts import gTTS  # type: ignore
-                        except Exception:
-                            raise HTTPException(status_code=500, detail="Text-to-speech requires OPENAI_API_KEY, ELEVENLABS_API_KEY, edge-tts, or gTTS installed. Install one: pip install edge-tts OR pip install gTTS")
-                        try:
-                            tts = gTTS(text=script, lang="en")
-                            tts.save(fpath)
-                        except Exception as e:
-                            raise HTTPException(status_code=500, detail=f"Failed to synthesize audio with gTTS: {e}")
+                print(f"jobs: claim failed: {type(e).__name__}: {e}")
+                job = None
+            if job is None:
+                self._sweep()
+                self._wake.wait(JOB_POLL_SECONDS)
+                self._wake.clear()
+                continue
+            self._run(*job)
+
+    def start(self) -> None:
+        self.requeue_stale()
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+job_runner = JobRunner(JOB_WORKERS)
+
+@job_runner.handler("narration")
+def _narration_job(payload: Dict, progress) -> Dict:
+    return narrate_monastery(payload["monastery_id"], NarrationIn(**payload["request"]), progress)
+
+@job_runner.handler("narration_multilingual")
+def _narration_multilingual_job(payload: Dict, progress) -> Dict:
+    return narrate_monastery_multilingual(payload["monastery_id"], NarrationMultiIn(**payload["request"]), progress)
+
+@app.on_event("startup")
+def start_job_runner():
+    job_runner.start()
+
+@app.on_event("shutdown")
+def stop_job_runner():
+    job_runner.stop()
+
+class JobOut(BaseModel):
+    id: str
+    kind: str
+    status: str
+    stage: Optional[str] = None
+    progress: float = 0.0
+    file_url: Optional[str] = None
+    result: Optional[Dict] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    created_at: Optional[str] = None
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+
+def _submit_narration_job(kind: str, monastery_id: int, payload: BaseModel, request: Request) -> JSONResponse:
+    db = SessionLocal()
+    try:
+        if not db.query(Monastery.id).filter(Monastery.id == monastery_id).first():
+            raise HTTPException(status_code=404, detail="Monastery not found")
+    finally:
+        db.close()
+    return _job_accepted(job_runner.submit(kind, {"monastery_id": monastery_id, "request": payload.dict()}), request)
+
+def _job_accepted(job_id: str, request: Request) -> JSONResponse:
+    status_url = str(request.url_for("get_job", job_id=job_id))
+    return JSONResponse({"job_id": job_id, "status": "queued", "status_url": status_url}, status_code=202, headers={"Location": status_url})
+
+@app.post("/monasteries/{monastery_id}/narration/jobs", status_code=202)
+def submit_narration_job(monastery_id: int, payload: NarrationIn, request: Request):
+    """Queue a narration; poll GET /jobs/{id} for progress and the resulting file_url."""
+    return _submit_narration_job("narration", monastery_id, payload, request)
+
+@app.post("/monasteries/{monastery_id}/narration_multilingual/jobs", status_code=202)
+def submit_narration_multilingual_job(monastery_id: int, payload: NarrationMultiIn, request: Request):
+    """Queue a translated narration; poll GET /jobs/{id} for progress and the resulting file_url."""
+    return _submit_narration_job("narration_multilingual", monastery_id, payload, request)
+
+@app.get("/jobs/{job_id}", response_model=JobOut)
+def get_job(job_id: str, request: Request):
+    db = SessionLocal()
+    try:
+        job = db.query(Job).filter(Job.id == job_id).first()
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        result = json.loads(job.result) if job.result else None
+        return {
+            "id": job.id,
+            "kind": job.kind,
+            "status": job.status,
+            "stage": job.stage,
+            "progress": job.progress or 0.0,
+            "file_url": media_file_url(request, result["filename"]) if result and result.get("filename") else None,
+            "result": result,
+            "error": job.error,
+            "attempts": job.attempts or 0,
+            "created_at": job.created_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+        }
+    finally:
+        db.close()
+
+# ------------------- Narration pre-generation -------------------
+# Narration for every monastery in every PREGENERATE_LANGS language, so no visitor waits for synthesis.
+# Pairs whose audio and Media row already exist are skipped, so an interrupted run resumes where it stopped.
+PREGENERATE_LANGS = [l.strip() for l in os.getenv("PREGENERATE_LANGS", "en,hi,bn,ne").split(",") if l.strip()]
+PREGENERATE_WORKERS = int(os.getenv("PREGENERATE_WORKERS", "4"))
+
+def _narration_exists(db, monastery_id: int, text_value: str, lang: str, chunked: bool = False) -> bool:
+    variants = narration_cache_variants(text_value, multilingual_narration_variants(lang), chunked)
+    fname = tts_cache_lookup(text_value, lang, variants, count_hit=False)
+    if fname is None:
+        return False
+    fpath = os.path.join(MEDIA_ROOT, fname)
+    return db.query(Media.id).filter(Media.monastery_id == monastery_id, Media.file_path == fpath).first() is not None
+
+def pregenerate_narrations(langs: Optional[List[str]] = None, monastery_ids: Optional[List[int]] = None,
+                           workers: Optional[int] = None, chunked: bool = False, progress=None) -> Dict:
+    """Generate the default narration for every monastery (or monastery_ids) in every language in langs.
+    Scripts are translated once per language in batched calls; pairs are synthesized on a pool of
+    workers threads. Returns counts, failures and throughput.
+    """
+    progress = progress or (lambda stage, fraction: None)
+    langs = list(dict.fromkeys(langs or PREGENERATE_LANGS))
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        query = db.query(Monastery).order_by(Monastery.id)
+        if monastery_ids:
+            query = query.filter(Monastery.id.in_(monastery_ids))
+        scripts = {m.id: default_narration_script(m) for m in query.all()}
+
+        # All of a language's scripts go to the translator together; the translation memory then
+        # answers the per-monastery lookups narrate_monastery_multilingual makes
+        progress("translating", 0.0)
+        pending: List[tuple] = []
+        skipped = 0
+        for lang in langs:
+            if lang.lower().startswith("en"):
+                texts = list(scripts.values())
             else:
-                # Use Edge TTS if no ElevenLabs key
-                try:
-                    import edge_tts  # type: ignore
-                    async def synth_edge(text: str, selected_voice: str, out_path: str) -> None:
-                        communicate = edge_tts.Communicate(text, selected_voice)
-                        with open(out_path, "wb") as outfile:
-                            async for chunk in communicate.stream():
-                                if chunk["type"] == "audio":
-                                    outfile.write(chunk["data"])
-                    edge_voice = voice
-                    if voice.lower() in {"maple", "alloy", "verse", "breeze", "ember"}:
-                        edge_voice = "en-US-AriaNeural"
-                    try:
-                        asyncio.run(synth_edge(script, edge_voice, fpath))
-                    except RuntimeError:
-                        loop = asyncio.get_event_loop()
-                        loop.run_until_complete(synth_edge(script, edge_voice, fpath))
-                except Exception:
-                    try:
-                        from gtts import gTTS  # type: ignore
-                    except Exception:
-                        raise HTTPException(status_code=500, detail="Text-to-speech requires OPENAI_API_KEY, ELEVENLABS_API_KEY, edge-tts, or gTTS installed. Install one: pip install edge-tts OR pip install gTTS")
-                    try:
-                        tts = gTTS(text=script, lang="en")
-                        tts.save(fpath)
-                    except Exception as e:
-                        raise HTTPException(status_code=500, detail=f"Failed to synthesize audio with gTTS: {e}")
+                texts = translate_many(list(scripts.values()), lang)
+            for monastery_id, text_value in zip(scripts, texts):
+                if _narration_exists(db, monastery_id, text_value, lang, chunked):
+                    skipped += 1
+                else:
+                    pending.append((monastery_id, lang))
+    finally:
+        db.close()
 
-        media_item = Media(
-            monastery_id=monastery_id,
-            title=title,
-            type="audio",
-            file_path=fpath,
-            language=(target_lang.split('-')[0] if target_lang else None),
+    total = len(scripts) * len(langs)
+    done = skipped
+    failed: List[Dict] = []
+    done_lock = threading.Lock()
+
+    def one(pair: tuple) -> None:
+        nonlocal done
+        monastery_id, lang = pair
+        try:
+            narrate_monastery_multilingual(monastery_id, NarrationMultiIn(target_lang=lang, chunked=chunked))
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else f"{type(e).__name__}: {e}"
+            with done_lock:
+                failed.append({"monastery_id": monastery_id, "lang": lang, "error": detail if isinstance(detail, str) else json.dumps(detail)})
+        with done_lock:
+            done += 1
+            progress("synthesizing", done / total)
+
+    synth_started = time.perf_counter()
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers or PREGENERATE_WORKERS, len(pending)))) as pool:
+            list(pool.map(one, pending))
+    synth_seconds = time.perf_counter() - synth_started
+    generated = len(pending) - len(failed)
+    return {
+        "monasteries": len(scripts),
+        "languages": langs,
+        "total": total,
+        "generated": generated,
+        "skipped": skipped,
+        "failed": failed,
+        "seconds": round(time.perf_counter() - started, 2),
+        "narrations_per_minute": round(generated * 60 / synth_seconds, 1) if generated else 0.0,
+    }
+
+@job_runner.handler("narration_pregenerate")
+def _narration_pregenerate_job(payload: Dict, progress) -> Dict:
+    return pregenerate_narrations(payload.get("langs"), payload.get("monastery_ids"), payload.get("workers"), payload.get("chunked", False), progress)
+
+class PregenerateIn(BaseModel):
+    langs: Optional[List[str]] = None  # default PREGENERATE_LANGS
+    monastery_ids: Optional[List[int]] = None  # default all monasteries
+    workers: Optional[int] = None  # default PREGENERATE_WORKERS
+    chunked: bool = False
+
+@app.post("/admin/narration/pregenerate", status_code=202)
+def submit_narration_pregenerate(payload: PregenerateIn, request: Request):
+    """Queue narration for every monastery x language; GET /jobs/{id} shows progress and the final counts."""
+    return _job_accepted(job_runner.submit("narration_pregenerate", payload.dict()), request)
+
+# ------------------- Media garbage collection -------------------
+# Files under MEDIA_ROOT that nothing references: no Media row (by name, or by the absolute path older
+# uploads stored), no tts_audio row, no referenced media_blobs row, no live upload session. Scratch files
+# (.part) left by interrupted writes count too. The collector walks the tree in batches of MEDIA_GC_BATCH
+# files, checks each batch with a few IN queries and pauses between batches, so it runs on a job worker
+# beside request handling. Orphans modified within MEDIA_GC_GRACE_HOURS are kept: a write may not have
+# committed its row yet.
+MEDIA_GC_MODE = os.getenv("MEDIA_GC_MODE", "quarantine")  # quarantine | delete
+MEDIA_GC_GRACE_HOURS = float(os.getenv("MEDIA_GC_GRACE_HOURS", "24"))
+MEDIA_GC_QUARANTINE_DAYS = float(os.getenv("MEDIA_GC_QUARANTINE_DAYS", "7"))  # quarantined files are deleted after this
+MEDIA_GC_BATCH = int(os.getenv("MEDIA_GC_BATCH", "500"))
+MEDIA_GC_PAUSE_SECONDS = float(os.getenv("MEDIA_GC_PAUSE_SECONDS", "0.05"))
+MEDIA_GC_INTERVAL_HOURS = float(os.getenv("MEDIA_GC_INTERVAL_HOURS", "24"))  # 0 turns the scheduled run off
+MEDIA_QUARANTINE_DIR = os.path.join(MEDIA_ROOT, ".quarantine")
+_UPLOAD_PART_RE = re.compile(r"^\.upload_([0-9a-f]{32})\.part$")
+
+def _walk_files(root: str, skip: Optional[str] = None):
+    """DirEntry for every regular file under root, reading one directory listing at a time."""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.path != skip:
+                                stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            yield entry
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+def _batches(iterable, size: int):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _legacy_media_names(db) -> set:
+    """Basenames of Media rows that store a full path (older uploads), whichever root it was under."""
+    rows = db.query(Media.file_path).filter(or_(Media.file_path.like("%/%"), Media.file_path.like("%\\%"))).all()
+    return {re.split(r"[\\/]", fp)[-1] for (fp,) in rows if fp}
+
+def _referenced_media(db, names: List[str], legacy_names: set) -> set:
+    """Those of names that a Media, tts_audio, media_blobs or uploads row still points at."""
+    referenced = {n for n in names if n in legacy_names}
+    plain = [n for n in names if not n.endswith(".part")]
+    if plain:
+        referenced.update(
+            os.path.basename(fp) for (fp,) in db.query(Media.file_path).filter(
+                or_(Media.file_path.in_(plain), Media.file_path.in_([os.path.join(MEDIA_ROOT, n) for n in plain]))
+            )
         )
-        db.add(media_item)
+        referenced.update(n for (n,) in db.query(TtsAudio.filename).filter(TtsAudio.filename.in_(plain)))
+        referenced.update(n for (n,) in db.query(MediaBlob.filename).filter(MediaBlob.filename.in_(plain), MediaBlob.refcount > 0))
+    sessions = {m.group(1): n for n in names for m in [_UPLOAD_PART_RE.match(n)] if m}
+    if sessions:
+        live = db.query(Upload.id).filter(Upload.id.in_(list(sessions)), Upload.status != "consumed")
+        referenced.update(sessions[upload_id] for (upload_id,) in live)
+    return referenced
+
+def _dispose_media_file(path: str, mode: str) -> None:
+    if mode == "delete":
+        os.remove(path)
+        return
+    dest = os.path.join(MEDIA_QUARANTINE_DIR, os.path.relpath(path, MEDIA_ROOT))
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    os.replace(path, dest)
+    os.utime(dest)  # the quarantine period starts now
+
+def _drop_unreferenced_blob_row(name: str) -> bool:
+    """Delete the media_blobs row of an orphaned blob file. False if the blob is referenced again."""
+    db = SessionLocal()
+    try:
+        db.query(MediaBlob).filter(MediaBlob.filename == name, MediaBlob.refcount <= 0).delete(synchronize_session=False)
         db.commit()
-        db.refresh(media_item)
+        return db.query(MediaBlob.id).filter(MediaBlob.filename == name).first() is None
+    finally:
+        db.close()
 
-        # Build URL based on request if available; fallback to localhost:8000
-        try:
-            if request is not None:
-                file_url = str(request.url_for("serve_media", filename=fname))
-            else:
-                file_url = f"http://127.0.0.1:8000/media/{fname}"
-        except Exception:
-            file_url = f"http://127.0.0.1:8000/media/{fname}"
-        return {"title": media_item.title, "type": media_item.type, "file_url": file_url}
+def collect_media_garbage(mode: Optional[str] = None, grace_hours: Optional[float] = None,
+                          dry_run: bool = False, progress=None) -> Dict:
+    """Quarantine (or delete) unreferenced files under MEDIA_ROOT older than the grace period, purge
+    quarantined files past MEDIA_GC_QUARANTINE_DAYS and drop media_files rows for missing files.
+    """
+    mode = mode or MEDIA_GC_MODE
+    if mode not in ("quarantine", "delete"):
+        raise HTTPException(status_code=400, detail="mode must be 'quarantine' or 'delete'")
+    progress = progress or (lambda stage, fraction: None)
+    cutoff = time.time() - 3600 * (MEDIA_GC_GRACE_HOURS if grace_hours is None else grace_hours)
+    started = time.perf_counter()
+    out = {
+        "mode": mode, "dry_run": dry_run, "scanned": 0, "orphans": 0, "orphan_bytes": 0, "recent_orphans": 0,
+        "quarantined": 0, "deleted": 0, "reclaimed_bytes": 0, "quarantine_purged": 0,
+        "index_entries_dropped": 0, "errors": 0, "orphan_sample": [],
+    }
+    db = SessionLocal()
+    try:
+        legacy_names = _legacy_media_names(db)
     finally:
         db.close()
+
+    for batch in _batches(_walk_files(MEDIA_ROOT, skip=MEDIA_QUARANTINE_DIR), MEDIA_GC_BATCH):
+        out["scanned"] += len(batch)
+        db = SessionLocal()
+        try:
+            referenced = _referenced_media(db, [e.name for e in batch], legacy_names)
+        finally:
+            db.close()
+        for entry in batch:
+            if entry.name in referenced:
+                continue
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue  # removed meanwhile
+            if st.st_mtime > cutoff:
+                out["recent_orphans"] += 1
+                continue
+            out["orphans"] += 1
+            out["orphan_bytes"] += st.st_size
+            if len(out["orphan_sample"]) < 20:
+                out["orphan_sample"].append(os.path.relpath(entry.path, MEDIA_ROOT).replace(os.sep, "/"))
+            if dry_run:
+                continue
+            in_blobs = os.path.dirname(entry.path) != MEDIA_ROOT
+            try:
+                if in_blobs and blob_store.is_blob(entry.name):
+                    with blob_store._lock:
+                        if not _drop_unreferenced_blob_row(entry.name):
+                            continue
+                        _dispose_media_file(entry.path, mode)
+                else:
+                    _dispose_media_file(entry.path, mode)
+            except OSError as e:
+                out["errors"] += 1
+                print(f"media gc: {entry.path}: {type(e).__name__}: {e}")
+                continue
+            if mode == "delete":
+                out["deleted"] += 1
+                out["reclaimed_bytes"] += st.st_size
+            else:
+                out["quarantined"] += 1
+            if not entry.name.endswith(".part"):
+                media_index.forget(entry.name)
+        progress(f"scanned {out['scanned']} files", 0.0)
+        time.sleep(MEDIA_GC_PAUSE_SECONDS)
+
+    if not dry_run:
+        progress("purging quarantine", 0.8)
+        purge_before = time.time() - 86400 * MEDIA_GC_QUARANTINE_DAYS
+        for batch in _batches(_walk_files(MEDIA_QUARANTINE_DIR), MEDIA_GC_BATCH):
+            for entry in batch:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                    if st.st_mtime <= purge_before:
+                        os.remove(entry.path)
+                        out["quarantine_purged"] += 1
+                        out["reclaimed_bytes"] += st.st_size
+                except OSError:
+                    continue
+            time.sleep(MEDIA_GC_PAUSE_SECONDS)
+
+        progress("pruning media index", 0.9)
+        last_id = 0
+        while True:
+            db = SessionLocal()
+            try:
+                rows = db.query(MediaFile.id, MediaFile.filename).filter(MediaFile.id > last_id).order_by(MediaFile.id).limit(MEDIA_GC_BATCH).all()
+                if not rows:
+                    break
+                last_id = rows[-1].id
+                missing = [r.filename for r in rows if not os.path.isfile(media_file_path(r.filename))]
+            finally:
+                db.close()
+            for name in missing:
+                media_index.forget(name)
+            out["index_entries_dropped"] += len(missing)
+            time.sleep(MEDIA_GC_PAUSE_SECONDS)
+
+    out["seconds"] = round(time.perf_counter() - started, 2)
+    if out["orphans"] or out["quarantine_purged"]:
+        print(f"media gc: {out['orphans']} orphan(s), {out['orphan_bytes']} bytes ({mode}{', dry run' if dry_run else ''}); "
+              f"{out['reclaimed_bytes']} bytes reclaimed")
+    return out
+
+@job_runner.handler("media_gc")
+def _media_gc_job(payload: Dict, progress) -> Dict:
+    return collect_media_garbage(payload.get("mode"), payload.get("grace_hours"), payload.get("dry_run", False), progress)
+
+class MediaGcIn(BaseModel):
+    mode: Optional[str] = None  # quarantine | delete; default MEDIA_GC_MODE
+    grace_hours: Optional[float] = None  # default MEDIA_GC_GRACE_HOURS
+    dry_run: bool = False
+
+@app.post("/admin/media/gc", status_code=202)
+def submit_media_gc(payload: MediaGcIn, request: Request):
+    """Queue a media garbage collection; GET /jobs/{id} shows progress and what was reclaimed."""
+    if payload.mode not in (None, "quarantine", "delete"):
+        raise HTTPException(status_code=400, detail="mode must be 'quarantine' or 'delete'")
+    return _job_accepted(job_runner.submit("media_gc", payload.dict()), request)
+
+_media_gc_stop = threading.Event()
+
+def _media_gc_scheduler() -> None:
+    """Queue a collection when none was queued in the last MEDIA_GC_INTERVAL_HOURS (by any process)."""
+    while not _media_gc_stop.wait(600):
+        try:
+            db = SessionLocal()
+            try:
+                recent = db.query(Job.id).filter(
+                    Job.kind == "media_gc", Job.created_at > _utcnow_iso(-3600 * MEDIA_GC_INTERVAL_HOURS)
+                ).first()
+            finally:
+                db.close()
+            if recent is None:
+                job_runner.submit("media_gc", {})
+        except Exception as e:
+            print(f"media gc: scheduling failed: {type(e).__name__}: {e}")
+
+@app.on_event("startup")
+def start_media_gc_scheduler():
+    if MEDIA_GC_INTERVAL_HOURS > 0:
+        threading.Thread(target=_media_gc_scheduler, name="media-gc-scheduler", daemon=True).start()
+
+@app.on_event("shutdown")
+def stop_media_gc_scheduler():
+    _media_gc_stop.set()
@@ -0,0 +1,45 @@
+"""Generate narration audio for every monastery in every configured language ahead of visitors.
+
+Usage:
+    python pregenerate_narration.py [--langs en,hi,bn,ne] [--monastery 1 --monastery 2] [--workers 4] [--chunked]
+
+Languages default to PREGENERATE_LANGS. Narrations that already exist are skipped, so an interrupted
+run can simply be started again. The same work can be queued on a running server with
+POST /admin/narration/pregenerate.
+"""
+import argparse
+import time
+
+from main import PREGENERATE_LANGS, PREGENERATE_WORKERS, pregenerate_narrations
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--langs", default=",".join(PREGENERATE_LANGS), help="comma-separated language codes")
+    ap.add_argument("--monastery", type=int, action="append", help="monastery id (repeatable; default all)")
+    ap.add_argument("--workers", type=int, default=PREGENERATE_WORKERS)
+    ap.add_argument("--chunked", action="store_true", help="synthesize long scripts in concurrent chunks")
+    args = ap.parse_args()
+
+    started = time.perf_counter()
+    last = [""]
+
+    def progress(stage, fraction):
+        line = f"{stage}: {fraction * 100:5.1f}%  ({time.perf_counter() - started:.1f}s)"
+        if line != last[0]:
+            print(line, flush=True)
+            last[0] = line
+
+    langs = [l.strip() for l in args.langs.split(",") if l.strip()]
+    result = pregenerate_narrations(langs, args.monastery, args.workers, args.chunked, progress)
+    print(
+        f"{result['total']} narrations ({result['monasteries']} monasteries x {len(result['languages'])} languages): "
+        f"{result['generated']} generated, {result['skipped']} already present, {len(result['failed'])} failed "
+        f"in {result['seconds']}s ({result['narrations_per_minute']} narrations/min)"
+    )
+    for failure in result["failed"]:
+        print(f"  failed: monastery {failure['monastery_id']} [{failure['lang']}]: {failure['error']}")
+
+
+if __name__ == "__main__":
+    main()
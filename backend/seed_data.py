@@ -1,6 +1,5 @@
 import os
-from main import SessionLocal, Monastery, Media, MEDIA_ROOT, MonasteryInfo, AudioHighlight
-from uuid import uuid4
+from main import SessionLocal, Monastery, Media, MEDIA_ROOT, MonasteryInfo, AudioHighlight, blob_store, bump_catalog_version
 
 os.makedirs(MEDIA_ROOT, exist_ok=True)
 
@@ -133,12 +132,10 @@ if existing == 0:
 
         # Placeholder media
         for md in media_placeholders:
-            fname = f"{uuid4().hex}.jpg"
-            fpath = os.path.join(MEDIA_ROOT, fname)
-            with open(fpath, "wb") as f:
-                f.write(b"")
-            media_item = Media(monastery_id=new_mon.id, title=md["title"], type=md["type"], file_path=fpath)
+            fname = blob_store.put_bytes(db, b"", ".jpg")  # all placeholders share one empty blob
+            media_item = Media(monastery_id=new_mon.id, title=md["title"], type=md["type"], file_path=fname)
             db.add(media_item)
+        bump_catalog_version(db)
         db.commit()
 db.close()
 print("Seed data ready (no-op if already present).")
@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# main binds its engine, vector store and media directory at import, so point them at scratch paths
+# before any test imports it
+_tmp = tempfile.mkdtemp(prefix="monastery360-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'test.db')}"
+os.environ["VECTOR_STORE_DIR"] = os.path.join(_tmp, "vector_store")
+os.environ["MEDIA_ROOT"] = os.path.join(_tmp, "media")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,30 @@
+"""AnswerCache counts hits from both tiers and writes them in batches."""
+import main
+
+
+def test_memory_and_db_hits_are_flushed_together(monkeypatch):
+    monkeypatch.setattr(main, "QA_CACHE_USAGE_FLUSH_SECONDS", 3600)
+    cache = main.AnswerCache(memory_entries=8)
+    db = main.SessionLocal()
+    try:
+        cache.put(db, "Where is Enchey Monastery?", "en", "Above Gangtok.", [])
+        row_id = db.query(main.QaCache.id).filter(main.QaCache.question == "Where is Enchey Monastery?").scalar()
+
+        assert cache.get(db, "where is enchey monastery", "en")["answer"] == "Above Gangtok."  # memory hit
+        monkeypatch.setattr(main, "QA_CACHE_MEMORY_TTL_SECONDS", -1)
+        assert cache.get(db, "Where is Enchey Monastery?", "en")["answer"] == "Above Gangtok."  # table hit
+        monkeypatch.setattr(main, "QA_CACHE_MEMORY_TTL_SECONDS", 300)
+        assert cache.get(db, "Where is Enchey Monastery", "en")["answer"] == "Above Gangtok."  # memory hit
+        assert (cache.memory_hits, cache.db_hits) == (2, 1)
+        db.expire_all()
+        assert db.query(main.QaCache.hits).filter(main.QaCache.id == row_id).scalar() == 0  # not written yet
+
+        cache.flush_usage(db, force=True)
+        db.expire_all()
+        hits, last_used_at, created_at = db.query(
+            main.QaCache.hits, main.QaCache.last_used_at, main.QaCache.created_at
+        ).filter(main.QaCache.id == row_id).one()
+        assert hits == 3
+        assert last_used_at >= created_at
+    finally:
+        db.close()
@@ -0,0 +1,60 @@
+"""The catalog endpoints issue a fixed number of queries however many monasteries there are."""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert
+
+import main
+
+
+def _grow_catalog(total: int) -> None:
+    """Add monasteries, each with info, an image, an event, an archive item and a highlight, up to total."""
+    db = main.SessionLocal()
+    try:
+        start = db.query(main.Monastery).count()
+        ids = range(start + 1, total + 1)
+        db.execute(insert(main.Monastery), [{"id": i, "name": f"Monastery {i}", "location": "Sikkim", "founded": "1700"} for i in ids])
+        db.execute(insert(main.MonasteryInfo), [{"monastery_id": i, "description": f"About {i}", "latitude": 27.3, "longitude": 88.6} for i in ids])
+        db.execute(insert(main.Media), [{"monastery_id": i, "title": "Image", "type": "image", "file_path": f"{i}.jpg"} for i in ids])
+        db.execute(insert(main.Event), [{"monastery_id": i, "title": "Losar", "date": "2026-02-18", "type": "festival"} for i in ids])
+        db.execute(insert(main.ArchiveItem), [{"monastery_id": i, "title": "Manuscript", "type": "manuscript"} for i in ids])
+        db.execute(insert(main.AudioHighlight), [{"monastery_id": i, "title": "Prayer hall", "duration_sec": 180} for i in ids])
+        main.bump_catalog_version(db)  # so the next request misses the response cache
+        db.commit()
+    finally:
+        db.close()
+
+
+def _count_queries(client: TestClient, path: str, expected_items: int) -> int:
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(main.engine, "before_cursor_execute", count)
+    try:
+        resp = client.get(path)
+    finally:
+        event.remove(main.engine, "before_cursor_execute", count)
+    assert resp.status_code == 200
+    body = resp.json()
+    assert len(body if isinstance(body, list) else body["items"]) == expected_items
+    return len(statements)
+
+
+@pytest.mark.parametrize("path", ["/monasteries", "/api/monasteries"])
+def test_query_count_is_constant_as_catalog_grows(path):
+    db = main.SessionLocal()
+    try:
+        for model in list(main.CATALOG_RELATIONSHIPS.values()) + [main.Monastery]:
+            db.query(model).delete()
+        db.commit()
+    finally:
+        db.close()
+    client = TestClient(main.app)
+
+    _grow_catalog(10)
+    small = _count_queries(client, path, 10)
+    _grow_catalog(10_000)
+    large = _count_queries(client, path, 10_000)
+
+    assert small == large
@@ -0,0 +1,34 @@
+"""Uploads land in the blob store whatever their extension, are served from it and are freed on delete."""
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.mark.parametrize("filename", ["scan.jpg_large", "x.tif-1", "pano.equirectangular", "photo.JPG"])
+def test_upload_with_any_extension_is_served_and_freed(filename):
+    client = TestClient(main.app)
+    monastery_id = client.post("/api/monasteries", json={"name": f"Blob test {filename}"}).json()["id"]
+    data = os.urandom(4096)
+
+    resp = client.post(f"/monasteries/{monastery_id}/media", data={"title": "Scan", "type": "image"}, files={"file": (filename, data)})
+    assert resp.status_code == 200
+    name = resp.json()["file_url"].rsplit("/", 1)[1]
+    assert main.blob_store.is_blob(name)
+    path = main.blob_store.path(name)
+    assert os.path.isfile(path)
+
+    resp = client.get(f"/media/{name}")
+    assert resp.status_code == 200
+    assert resp.content == data
+
+    assert client.delete(f"/api/monasteries/{monastery_id}").status_code == 200
+    assert not os.path.exists(path)
+    db = main.SessionLocal()
+    try:
+        assert db.query(main.MediaBlob).filter(main.MediaBlob.filename == name).count() == 0
+    finally:
+        db.close()
+    assert client.get(f"/media/{name}").status_code == 404
@@ -0,0 +1,30 @@
+"""Chunked narration joins audio from a single provider, even when one chunk first fell back."""
+from fastapi.testclient import TestClient
+
+import main
+
+
+def test_chunk_that_fell_back_is_resynthesized_with_the_majority_provider(monkeypatch):
+    edge_failed = []
+
+    async def edge(text_value, variant, fpath, on_audio=None):
+        if "Second" in text_value and not edge_failed:
+            edge_failed.append(text_value)
+            raise RuntimeError("edge-tts hiccup")
+        main._write_audio(fpath, f"[edge:{text_value}]".encode())
+
+    async def gtts(text_value, variant, fpath, on_audio=None):
+        main._write_audio(fpath, f"[gtts:{text_value}]".encode())
+
+    monkeypatch.setitem(main.TTS_PROVIDERS, "edge", edge)
+    monkeypatch.setitem(main.TTS_PROVIDERS, "gtts", gtts)
+    script = "First paragraph about the prayer hall.\n\nSecond paragraph about the murals.\n\nThird paragraph."
+
+    resp = TestClient(main.app).post("/ai/narrate", json={"text": script, "lang": "en", "chunked": True})
+    assert resp.status_code == 200
+    assert edge_failed
+    fname = resp.json()["file_url"].rsplit("/media/", 1)[1]
+    with open(main.media_file_path(fname), "rb") as f:
+        audio = f.read().decode()
+    assert "[gtts:" not in audio
+    assert audio == "".join(f"[edge:{p}]" for p in script.split("\n\n"))
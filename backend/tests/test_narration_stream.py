@@ -0,0 +1,44 @@
+"""/ai/narrate/stream goes through the TTS engine: edge-tts chunks are relayed, and a fallback sends the file."""
+import os
+
+from fastapi.testclient import TestClient
+
+import main
+
+
+async def _streaming_edge(text_value, variant, fpath, on_audio=None):
+    chunks = [b"ID3-edge-", b"chunk-1-", b"chunk-2"]
+    for chunk in chunks:
+        if on_audio is not None:
+            on_audio(chunk)
+    main._write_audio(fpath, b"".join(chunks))
+
+
+async def _failing_edge(text_value, variant, fpath, on_audio=None):
+    raise RuntimeError("edge-tts unavailable")
+
+
+async def _gtts(text_value, variant, fpath, on_audio=None):
+    main._write_audio(fpath, b"ID3-gtts-whole-file")
+
+
+def test_stream_relays_edge_chunks_and_caches_them(monkeypatch):
+    monkeypatch.setitem(main.TTS_PROVIDERS, "edge", _streaming_edge)
+    monkeypatch.setitem(main.TTS_PROVIDERS, "gtts", _gtts)
+    client = TestClient(main.app)
+
+    resp = client.post("/ai/narrate/stream", json={"text": "Welcome to Rumtek.", "lang": "en"})
+    assert resp.status_code == 200
+    assert resp.content == b"ID3-edge-chunk-1-chunk-2"
+    cached = os.path.join(main.MEDIA_ROOT, resp.headers["content-location"].split("/media/", 1)[1])
+    with open(cached, "rb") as f:
+        assert f.read() == resp.content
+
+
+def test_stream_falls_back_to_whole_file_when_edge_fails_first(monkeypatch):
+    monkeypatch.setitem(main.TTS_PROVIDERS, "edge", _failing_edge)
+    monkeypatch.setitem(main.TTS_PROVIDERS, "gtts", _gtts)
+
+    resp = TestClient(main.app).post("/ai/narrate/stream", json={"text": "Welcome to Pemayangtse.", "lang": "en"})
+    assert resp.status_code == 200
+    assert resp.content == b"ID3-gtts-whole-file"
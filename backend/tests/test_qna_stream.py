@@ -0,0 +1,90 @@
+"""/ai/qna/stream against fake_openai.py: event order, and the finished answer lands in the answer cache."""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    server = subprocess.Popen(
+        [sys.executable, "-u", "fake_openai.py", "--port", "0", "--first-token-ms", "0", "--token-ms", "0"],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        base_url = server.stdout.readline().split()[-1]
+        monkeypatch.setenv("OPENAI_BASE_URL", base_url)
+        monkeypatch.setenv("OPENAI_API_KEY", "test")
+        monkeypatch.setattr(main, "OPENAI_BASE_URL", base_url)  # read at import
+        yield base_url
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+@pytest.fixture
+def ingested(fake_openai):
+    """A one-monastery catalog, embedded through the fake provider."""
+    db = main.SessionLocal()
+    try:
+        for model in list(main.CATALOG_RELATIONSHIPS.values()) + [main.Monastery]:
+            db.query(model).delete()
+        m = main.Monastery(name="Rumtek Monastery", location="Gangtok", founded="1966")
+        db.add(m)
+        db.flush()
+        db.add(main.MonasteryInfo(monastery_id=m.id, description="Seat of the Karmapa, known for its golden stupa."))
+        main.bump_catalog_version(db)
+        db.commit()
+    finally:
+        db.close()
+    assert TestClient(main.app).post("/ai/ingest").json()["count"] > 0
+
+
+def _events(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_stream_sends_citations_tokens_done_and_caches_answer(ingested):
+    question = "What is Rumtek Monastery known for?"
+    client = TestClient(main.app)
+
+    resp = client.post("/ai/qna/stream", json={"question": question})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    events = _events(resp.text)
+    kinds = [kind for kind, _ in events]
+    assert kinds[0] == "citations"
+    assert [c["title"] for c in events[0][1]] == ["Rumtek Monastery"]
+    assert kinds[-1] == "done"
+    assert kinds[1:-1] and set(kinds[1:-1]) == {"token"}
+    assert len(kinds) > 3  # the fake completion streams word by word
+    assert events[-1][1] == {"cached": False}
+    answer = "".join(data["text"] for kind, data in events if kind == "token")
+    assert "simulated answer" in answer
+
+    db = main.SessionLocal()
+    try:
+        cached = main.answer_cache.get(db, question, "en")
+    finally:
+        db.close()
+    assert cached is not None
+    assert cached["answer"] == answer
+
+    # The same question is now answered from the cache in one token event
+    events = _events(client.post("/ai/qna/stream", json={"question": question}).text)
+    assert [kind for kind, _ in events] == ["citations", "token", "done"]
+    assert events[1][1]["text"] == answer
+    assert events[2][1] == {"cached": True}
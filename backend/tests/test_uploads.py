@@ -0,0 +1,44 @@
+"""Resumable uploads hash their bytes across PUTs, and a worker keeps a bounded number of running hashes."""
+import hashlib
+
+from fastapi.testclient import TestClient
+
+import main
+
+
+def _start(client, data: bytes) -> str:
+    resp = client.post("/uploads", json={"filename": "pano.jpg", "size": len(data), "sha256": hashlib.sha256(data).hexdigest()})
+    assert resp.status_code == 201
+    return resp.json()["upload_id"]
+
+
+def _put(client, upload_id: str, offset: int, data: bytes):
+    return client.put(f"/uploads/{upload_id}", content=data, headers={"Upload-Offset": str(offset)})
+
+
+def test_upload_in_two_puts_completes_with_its_hash():
+    client = TestClient(main.app)
+    data = b"0123456789" * 100
+    upload_id = _start(client, data)
+
+    assert _put(client, upload_id, 0, data[:400]).json()["offset"] == 400
+    assert upload_id in main._upload_hashers
+    done = _put(client, upload_id, 400, data[400:]).json()
+    assert done["status"] == "complete"
+    assert done["sha256"] == hashlib.sha256(data).hexdigest()
+    assert upload_id not in main._upload_hashers
+
+
+def test_running_hashes_are_capped(monkeypatch):
+    monkeypatch.setattr(main, "UPLOAD_HASHERS_MAX", 2)
+    client = TestClient(main.app)
+    data = b"x" * 64
+    ids = [_start(client, data) for _ in range(3)]
+    for upload_id in ids:
+        _put(client, upload_id, 0, data[:10])
+
+    assert [i for i in ids if i in main._upload_hashers] == ids[1:]
+    # The session whose hash was dropped still completes; its file is hashed in full
+    done = _put(client, ids[0], 10, data[10:]).json()
+    assert done["status"] == "complete"
+    assert done["sha256"] == hashlib.sha256(data).hexdigest()